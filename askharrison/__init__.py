@@ -0,0 +1,5 @@
+# askharrison is split between this package and the src/ tree (crawl, codeReview, dataSink);
+# pick up the src/askharrison portion too when it is on sys.path
+from pkgutil import extend_path
+
+__path__ = extend_path(__path__, __name__)
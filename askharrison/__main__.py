@@ -0,0 +1,5 @@
+import sys
+
+from askharrison.cli import main
+
+sys.exit(main())
@@ -0,0 +1,91 @@
+"""
+Client of askharrison.api_server with the same interface as SearchService, so pages can
+switch between in-process and served search with one environment variable.
+
+Example usage:
+    service = get_search_service()  # SearchApiClient when ASKHARRISON_API_URL is set
+    queries = service.expand_queries("best vector database", 10, "normal")
+"""
+import os
+import threading
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+from askharrison.search_service import SearchResult, SearchService, records_to_rerank
+
+API_URL_ENV = "ASKHARRISON_API_URL"
+
+
+class SearchApiClient:
+    def __init__(self, base_url: str, timeout: float = 300.0, session: Optional[requests.Session] = None):
+        """
+        :param base_url: e.g. http://127.0.0.1:8520
+        :param timeout: seconds per request, expansion + search + rerank can take a while
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+    def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+        if response.status_code == 400:
+            raise ValueError(response.json().get("detail", response.text))
+        response.raise_for_status()
+        return response.json()
+
+    def expand_queries(self, problem: str, num_queries: int, query_type: str) -> List[str]:
+        return self._post("/search/expand", {"problem": problem, "num_queries": num_queries,
+                                             "query_type": query_type})["queries"]
+
+    def perform_search(self, queries: List[str]) -> List[SearchResult]:
+        return [SearchResult(**r) for r in self._post("/search/results", {"queries": queries})["results"]]
+
+    def rerank_results(self, problem: str, results: List[SearchResult], top_k: int):
+        response = self._post("/search/rerank", {"problem": problem, "results": [asdict(r) for r in results],
+                                                 "top_k": top_k})
+        return records_to_rerank(response["reranked"])
+
+    def expand_and_search(self, problem: str, num_queries: int, query_type: str, top_k: int,
+                          on_query: Optional[Callable[[str], None]] = None):
+        response = self._post("/search/pipeline", {"problem": problem, "num_queries": num_queries,
+                                                   "query_type": query_type, "top_k": top_k})
+        if on_query is not None:
+            # the API answers once the searches are done, report the queries afterwards
+            for query in response["queries"]:
+                on_query(query)
+        return (response["queries"], [SearchResult(**r) for r in response["results"]],
+                [SearchResult(**r) for r in response["candidates"]])
+
+    def research(self, problem: str, num_queries: int, query_type: str, top_k: int, sources: List[str]):
+        response = self._post("/search/research", {"problem": problem, "num_queries": num_queries,
+                                                   "query_type": query_type, "top_k": top_k, "sources": sources})
+        return (response["queries"], [SearchResult(**r) for r in response["results"]],
+                records_to_rerank(response["reranked"]))
+
+    def parse_document(self, document: str, schema, api_key: Optional[str] = None, max_chunk_size: int = 3000):
+        return self._post("/parse", {"document": document, "schema": schema, "api_key": api_key,
+                                     "max_chunk_size": max_chunk_size})["parsed"]
+
+
+_services: Dict[Optional[str], Any] = {}
+_services_lock = threading.Lock()
+
+
+def get_search_service():
+    """
+    The process-wide search service: a SearchApiClient when ASKHARRISON_API_URL is set,
+    otherwise an in-process SearchService (whose caches are then shared by every session).
+    """
+    base_url = os.environ.get(API_URL_ENV) or None
+    with _services_lock:
+        if base_url not in _services:
+            _services[base_url] = SearchApiClient(base_url) if base_url else SearchService()
+        return _services[base_url]
+
+
+def get_api_client() -> Optional[SearchApiClient]:
+    """the shared SearchApiClient, None when ASKHARRISON_API_URL is not set"""
+    service = get_search_service()
+    return service if isinstance(service, SearchApiClient) else None
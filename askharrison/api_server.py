@@ -0,0 +1,162 @@
+"""
+Local HTTP/JSON API for the search and document parsing logic, so the Streamlit pages can be
+thin clients and blocking LLM / search calls are spread over several worker processes.
+
+Each worker process has its own SearchService (and caches); blocking calls run in the
+worker's thread pool, so one slow LLM call doesn't hold up the worker's other requests.
+
+GET /metrics serves the metrics of askharrison.telemetry. They are per worker process, a scrape
+reaches one of the workers; for whole-service numbers run one worker per port, or set
+ASKHARRISON_TRACE_FILE so all workers append their spans to one JSONL file.
+
+Run with several workers:
+    python -m askharrison.api_server --workers 4 --port 8520
+    # or: uvicorn askharrison.api_server:app --workers 4 --port 8520
+
+Requires the api extra: pip install fastapi uvicorn
+"""
+import argparse
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Union
+
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from askharrison.search_service import SearchResult, SearchService, rerank_to_records
+from askharrison.telemetry import render_prometheus, span
+
+DEFAULT_PORT = 8520
+
+app = FastAPI(title="askharrison API")
+search_service = SearchService()
+
+
+class SearchResultModel(BaseModel):
+    query: str
+    title: str
+    link: str
+    snippet: str
+
+
+class ExpandRequest(BaseModel):
+    problem: str
+    num_queries: int = Field(default=10, ge=1, le=50)
+    query_type: str = "normal"
+
+
+class SearchRequest(BaseModel):
+    queries: List[str]
+
+
+class RerankRequest(BaseModel):
+    problem: str
+    results: List[SearchResultModel]
+    top_k: int = Field(default=10, ge=1, le=100)
+
+
+class PipelineRequest(ExpandRequest):
+    top_k: int = Field(default=10, ge=1, le=100)
+
+
+class ResearchRequest(PipelineRequest):
+    sources: List[str] = ["google", "arxiv"]
+
+
+class ParseRequest(BaseModel):
+    document: str
+    schema_: Union[Dict[str, Any], str] = Field(alias="schema")
+    api_key: Optional[str] = None
+    max_chunk_size: int = 3000
+
+
+def _results(results: List[SearchResult]) -> List[Dict[str, str]]:
+    return [asdict(r) for r in results]
+
+
+def _traced(function, *args, **kwargs):
+    # root span of the request, the stages it runs are its children
+    with span("api_request", endpoint=function.__name__):
+        return function(*args, **kwargs)
+
+
+async def _call(function, *args, **kwargs):
+    """run a blocking call in the thread pool, invalid input becomes a 400"""
+    try:
+        return await run_in_threadpool(_traced, function, *args, **kwargs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """stage latencies, LLM tokens / retries and cache hits of this worker process, Prometheus text format"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.post("/search/expand")
+async def expand(request: ExpandRequest):
+    queries = await _call(search_service.expand_queries, request.problem, request.num_queries, request.query_type)
+    return {"queries": queries}
+
+
+@app.post("/search/results")
+async def search(request: SearchRequest):
+    return {"results": _results(await _call(search_service.perform_search, request.queries))}
+
+
+@app.post("/search/rerank")
+async def rerank(request: RerankRequest):
+    results = [SearchResult(**r.model_dump()) for r in request.results]
+    reranked = await _call(search_service.rerank_results, request.problem, results, request.top_k)
+    return {"reranked": rerank_to_records(reranked)}
+
+
+@app.post("/search/pipeline")
+async def pipeline(request: PipelineRequest):
+    queries, results, candidates = await _call(search_service.expand_and_search, request.problem,
+                                               request.num_queries, request.query_type, request.top_k)
+    return {"queries": queries, "results": _results(results), "candidates": _results(candidates)}
+
+
+@app.post("/search/research")
+async def research(request: ResearchRequest):
+    queries, results, reranked = await _call(search_service.research, request.problem, request.num_queries,
+                                             request.query_type, request.top_k, request.sources)
+    return {"queries": queries, "results": _results(results), "reranked": rerank_to_records(reranked)}
+
+
+def parse_document(document: str, schema, api_key: Optional[str] = None, max_chunk_size: int = 3000):
+    from askharrison.llm.openai_llm_client import OpenAIClient
+    from askharrison.llmparse.document_parser import DocumentParser, ParsingConfig
+
+    parser = DocumentParser(OpenAIClient(api_key=api_key), ParsingConfig(max_chunk_size=max_chunk_size))
+    return parser.parse_document(document, schema)
+
+
+@app.post("/parse")
+async def parse(request: ParseRequest):
+    parsed = await _call(parse_document, request.document, request.schema_, request.api_key, request.max_chunk_size)
+    return {"parsed": parsed}
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="askharrison HTTP/JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=4, help="worker processes")
+    args = parser.parse_args(argv)
+    # an import string (not the app object) is required for several workers
+    uvicorn.run("askharrison.api_server:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from collections import defaultdict
+import threading
 import arxiv
 from tqdm import tqdm
 from askharrison.llm_models import process_question, safe_eval, extract_python_code
@@ -14,6 +15,20 @@ def expand_arxiv_query(problem_statement: str, model="gpt-4") -> list[str]:
     queries = safe_eval(extract_python_code(queries_llm_output))
     return queries
 
+# one client for the process, with the 3 seconds between requests arXiv's API terms ask for;
+# arxiv.Client isn't thread safe, so calls from pipeline threads are serialized by ARXIV_LOCK
+ARXIV_CLIENT = arxiv.Client(page_size=ARXIV_NUM_SEARCH_RESULTS)
+ARXIV_LOCK = threading.Lock()
+
+def search_arxiv(query: str, max_results: int = ARXIV_NUM_SEARCH_RESULTS) -> list[arxiv.Result]:
+    """
+    Search arxiv for a single query and return the arxiv.Result objects.
+    Safe to call from several threads, the requests are sent one at a time.
+    """
+    search = arxiv.Search(query=query, max_results=max_results, sort_by=arxiv.SortCriterion.Relevance)
+    with ARXIV_LOCK:
+        return list(ARXIV_CLIENT.results(search))
+
 def run_multi_arixv_queries(queries: list[str]):
     """
     Run multiple queries on arxiv and return the results
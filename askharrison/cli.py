@@ -0,0 +1,146 @@
+"""
+askharrison command line.
+
+    askharrison search "efficient long context attention" --top-k 10
+    askharrison search "efficient long context attention" --sources google arxiv --json
+    askharrison parse resume.txt --schema Resume
+    askharrison serve --workers 4          # HTTP/JSON API, see askharrison.api_server
+    askharrison jobs --workers 4           # background job worker, see askharrison.job_queue
+    askharrison traces traces.jsonl        # p50 / p95 latency and tokens per stage, see askharrison.telemetry
+
+Each command imports only what it uses, so `askharrison --help` and light commands start fast.
+"""
+import argparse
+import json
+import os
+import sys
+
+
+def run_search(args) -> int:
+    from dataclasses import asdict
+    from askharrison.api_client import get_search_service
+    from askharrison.search_service import rerank_to_records
+
+    service = get_search_service()
+    if args.sources != ["google"]:
+        queries, results, reranked = service.research(args.problem, args.num_queries, args.query_type,
+                                                      args.top_k, args.sources)
+    else:
+        queries, results, candidates = service.expand_and_search(args.problem, args.num_queries, args.query_type,
+                                                                 args.top_k)
+        reranked = service.rerank_results(args.problem, candidates, top_k=args.top_k)
+    records = rerank_to_records(reranked)
+    if args.json:
+        print(json.dumps({"queries": queries, "results": [asdict(r) for r in results], "reranked": records},
+                         indent=2, default=str))
+        return 0
+    for record in records:
+        print(f"{record['overall']:>5} {record['title']}\n      {record['link']}")
+    return 0
+
+
+def run_parse(args) -> int:
+    with open(args.document, encoding="utf-8") as f:
+        document = f.read()
+    schema = args.schema
+    if os.path.isfile(schema):
+        with open(schema, encoding="utf-8") as f:
+            schema = json.load(f)
+    elif schema.lstrip().startswith("{"):
+        schema = json.loads(schema)
+
+    from askharrison.api_client import get_api_client
+
+    api_client = get_api_client()
+    if api_client is not None:
+        parsed = api_client.parse_document(document, schema, max_chunk_size=args.max_chunk_size)
+    else:
+        from askharrison.llm.openai_llm_client import OpenAIClient
+        from askharrison.llmparse.document_parser import DocumentParser, ParsingConfig
+
+        parser = DocumentParser(OpenAIClient(), ParsingConfig(max_chunk_size=args.max_chunk_size))
+        parsed = parser.parse_document(document, schema)
+    print(json.dumps(parsed, indent=2, default=str))
+    return 0
+
+
+def run_serve(args) -> int:
+    from askharrison import api_server
+
+    api_server.main(["--host", args.host, "--port", str(args.port), "--workers", str(args.workers)])
+    return 0
+
+
+def run_jobs(args) -> int:
+    from askharrison import job_queue
+
+    argv = ["--workers", str(args.workers)] + (["--db", args.db] if args.db else [])
+    if args.metrics_port:
+        argv += ["--metrics-port", str(args.metrics_port)]
+    job_queue.main(argv)
+    return 0
+
+
+def run_traces(args) -> int:
+    from askharrison.telemetry import summarize_traces
+
+    if not args.trace_file:
+        print("no trace file given and ASKHARRISON_TRACE_FILE is not set", file=sys.stderr)
+        return 2
+    summary = summarize_traces(args.trace_file)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+    print(f"{'span':<20} {'count':>6} {'p50 s':>8} {'p95 s':>8} {'max s':>8} {'total s':>9} {'tokens in/out':>15}")
+    for row in summary:
+        print(f"{row['span']:<20} {row['count']:>6} {row['p50_s']:>8} {row['p95_s']:>8} {row['max_s']:>8} "
+              f"{row['total_s']:>9} {row['prompt_tokens']:>7}/{row['completion_tokens']:<7}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="askharrison", description="AskHarrison GenAI tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    search_parser = subparsers.add_parser("search", help="expand, search and rerank a problem")
+    search_parser.add_argument("problem")
+    search_parser.add_argument("--num-queries", type=int, default=10)
+    search_parser.add_argument("--query-type", choices=["disable", "normal", "diverse"], default="normal")
+    search_parser.add_argument("--top-k", type=int, default=10)
+    search_parser.add_argument("--sources", nargs="+", choices=["google", "arxiv"], default=["google"])
+    search_parser.add_argument("--json", action="store_true", help="print queries, results and ranking as JSON")
+    search_parser.set_defaults(run=run_search)
+
+    parse_parser = subparsers.add_parser("parse", help="extract structured data from a text document")
+    parse_parser.add_argument("document", help="path of a text document")
+    parse_parser.add_argument("--schema", required=True,
+                              help="JSON schema (inline or a file), a description, or a BAML schema name")
+    parse_parser.add_argument("--max-chunk-size", type=int, default=3000)
+    parse_parser.set_defaults(run=run_parse)
+
+    serve_parser = subparsers.add_parser("serve", help="run the HTTP/JSON API")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8520)
+    serve_parser.add_argument("--workers", type=int, default=4)
+    serve_parser.set_defaults(run=run_serve)
+
+    jobs_parser = subparsers.add_parser("jobs", help="run queued background jobs")
+    jobs_parser.add_argument("--db", default=None, help="job database, ASKHARRISON_JOBS_DB by default")
+    jobs_parser.add_argument("--workers", type=int, default=4)
+    jobs_parser.add_argument("--metrics-port", type=int, default=None, help="serve Prometheus metrics at :port/metrics")
+    jobs_parser.set_defaults(run=run_jobs)
+
+    traces_parser = subparsers.add_parser("traces", help="latency percentiles and tokens per stage of a trace file")
+    traces_parser.add_argument("trace_file", nargs="?", default=os.environ.get("ASKHARRISON_TRACE_FILE"))
+    traces_parser.add_argument("--json", action="store_true")
+    traces_parser.set_defaults(run=run_traces)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
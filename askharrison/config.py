@@ -1,5 +1,6 @@
 import json
 import os
+from functools import lru_cache
 
 # Get the directory of the current script
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -7,17 +8,6 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 # Construct the path to the resources directory
 resources_dir = os.path.join(os.path.dirname(current_dir), 'resources')
 
-# Load credentials and access codes
-with open(os.path.join(resources_dir, "info.json")) as f:
-    CREDS = json.load(f)
-
-with open(os.path.join(resources_dir, "access_codes.txt")) as f:
-    VALID_ACCESS_CODES = [line.strip() for line in f]
-
-# API configurations
-API_KEY = CREDS["api_key"]
-SEARCH_ENGINE_ID = CREDS["internet_cx"]
-
 # Model configurations
 DEFAULT_MODEL = "gpt-4"
 
@@ -29,4 +19,30 @@ NUM_SEARCH_QUERIES = 10
 NUM_SEARCH_RESULTS = 10
 
 ARXIV_NUM_SEARCH_RESULTS = 20
-ARXIV_NUM_EXPANEDED_QUERIES = 10
\ No newline at end of file
+ARXIV_NUM_EXPANEDED_QUERIES = 10
+
+
+# Credentials and access codes are read from resources/ on first access
+# (config.API_KEY, config.VALID_ACCESS_CODES, ...), not when the module is imported
+@lru_cache(maxsize=None)
+def load_creds() -> dict:
+    with open(os.path.join(resources_dir, "info.json")) as f:
+        return json.load(f)
+
+@lru_cache(maxsize=None)
+def load_access_codes() -> list:
+    with open(os.path.join(resources_dir, "access_codes.txt")) as f:
+        return [line.strip() for line in f]
+
+_LAZY_SETTINGS = {
+    "CREDS": load_creds,
+    "VALID_ACCESS_CODES": load_access_codes,
+    # API configurations
+    "API_KEY": lambda: load_creds()["api_key"],
+    "SEARCH_ENGINE_ID": lambda: load_creds()["internet_cx"],
+}
+
+def __getattr__(name):
+    if name in _LAZY_SETTINGS:
+        return _LAZY_SETTINGS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
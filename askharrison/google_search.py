@@ -1,17 +1,16 @@
 import requests
-import pandas as pd
 from typing import List, Dict, Any
-from openai import OpenAI
 
-from askharrison.config import API_KEY, SEARCH_ENGINE_ID, NUM_SEARCH_RESULTS
+from askharrison import config
 
 def google_custom_search(q):
     url = "https://www.googleapis.com/customsearch/v1"
+    # credentials are read on first use, not when this module is imported
     params = {
-        "key": API_KEY,
-        "cx": SEARCH_ENGINE_ID,
+        "key": config.API_KEY,
+        "cx": config.SEARCH_ENGINE_ID,
         "q": q,
-        "num": NUM_SEARCH_RESULTS
+        "num": config.NUM_SEARCH_RESULTS
     }
     response = requests.get(url, params=params)
     if response.status_code == 200:
@@ -0,0 +1,467 @@
+"""
+Background jobs for long-running page actions (searches, large reranks, document parsing).
+
+Pages submit a job and poll it instead of running the work in the Streamlit script thread,
+so a rerun or page refresh neither kills nor repeats it. Jobs live in SQLite: status,
+progress, result and error are kept by job id, and submitting a job identical (same kind and
+parameters) to a queued or running one returns the existing job instead of starting another.
+Cancellation is cooperative, handlers see it through JobContext.
+
+Jobs are run by JobRunners, threads inside each Streamlit server process (get_job_runner)
+and/or separate worker processes (python -m askharrison.job_queue), all sharing the database.
+A running job records its runner's pid and a heartbeat; only jobs of a runner that died (or
+stopped heartbeating) are recovered: queued again, or failed when they carried secrets.
+
+Secrets (a user's API key) never reach the database: they stay in the memory of the runner
+the job was submitted to, which is the only one to claim the job. The dedupe key includes a
+digest of the secrets, so jobs of two users with different keys are never merged.
+
+Example usage:
+    runner = get_job_runner()
+    job_id = runner.submit("search", {"problem": "vector databases", "num_queries": 10,
+                                      "query_type": "normal", "top_k": 10})
+    job = runner.store.get(job_id)  # {"status": "running", "progress": 0.4, ...}
+    runner.store.cancel(job_id)
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from askharrison.telemetry import serve_metrics, span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.environ.get("ASKHARRISON_JOBS_DB", os.path.join(os.path.expanduser("~"), ".askharrison", "jobs.db"))
+IN_FLIGHT = ("queued", "running")
+FINISHED = ("done", "failed", "cancelled")
+DEFAULT_LEASE_SECONDS = 60.0
+SECRETS_LOST_ERROR = "the job's secrets were lost with the runner it was submitted to, submit it again"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    job_key TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    result TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    needs_secrets INTEGER NOT NULL DEFAULT 0,
+    runner_pid INTEGER,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_key ON jobs (job_key, status);
+"""
+
+# kind -> handler(params, context) returning a JSON serializable result
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any], "JobContext"], Any]] = {}
+
+
+def job_handler(kind: str):
+    """register the decorated function as the handler of a job kind"""
+    def register(function):
+        JOB_HANDLERS[kind] = function
+        return function
+    return register
+
+
+def job_key(kind: str, params: Dict[str, Any], secrets: Optional[Dict[str, Any]] = None) -> str:
+    """dedupe key of a job; secrets only contribute a digest, the key doesn't reveal them"""
+    secrets_digest = hashlib.sha256(json.dumps(secrets or {}, sort_keys=True, default=str).encode()).hexdigest()
+    return hashlib.sha256(json.dumps([kind, params, secrets_digest], sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _pid_is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except PermissionError:
+        return True  # alive, owned by another user
+    except OSError:
+        return False
+    return True
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobStore:
+    """SQLite table of jobs, safe across threads and processes"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+            # databases created before jobs had an owner
+            columns = {row["name"] for row in connection.execute("PRAGMA table_info(jobs)")}
+            for column, definition in (("needs_secrets", "INTEGER NOT NULL DEFAULT 0"),
+                                       ("runner_pid", "INTEGER"), ("heartbeat_at", "REAL")):
+                if column not in columns:
+                    connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {definition}")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # autocommit mode, transactions are explicit BEGIN IMMEDIATE ... COMMIT
+        connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def submit(self, kind: str, params: Dict[str, Any], reuse_done: bool = False,
+               secrets: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Queue a job, or return the id of an identical queued or running job.
+
+        :param reuse_done: also return an identical job that already finished successfully
+        :param secrets: only used for the dedupe key and to mark the job as needing secrets,
+            which the submitting runner (this process) keeps in memory
+        """
+        key = job_key(kind, params, secrets)
+        statuses = IN_FLIGHT + ("done",) if reuse_done else IN_FLIGHT
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            existing = connection.execute(
+                f"SELECT id FROM jobs WHERE job_key = ? AND status IN ({','.join('?' * len(statuses))}) "
+                "AND cancel_requested = 0 ORDER BY created_at DESC LIMIT 1", (key, *statuses)).fetchone()
+            if existing:
+                connection.execute("COMMIT")
+                return existing["id"]
+            job_id = uuid.uuid4().hex
+            now = time.time()
+            connection.execute(
+                "INSERT INTO jobs (id, kind, job_key, params, created_at, needs_secrets, runner_pid, heartbeat_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, key, json.dumps(params, default=str), now, int(bool(secrets)),
+                 os.getpid() if secrets else None, now if secrets else None))
+            connection.execute("COMMIT")
+            return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as connection:
+            row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        job["needs_secrets"] = bool(job["needs_secrets"])
+        return job
+
+    def claim_next(self, kinds=None, secret_job_ids=()) -> Optional[Dict[str, Any]]:
+        """
+        atomically move the oldest queued job (of one of kinds) to running, owned by this
+        process, and return it. Jobs needing secrets are only claimed when in secret_job_ids,
+        the jobs whose secrets the caller holds.
+        """
+        kinds, secret_job_ids = list(kinds or JOB_HANDLERS), list(secret_job_ids)
+        if not kinds:
+            return None
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                f"SELECT id FROM jobs WHERE status = 'queued' AND kind IN ({','.join('?' * len(kinds))}) "
+                f"AND (needs_secrets = 0 OR id IN ({','.join('?' * len(secret_job_ids))})) "
+                "ORDER BY created_at LIMIT 1", (*kinds, *secret_job_ids)).fetchone()
+            if row is None:
+                connection.execute("COMMIT")
+                return None
+            now = time.time()
+            connection.execute("UPDATE jobs SET status = 'running', started_at = ?, runner_pid = ?, heartbeat_at = ? "
+                               "WHERE id = ?", (now, os.getpid(), now, row["id"]))
+            connection.execute("COMMIT")
+        return self.get(row["id"])
+
+    def heartbeat(self, job_ids: Iterable[str]):
+        """renew the lease of in-flight jobs owned by this process"""
+        with self._connect() as connection:
+            connection.executemany(
+                f"UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status IN ({','.join('?' * len(IN_FLIGHT))})",
+                [(time.time(), job_id, *IN_FLIGHT) for job_id in job_ids])
+
+    def queued_ids(self, job_ids: Iterable[str]) -> set:
+        """the ids of job_ids that are still queued"""
+        job_ids = list(job_ids)
+        if not job_ids:
+            return set()
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"SELECT id FROM jobs WHERE status = 'queued' AND id IN ({','.join('?' * len(job_ids))})",
+                job_ids).fetchall()
+        return {row["id"] for row in rows}
+
+    def report(self, job_id: str, progress: float, message: Optional[str] = None):
+        with self._connect() as connection:
+            connection.execute("UPDATE jobs SET progress = ?, message = COALESCE(?, message) WHERE id = ?",
+                               (min(max(progress, 0.0), 1.0), message, job_id))
+
+    def complete(self, job_id: str, result: Any):
+        with self._connect() as connection:
+            connection.execute("UPDATE jobs SET status = 'done', progress = 1, result = ?, finished_at = ? "
+                               "WHERE id = ?", (json.dumps(result, default=str), time.time(), job_id))
+
+    def fail(self, job_id: str, error: str, status: str = "failed"):
+        with self._connect() as connection:
+            connection.execute("UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                               (status, error, time.time(), job_id))
+
+    def cancel(self, job_id: str) -> bool:
+        """cancel a queued job right away, ask a running one to stop; False if it already finished"""
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            updated = connection.execute(
+                "UPDATE jobs SET status = CASE status WHEN 'queued' THEN 'cancelled' ELSE status END, "
+                "cancel_requested = 1, finished_at = CASE status WHEN 'queued' THEN ? ELSE finished_at END "
+                "WHERE id = ? AND status IN ('queued', 'running')", (time.time(), job_id)).rowcount
+            connection.execute("COMMIT")
+        return bool(updated)
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        with self._connect() as connection:
+            row = connection.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def requeue_running(self, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> int:
+        """
+        Recover the jobs of runners that are gone: their process is dead, or they haven't renewed
+        the heartbeat for lease_seconds. Running jobs are queued again; jobs needing secrets (running
+        or queued) fail, the secrets were only in that runner's memory. Returns the requeued count.
+        """
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            rows = connection.execute(
+                "SELECT id, needs_secrets, runner_pid, heartbeat_at FROM jobs "
+                "WHERE status = 'running' OR (status = 'queued' AND needs_secrets = 1)").fetchall()
+            stale_before = time.time() - lease_seconds
+            orphaned = [row for row in rows if row["runner_pid"] is None or not _pid_is_alive(row["runner_pid"])
+                        or (row["heartbeat_at"] or 0) < stale_before]
+            requeued = [(row["id"],) for row in orphaned if not row["needs_secrets"]]
+            connection.executemany("UPDATE jobs SET status = 'queued', runner_pid = NULL WHERE id = ?", requeued)
+            connection.executemany(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                [(SECRETS_LOST_ERROR, time.time(), row["id"]) for row in orphaned if row["needs_secrets"]])
+            connection.execute("COMMIT")
+        return len(requeued)
+
+    def delete_finished(self, older_than: float) -> int:
+        """drop finished jobs (and their results) older than older_than seconds"""
+        with self._connect() as connection:
+            return connection.execute(
+                f"DELETE FROM jobs WHERE status IN ({','.join('?' * len(FINISHED))}) AND finished_at < ?",
+                (*FINISHED, time.time() - older_than)).rowcount
+
+
+class JobContext:
+    """what a handler sees of its job: progress reporting, cancellation and in-memory secrets"""
+
+    def __init__(self, store: JobStore, job_id: str, secrets: Optional[Dict[str, Any]] = None):
+        self.store = store
+        self.job_id = job_id
+        self.secrets = secrets or {}
+
+    def report(self, progress: float, message: Optional[str] = None):
+        """record progress (0-1), raises JobCancelled when the job was cancelled"""
+        self.store.report(self.job_id, progress, message)
+        self.check_cancelled()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.store.is_cancel_requested(self.job_id)
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled(self.job_id)
+
+
+class JobRunner:
+    def __init__(self, store: JobStore, max_workers: int = 4, poll_interval: float = 0.5,
+                 handlers: Optional[Dict[str, Callable]] = None, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        """
+        :param store: queue to take jobs from
+        :param max_workers: jobs run at the same time
+        :param poll_interval: seconds between queue polls when idle
+        :param handlers: kind -> handler, JOB_HANDLERS by default
+        :param lease_seconds: jobs of other runners without a heartbeat for this long are recovered;
+            this runner renews its own every lease_seconds / 10
+        """
+        self.store = store
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.handlers = JOB_HANDLERS if handlers is None else handlers
+        self.lease_seconds = lease_seconds
+        # secrets (e.g. a user's API key) are handed to the job in memory, never written to the database
+        self._secrets: Dict[str, Dict[str, Any]] = {}
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, kind: str, params: Dict[str, Any], secrets: Optional[Dict[str, Any]] = None,
+               reuse_done: bool = False) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = self.store.submit(kind, params, reuse_done=reuse_done, secrets=secrets)
+        # a job it was deduplicated into that already runs or finished won't need them
+        if secrets and self.store.queued_ids([job_id]):
+            self._secrets.setdefault(job_id, secrets)
+        self._wake.set()
+        return job_id
+
+    def process(self, job: Dict[str, Any], secrets: Optional[Dict[str, Any]] = None):
+        """run a claimed job; secrets are taken from this runner's when not given"""
+        secrets = secrets or self._secrets.pop(job["id"], None)
+        if job["needs_secrets"] and not secrets:
+            # never run it without them, e.g. an OpenAI client would fall back to the server's key
+            self.store.fail(job["id"], SECRETS_LOST_ERROR)
+            return
+        context = JobContext(self.store, job["id"], secrets)
+        try:
+            context.check_cancelled()
+            with span("job", kind=job["kind"], job_id=job["id"]):
+                result = self.handlers[job["kind"]](job["params"], context)
+        except JobCancelled:
+            self.store.fail(job["id"], "cancelled", status="cancelled")
+        except Exception as e:
+            logger.exception(f"Job {job['id']} ({job['kind']}) failed")
+            self.store.fail(job["id"], str(e))
+        else:
+            self.store.complete(job["id"], result)
+
+    def run_forever(self):
+        running = {}
+        last_heartbeat = last_recovery = float("-inf")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while not self._stop.is_set():
+                running = {future: job_id for future, job_id in running.items() if not future.done()}
+                now = time.monotonic()
+                if now - last_heartbeat > self.lease_seconds / 10:
+                    # secrets of jobs that aren't queued anymore (deduplicated into a job another
+                    # runner claimed, cancelled...) are never used, drop them
+                    held = list(self._secrets)
+                    for job_id in set(held) - self.store.queued_ids(held):
+                        self._secrets.pop(job_id, None)
+                    # running jobs and the queued ones whose secrets only this runner holds
+                    self.store.heartbeat([*running.values(), *self._secrets])
+                    last_heartbeat = now
+                if now - last_recovery > self.lease_seconds:
+                    self.store.requeue_running(self.lease_seconds)
+                    last_recovery = now
+                job = (self.store.claim_next(self.handlers, list(self._secrets))
+                       if len(running) < self.max_workers else None)
+                if job is not None:
+                    # taken here, before the next round drops the secrets of jobs that aren't queued
+                    running[executor.submit(self.process, job, self._secrets.pop(job["id"], None))] = job["id"]
+                    continue
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def start(self) -> "JobRunner":
+        """run the queue in a daemon thread of this process"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="job-runner", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+_runners: Dict[str, JobRunner] = {}
+_runners_lock = threading.Lock()
+
+
+def get_job_runner(db_path: str = DEFAULT_DB_PATH, max_workers: int = 4) -> JobRunner:
+    """process-wide runner of db_path, started on first use; survives Streamlit reruns"""
+    with _runners_lock:
+        if db_path not in _runners:
+            _runners[db_path] = JobRunner(JobStore(db_path), max_workers=max_workers).start()
+        return _runners[db_path]
+
+
+# built-in jobs of the pages, heavy modules are imported when a job runs
+
+@job_handler("search")
+def search_job(params: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """
+    Query expansion, search and rerank of the search page, through the API when
+    ASKHARRISON_API_URL is set; several sources go through the research pipeline.
+    """
+    from dataclasses import asdict
+    from askharrison.search_service import rerank_to_records
+    from askharrison.api_client import get_search_service
+
+    service = get_search_service()
+    problem, num_queries, query_type, top_k = params["problem"], params["num_queries"], params["query_type"], params["top_k"]
+    sources = params.get("sources", ["google"])
+    if sources != ["google"]:
+        context.report(0.0, f"Searching {', '.join(sources)}")
+        queries, results, reranked = service.research(problem, num_queries, query_type, top_k, sources)
+    else:
+        searched = []
+
+        def on_query(query: str):
+            searched.append(query)
+            context.report(0.8 * len(searched) / max(num_queries, len(searched)), f"Searching: {query}")
+
+        context.report(0.0, "Expanding queries")
+        queries, results, candidates = service.expand_and_search(problem, num_queries, query_type, top_k,
+                                                                 on_query=on_query)
+        context.report(0.8, "Reranking results")
+        reranked = service.rerank_results(problem, candidates, top_k=top_k)
+    return {"queries": queries, "results": [asdict(r) for r in results], "reranked": rerank_to_records(reranked)}
+
+
+@job_handler("parse_document")
+def parse_document_job(params: Dict[str, Any], context: JobContext) -> Any:
+    """DocumentParser.parse_document (through the API when configured), progress is reported per chunk"""
+    from askharrison.api_client import get_api_client
+    from askharrison.llm.openai_llm_client import OpenAIClient
+    from askharrison.llmparse.document_parser import DocumentParser, ParsingConfig
+
+    api_client = get_api_client()
+    if api_client is not None:
+        context.report(0.0, "Parsing")
+        return api_client.parse_document(params["document"], params["schema"], api_key=context.secrets.get("api_key"),
+                                         max_chunk_size=params.get("max_chunk_size", 3000))
+    parser = DocumentParser(OpenAIClient(api_key=context.secrets.get("api_key")),
+                            ParsingConfig(max_chunk_size=params.get("max_chunk_size", 3000)))
+    context.report(0.0, "Parsing")
+    return parser.parse_document(
+        params["document"], params["schema"],
+        progress_callback=lambda done, total: context.report(done / total, f"Parsed chunk {done}/{total}"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="run queued askharrison jobs")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--metrics-port", type=int, default=None, help="serve Prometheus metrics at :port/metrics")
+    args = parser.parse_args(argv)
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+    JobRunner(JobStore(args.db), max_workers=args.workers).run_forever()
+
+
+if __name__ == "__main__":
+    main()
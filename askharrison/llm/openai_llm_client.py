@@ -1,5 +1,6 @@
 from openai import OpenAI
 from askharrison.llm.llm_client import LLMClient
+from askharrison.llm_models import create_chat_completion
 
 class OpenAIClient(LLMClient):
     def __init__(self, api_key: str=None):
@@ -26,10 +27,7 @@ class OpenAIClient(LLMClient):
             ]
         else:
             messages.append({"role": "user", "content": question})
-        response = self.client.chat.completions.create(
-            model=model,
-            messages=messages
-        )
+        response = create_chat_completion(self.client, model=model, messages=messages)
         return response.choices[0].message.content
         
     async def async_generate(self, question: str, model: str = 'gpt-4o', messages=[]) -> str:
@@ -50,8 +48,5 @@ class OpenAIClient(LLMClient):
             ]
         else:
             messages.append({"role": "user", "content": question})
-        response = self.client.chat.completions.create(
-            model=model,
-            messages=messages
-        )
+        response = create_chat_completion(self.client, model=model, messages=messages)
         return response.choices[0].message.content
\ No newline at end of file
@@ -1,17 +1,15 @@
-import requests
-import pandas as pd
-from typing import List, Dict, Any, Callable, Optional
-from openai import OpenAI
-import pandas as pd
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional
+import ast
 import re
 import concurrent.futures
-import time
-import random
-from tqdm import tqdm
+import contextvars
 import functools
-import tiktoken
 import json
 
+from askharrison.telemetry import span, start_span, end_span, record_llm_usage
+
+# openai, tiktoken and tqdm are imported where they are used, importing this module stays cheap
+
 def process_question(question: str, model: str = 'gpt-4o') -> str:
     """
     Processes a question using the specified language model and returns the response.
@@ -23,16 +21,125 @@ def process_question(question: str, model: str = 'gpt-4o') -> str:
     Returns:
         str: The response generated by the language model.
     """
-    client = OpenAI()
-    response = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant"},
-            {"role": "user", "content": question}
-        ]
-    )
+    from openai import OpenAI
+
+    response = create_chat_completion(OpenAI(), model=model, messages=[
+        {"role": "system", "content": "You are a helpful assistant"},
+        {"role": "user", "content": question}
+    ])
     return response.choices[0].message.content
 
+def create_chat_completion(client, model: str, messages: List[Dict[str, str]], **kwargs):
+    """
+    client.chat.completions.create inside an "llm_call" span, recording prompt and completion
+    tokens and the retries the openai client made.
+
+    Args:
+        client: An openai.OpenAI client.
+        model (str): The model name.
+        messages (List[Dict[str, str]]): The chat messages.
+
+    Returns:
+        The ChatCompletion.
+    """
+    with span("llm_call", model=model):
+        raw = client.chat.completions.with_raw_response.create(model=model, messages=messages, **kwargs)
+        response = raw.parse()
+        usage = getattr(response, "usage", None)
+        record_llm_usage(model, getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None),
+                         retries=getattr(raw, "retries_taken", 0))
+        return response
+
+def stream_question(question: str, model: str = 'gpt-4o') -> Iterator[str]:
+    """
+    Like process_question, but yields the response text as it is generated.
+
+    Args:
+        question (str): The question to be processed by the language model.
+        model (str, optional): The model to be used. Defaults to 'gpt-4o'.
+
+    Yields:
+        str: Pieces of the response, in order.
+    """
+    from openai import OpenAI
+
+    started = start_span("llm_call", model=model, stream=True)
+    try:
+        raw = OpenAI().chat.completions.with_raw_response.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": "You are a helpful assistant"},
+                {"role": "user", "content": question}
+            ],
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        stream, usage = raw.parse(), None
+        try:
+            for chunk in stream:
+                usage = chunk.usage or usage  # only set on the last chunk
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except GeneratorExit:
+            # the consumer stopped early (iter_list_strings stops at the closing ']'),
+            # read the short rest of the response for its usage chunk, then finish normally
+            for chunk in stream:
+                usage = chunk.usage or usage
+    except BaseException as e:
+        end_span(started, e)
+        raise
+    record_llm_usage(model, getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None),
+                     retries=getattr(raw, "retries_taken", 0), target=started)
+    end_span(started)
+
+def iter_list_strings(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Incrementally parse a python/JSON list of strings from streamed llm output, yielding
+    each string as soon as its closing quote arrives instead of waiting for the whole list.
+    Text before the opening '[' (e.g. a code fence) is skipped. If no list item is found,
+    falls back to safe_eval on the whole output.
+
+    Args:
+        chunks (Iterable[str]): Pieces of the llm response, e.g. from stream_question.
+
+    Yields:
+        str: The list items, in order.
+    """
+    in_list, closed, quote, escaped, raw = False, False, None, False, []
+    seen_text, yielded = [], False
+    for chunk in chunks:
+        seen_text.append(chunk)
+        for char in chunk:
+            if closed:
+                break
+            if not in_list:
+                in_list = char == '['
+            elif quote is None:
+                if char in ('"', "'"):
+                    quote, raw = char, []
+                closed = char == ']'
+            elif escaped:
+                raw.append(char)
+                escaped = False
+            elif char == '\\':
+                raw.append(char)
+                escaped = True
+            elif char == quote:
+                try:
+                    yield ast.literal_eval(quote + ''.join(raw) + quote)
+                    yielded = True
+                except (ValueError, SyntaxError):
+                    pass
+                quote = None
+            else:
+                raw.append(char)
+        if closed and yielded:
+            return
+    if not yielded:
+        items = safe_eval(extract_python_code(''.join(seen_text)), default_output=[])
+        for item in items if isinstance(items, list) else []:
+            yield str(item)
+
 def polish_code(code: str) -> str:
     """
     Polish the code by removing the leading "python" or "py",  \
@@ -98,10 +205,14 @@ def parallel_llm_processor(prompts: List[str],
     :param max_workers: Maximum number of parallel workers
     :return: List of results from LLM processing
     """
+    from tqdm import tqdm
+
     results = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all prompts to the executor
-        future_to_prompt = {executor.submit(llm_function, prompt): prompt for prompt in prompts}
+    with span("llm_batch", prompts=len(prompts), max_workers=max_workers) as batch, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Submit all prompts to the executor, each in a copy of this context so its spans nest under the batch
+        future_to_prompt = {executor.submit(contextvars.copy_context().run, llm_function, prompt): prompt
+                            for prompt in prompts}
         
         # Use tqdm to create a progress bar
         with tqdm(total=len(prompts), desc="Processing prompts") as pbar:
@@ -116,7 +227,8 @@ def parallel_llm_processor(prompts: List[str],
                     print(f"Error: {str(e)}")
                 finally:
                     pbar.update(1)  # Update the progress bar
-    
+        batch.set(failed=len(prompts) - len(results))
+
     return results
 
 def chunk_llm_input(max_tokens: int, encoding_name: str = "cl100k_base"):
@@ -140,6 +252,7 @@ def chunk_llm_input(max_tokens: int, encoding_name: str = "cl100k_base"):
     def decorator(func: Callable):
         @functools.wraps(func)
         def wrapper(objects: List[Any], *args, **kwargs):
+            import tiktoken
             encoding = tiktoken.get_encoding(encoding_name)
             
             def get_token_count(obj: Any) -> int:
@@ -197,6 +310,7 @@ def chunk_text_input(max_tokens: int, encoding_name: str = "cl100k_base"):
     def decorator(func: Callable):
         @functools.wraps(func)
         def wrapper(text: str, *args, **kwargs):
+            import tiktoken
             encoding = tiktoken.get_encoding(encoding_name)
             
             # Split text into sentences or paragraphs
@@ -0,0 +1,161 @@
+"""
+Extraction backend that routes known schemas through the generated BAML clients.
+
+Known schemas (see baml_src/*.baml) are parsed with typed BAML functions instead of
+the free-form JSON prompt used by DocumentParser:
+    - Resume      -> ExtractResume
+    - FeatureList -> ExtractFeatures
+
+Chunks are extracted concurrently through the async client, bounded by a semaphore,
+and the sync stream client yields partial_types objects so a UI can render the
+result while it is being generated.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from pydantic import BaseModel
+
+from askharrison.llm.token_util import split_documents
+from askharrison.telemetry import span
+
+# schema name -> BAML function name, the function takes the chunk text as its only argument
+BAML_SCHEMA_FUNCTIONS = {
+    "Resume": "ExtractResume",
+    "FeatureList": "ExtractFeatures",
+}
+
+
+def resolve_baml_schema(schema: Union[Dict, str, type, None]) -> Optional[str]:
+    """
+    Return the BAML schema name for a schema if it is one of the known schemas, else None.
+
+    Accepts the schema name ("Resume"), a JSON schema dict with a matching "title",
+    or the generated pydantic class itself (types.Resume / partial_types.Resume).
+    """
+    if isinstance(schema, str):
+        name = schema.strip()
+    elif isinstance(schema, dict):
+        name = schema.get("title", "")
+    elif isinstance(schema, type) and issubclass(schema, BaseModel):
+        name = schema.__name__
+    else:
+        return None
+    return name if name in BAML_SCHEMA_FUNCTIONS else None
+
+
+def client_registry_options(llm_client, model: str = "gpt-4o") -> Optional[Dict[str, Any]]:
+    """
+    baml_options making the BAML functions call OpenAI with llm_client's API key (and model, if
+    it has one) instead of the OPENAI_API_KEY of the server's environment that baml_src uses.
+    None when llm_client isn't backed by an OpenAI SDK client whose key is known.
+    """
+    openai_client = getattr(llm_client, "client", None)
+    api_key = getattr(openai_client, "api_key", None)
+    if not api_key or not hasattr(openai_client, "chat"):
+        return None
+    from baml_py import ClientRegistry
+
+    options = {"model": getattr(llm_client, "model", None) or model, "api_key": api_key}
+    base_url = getattr(openai_client, "base_url", None)
+    if base_url:
+        options["base_url"] = str(base_url).rstrip("/")
+    registry = ClientRegistry()
+    registry.add_llm_client("CallerClient", "openai", options)
+    registry.set_primary("CallerClient")
+    return {"client_registry": registry}
+
+
+class BamlDocumentParser:
+    """
+    Parses documents with the BAML clients for the schemas in BAML_SCHEMA_FUNCTIONS.
+
+    Example usage:
+        parser = BamlDocumentParser(max_concurrency=4)
+        resume = parser.parse_document(resume_text, "Resume")
+
+        for partial in parser.stream_document(resume_text, "Resume"):
+            placeholder.json(partial)
+    """
+
+    def __init__(self, max_chunk_size: int = 3000, max_concurrency: int = 5,
+                 baml_options: Optional[Dict[str, Any]] = None):
+        """
+        :param baml_options: passed to every BAML call, e.g. {"client_registry": registry} to use another client
+        """
+        # the BAML runtime is loaded here rather than on import, so pages listing
+        # BAML_SCHEMA_FUNCTIONS don't pay for it; raises ImportError when it is missing
+        from askharrison.llmparse.baml_client.async_client import b as async_b
+        from askharrison.llmparse.baml_client.sync_client import b as sync_b
+
+        self.max_chunk_size = max_chunk_size
+        self.max_concurrency = max_concurrency
+        self.baml_options = baml_options or {}
+        self._async_b = async_b
+        self._sync_b = sync_b
+
+    @staticmethod
+    def supports(schema: Union[Dict, str, type, None]) -> bool:
+        return resolve_baml_schema(schema) is not None
+
+    def _function_name(self, schema) -> str:
+        schema_name = resolve_baml_schema(schema)
+        if schema_name is None:
+            raise ValueError(f"Schema is not handled by the BAML backend: {schema}")
+        return BAML_SCHEMA_FUNCTIONS[schema_name]
+
+    async def _aparse_chunk(self, chunk: str, function_name: str,
+                            semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        async with semaphore:
+            with span("parse_chunk", backend="baml", function=function_name):
+                result = await getattr(self._async_b, function_name)(chunk, baml_options=self.baml_options)
+        return result.model_dump()
+
+    async def aparse_chunks(self, chunks: List[str], schema) -> List[Dict[str, Any]]:
+        """
+        Extract every chunk concurrently, at most max_concurrency requests in flight.
+        Results keep the order of the chunks.
+        """
+        function_name = self._function_name(schema)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        return await asyncio.gather(
+            *[self._aparse_chunk(chunk, function_name, semaphore) for chunk in chunks]
+        )
+
+    async def aparse_document(self, document: str, schema) -> Union[Dict, List[Dict]]:
+        chunks = split_documents(document, self.max_chunk_size)
+        results = await self.aparse_chunks(chunks, schema)
+        return results[0] if len(results) == 1 else results
+
+    def parse_document(self, document: str, schema) -> Union[Dict, List[Dict]]:
+        """
+        Parse a document with the BAML function for schema.
+
+        Returns a dictionary for documents that fit in one chunk,
+        a list of dictionaries (one per chunk) otherwise, same as DocumentParser.
+        Use aparse_document from async code; called from a running event loop
+        (e.g. a notebook), the extraction runs on its own loop in a worker thread.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.aparse_document(document, schema))
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.aparse_document(document, schema)).result()
+
+    def stream_document(self, document: str, schema) -> Iterator[Dict[str, Any]]:
+        """
+        Stream partial results for a document, chunk by chunk.
+
+        Yields the partial_types model of the current chunk as a dict every time
+        the BAML stream produces a new partial, and the final typed result last.
+        Chunks are streamed in order, each yielded dict carries the "chunk_index".
+        """
+        function_name = self._function_name(schema)
+        chunks = split_documents(document, self.max_chunk_size)
+        for chunk_index, chunk in enumerate(chunks):
+            stream = getattr(self._sync_b.stream, function_name)(chunk, baml_options=self.baml_options)
+            for partial in stream:
+                yield {"chunk_index": chunk_index, "final": False, **partial.model_dump()}
+            final = stream.get_final_response()
+            yield {"chunk_index": chunk_index, "final": True, **final.model_dump()}
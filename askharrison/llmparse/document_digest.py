@@ -0,0 +1,212 @@
+"""
+Builds a compact, representative digest of a document for schema recommendation.
+
+Instead of sending the first N tokens of a document to the LLM, the digest samples
+the whole document through its markdown sections (headings) and tables:
+    - an outline of all headings
+    - the first item of each repeated structure (sibling sections at the same level),
+      as many as fit, chosen evenly across the document rather than from its start
+    - a few tables sampled evenly across the document
+Documents without any headings fall back to evenly spaced text samples.
+"""
+import re
+from collections import namedtuple
+from typing import List, Tuple
+
+from askharrison.llm.token_util import clip_text_by_token, get_token_count
+
+HEADER_PATTERN = re.compile(r'^(#{1,6})\s*(.*)')
+
+DigestSection = namedtuple('DigestSection', ['name', 'level', 'text'])
+DigestTable = namedtuple('DigestTable', ['section_name', 'content'])
+
+
+def _scan_markdown(document: str) -> Tuple[List[DigestSection], List[DigestTable]]:
+    """
+    Split a markdown document into sections (heading, level, own text) and tables.
+    Fenced code blocks and tables are kept out of the section text, text before the
+    first heading is ignored.
+    """
+    sections, tables = [], []
+    name, level, text_lines, table_lines = None, 0, [], []
+    in_code_block = False
+
+    def end_table():
+        if table_lines:
+            tables.append(DigestTable(name or '', '\n'.join(table_lines)))
+            table_lines.clear()
+
+    for line in document.split('\n'):
+        line = line.rstrip('\r')
+        if in_code_block:
+            in_code_block = not line.startswith('```')
+            continue
+        if line.startswith('|') and '|' in line[1:]:
+            table_lines.append(line)
+            continue
+        end_table()
+        header_match = HEADER_PATTERN.match(line)
+        if header_match:
+            if name is not None:
+                sections.append(DigestSection(name, level, ''.join(text_lines)))
+            name, level, text_lines = header_match.group(2).strip(), len(header_match.group(1)), []
+        elif line.startswith('```'):
+            in_code_block = True
+        elif name is not None:
+            text_lines.append(line + '\n')
+    end_table()
+    if name is not None:
+        sections.append(DigestSection(name, level, ''.join(text_lines)))
+    return sections, tables
+
+
+def _section_signature(name: str) -> str:
+    """Normalize a section name so numbered siblings (Q1, Q2, 2023-01-05...) share a signature"""
+    return re.sub(r'\d+', '#', name.strip().lower())
+
+
+def _build_outline(sections, max_tokens: int) -> str:
+    """
+    Heading outline, indented by level, clipped to max_tokens.
+    Runs of similar sibling headings are collapsed into a single line with a count.
+    """
+    if not sections:
+        return ''
+    base_level = min(section.level for section in sections)
+    lines = []
+    previous_key, run_length = None, 0
+    for section in sections:
+        key = (section.level, _section_signature(section.name))
+        if key == previous_key:
+            run_length += 1
+            continue
+        if run_length > 1:
+            lines[-1] += f' ({run_length} similar sections)'
+        lines.append('  ' * (section.level - base_level) + f'- {section.name}')
+        previous_key, run_length = key, 1
+    if run_length > 1:
+        lines[-1] += f' ({run_length} similar sections)'
+    return clip_text_by_token('\n'.join(lines), max_tokens)
+
+
+def _pick_representative_sections(sections) -> List:
+    """
+    Pick the first section of every repeated structure.
+
+    Sections are grouped by (level, name signature); groups are kept in
+    document order so the digest still reads top to bottom.
+    """
+    seen = set()
+    representatives = []
+    for section in sections:
+        key = (section.level, _section_signature(section.name))
+        if key in seen:
+            continue
+        seen.add(key)
+        representatives.append(section)
+    return representatives
+
+
+def _spread_order(count: int) -> List[int]:
+    """
+    Indices 0..count-1 ordered so that every prefix is spread across the range:
+    first, last, middle, then the quarters, eighths...
+    """
+    order, seen = [], set()
+    k = 2
+    while len(order) < count:
+        for index in _sample_evenly(list(range(count)), min(k, count)):
+            if index not in seen:
+                seen.add(index)
+                order.append(index)
+        k = 2 * k - 1
+    return order
+
+
+def _sample_evenly(items: List, k: int) -> List:
+    """Pick up to k items spread evenly across the list, always including first and last"""
+    if k <= 0 or not items:
+        return []
+    if len(items) <= k:
+        return list(items)
+    if k == 1:
+        return [items[0]]
+    step = (len(items) - 1) / (k - 1)
+    return [items[round(i * step)] for i in range(k)]
+
+
+def _clip_table(table: str, max_rows: int = 5) -> str:
+    """Keep the header, the separator and the first few rows of a markdown table"""
+    rows = table.split('\n')
+    if len(rows) <= max_rows + 2:
+        return table
+    return '\n'.join(rows[:max_rows + 2] + [f'... ({len(rows) - max_rows - 2} more rows)'])
+
+
+def _sample_plain_text(document: str, max_tokens: int, num_samples: int = 5) -> str:
+    """Fallback for documents without headings: evenly spaced paragraph samples"""
+    paragraphs = [p for p in re.split(r'\n\s*\n', document) if p.strip()]
+    samples = _sample_evenly(paragraphs, num_samples)
+    if not samples:
+        return ''
+    per_sample_tokens = max(1, max_tokens // len(samples))
+    return '\n\n...\n\n'.join(clip_text_by_token(sample.strip(), per_sample_tokens) for sample in samples)
+
+
+def build_document_digest(document: str,
+                          max_tokens: int = 1500,
+                          max_tables: int = 3,
+                          section_tokens: int = 150) -> str:
+    """
+    Build a sampled digest of a markdown/plain-text document within a token budget.
+
+    Args:
+        document (str): Document text, markdown headings are used when present.
+        max_tokens (int): Token budget for the whole digest.
+        max_tables (int): Maximum number of tables to sample.
+        section_tokens (int): Token budget for each sampled section body.
+
+    Returns:
+        str: The digest text, never longer than max_tokens tokens.
+    """
+    if get_token_count(document) <= max_tokens:
+        return document
+
+    sections, all_tables = _scan_markdown(document)
+    if not sections:
+        return _sample_plain_text(document, max_tokens)
+
+    # budget split: outline first, then tables, remaining budget for section samples
+    outline = _build_outline(sections, max_tokens // 4)
+    parts = ['## Document outline', outline]
+    used_tokens = get_token_count(outline)
+
+    tables = _sample_evenly(all_tables, max_tables)
+    table_parts = []
+    for table in tables:
+        table_text = f'[table in section "{table.section_name}"]\n{_clip_table(table.content)}'
+        table_tokens = get_token_count(table_text)
+        if used_tokens + table_tokens > max_tokens // 2:
+            break
+        table_parts.append(table_text)
+        used_tokens += table_tokens
+
+    # representatives are tried in an order spread across the document, so the ones that fit
+    # cover all of it; a sample too large for the rest of the budget is skipped, not the end
+    representatives = [section for section in _pick_representative_sections(sections) if section.text.strip()]
+    sampled = {}
+    for position in _spread_order(len(representatives)):
+        section = representatives[position]
+        sample = f'### {section.name}\n{clip_text_by_token(section.text.strip(), section_tokens)}'
+        sample_tokens = get_token_count(sample)
+        if used_tokens + sample_tokens > max_tokens:
+            continue
+        sampled[position] = sample
+        used_tokens += sample_tokens
+    section_parts = [sampled[position] for position in sorted(sampled)]
+
+    if section_parts:
+        parts += ['## Representative sections'] + section_parts
+    if table_parts:
+        parts += ['## Sampled tables'] + table_parts
+    return clip_text_by_token('\n\n'.join(parts), max_tokens)
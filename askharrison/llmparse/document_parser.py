@@ -1,4 +1,4 @@
-from typing import Dict, List, Union, Optional
+from typing import Callable, Dict, List, Union, Optional
 from pydantic import BaseModel, Field, create_model
 from datetime import datetime
 import json
@@ -6,11 +6,14 @@ from enum import Enum
 from askharrison.llmparse.schema_recommender import SchemaGenerator
 from askharrison.llm.token_util import get_token_count
 from askharrison.llm_models import extract_python_code, safe_eval
+from askharrison.telemetry import span
 
 class ParsingConfig(BaseModel):
     max_chunk_size: int = Field(default=3000, description="Maximum tokens per LLM call")
     batch_strategy: str = Field(default="batch", description="Strategy for large docs: truncate/batch")
     combine_outputs: bool = Field(default=True, description="Whether to combine multiple outputs")
+    use_baml: bool = Field(default=True, description="Route known schemas (Resume, FeatureList) through the BAML client")
+    max_concurrency: int = Field(default=5, description="Maximum concurrent LLM calls for the BAML backend")
 
 class DocumentParser:
     """
@@ -29,22 +32,50 @@ class DocumentParser:
         
         # Using description
         parser.parse_document(document, "Extract questions and answers from this FAQ")
+
+        # Using a known BAML schema (Resume, FeatureList), parsed with the typed BAML client
+        parser.parse_document(document, "Resume")
     """
     
     def __init__(self, llm_client, config: ParsingConfig = ParsingConfig()):
         self.llm_client = llm_client
         self.config = config
         self.schema_generator = SchemaGenerator(llm_client)
+        self.baml_parser = self._init_baml_parser()
+
+    def _init_baml_parser(self):
+        """
+        BAML backend for known schemas, calling the model with llm_client's API key; None if
+        disabled, the BAML runtime is unavailable or llm_client's key can't be passed to BAML
+        (the BAML clients would silently use the server's OPENAI_API_KEY instead)
+        """
+        if not self.config.use_baml:
+            return None
+        try:
+            from askharrison.llmparse.baml_parser import BamlDocumentParser, client_registry_options
+            baml_options = client_registry_options(self.llm_client)
+            if baml_options is None:
+                print("BAML backend can't use the LLM client's API key, using prompt parsing only")
+                return None
+            return BamlDocumentParser(max_chunk_size=self.config.max_chunk_size,
+                                      max_concurrency=self.config.max_concurrency,
+                                      baml_options=baml_options)
+        except ImportError as e:
+            print(f"BAML backend unavailable, using prompt parsing only: {e}")
+            return None
 
     def parse_document(self, 
                       document: str, 
-                      schema: Union[Dict, str]) -> Union[Dict, List[Dict]]:
+                      schema: Union[Dict, str],
+                      progress_callback: Optional[Callable[[int, int], None]] = None) -> Union[Dict, List[Dict]]:
         """
         Parse document using either schema dictionary or description.
         
         Args:
             document: Text document to parse
             schema: Either JSON schema dictionary or natural language description
+            progress_callback: Called with (chunks parsed, total chunks) after each chunk;
+                an exception it raises stops parsing (used to cancel background jobs)
             
         Returns:
             Parsed data as dictionary or list of dictionaries
@@ -52,28 +83,44 @@ class DocumentParser:
         # Convert description to schema if needed
         #if isinstance(schema, str):
         #    schema = self.schema_generator.generate_schema_from_description(schema)
-            
-        # Handle large documents
-        if get_token_count(document) > self.config.max_chunk_size:
-            return self._handle_large_document(document, schema)
-        
-        return self._parse_chunk(document, schema)
+
+        if self.baml_parser and self.baml_parser.supports(schema):
+            with span("parse_document", backend="baml"):
+                return self.baml_parser.parse_document(document, schema)
+
+        with span("parse_document", backend="prompt"):
+            # Handle large documents
+            if get_token_count(document) > self.config.max_chunk_size:
+                return self._handle_large_document(document, schema, progress_callback)
+
+            result = self._parse_chunk(document, schema)
+            if progress_callback:
+                progress_callback(1, 1)
+            return result
 
     def _handle_large_document(self, 
                              document: str, 
-                             schema: Union[Dict, str]) -> Union[Dict, List[Dict]]:
+                             schema: Union[Dict, str],
+                             progress_callback: Optional[Callable[[int, int], None]] = None) -> Union[Dict, List[Dict]]:
         """Handle documents larger than max chunk size"""
         if self.config.batch_strategy == "truncate":
-            return self._parse_chunk(
+            result = self._parse_chunk(
                 document[:self.config.max_chunk_size], 
                 schema
             )
+            if progress_callback:
+                progress_callback(1, 1)
+            return result
         
         # Batch processing
         print("Document too large, splitting into chunks")
         chunks = self._split_document_by_tokens(document)
         print(f"Document too large, splitting into {len(chunks)} chunks")
-        results = [self._parse_chunk(chunk, schema) for chunk in chunks]
+        results = []
+        for chunk in chunks:
+            results.append(self._parse_chunk(chunk, schema))
+            if progress_callback:
+                progress_callback(len(results), len(chunks))
         
         #if self.config.combine_outputs:
         #    return self._combine_results(results)
@@ -81,9 +128,10 @@ class DocumentParser:
 
     def _parse_chunk(self, chunk: str, schema: Union[Dict, str]) -> Dict:
         """Parse a single chunk of text"""
-        prompt = self._create_parsing_prompt(chunk, schema)
-        response = self.llm_client.generate(prompt)
-        return self._parse_response(response)
+        with span("parse_chunk", tokens=get_token_count(chunk)):
+            prompt = self._create_parsing_prompt(chunk, schema)
+            response = self.llm_client.generate(prompt)
+            return self._parse_response(response)
 
     def _create_parsing_prompt(self, chunk: str, schema: Union[Dict, str]) -> str:
         """Create parsing prompt from schema"""
@@ -7,6 +7,7 @@ from enum import Enum
 
 from askharrison.llm.token_util import clip_text_by_token, get_token_count
 from askharrison.llm_models import extract_python_code, safe_eval
+from askharrison.llmparse.document_digest import build_document_digest
 
 # Base Schema Models
 class BaseOutputSchema(BaseModel):
@@ -66,19 +67,32 @@ class SchemaGenerator:
         Output the schema in valid JSON format.
         """
     
-    def recommend_schema_from_document(self, document: str, max_tokens: int=5000) -> Dict:
+    def recommend_schema_from_document(self, document: str, max_tokens: int=5000,
+                                       sampling_strategy: str="digest",
+                                       digest_tokens: int=1500) -> Dict:
         """
         Analyzes document content and recommends a parsing schema with explanation.
         Returns both schema and natural language description.
+
+        sampling_strategy "digest" sends a sampled digest of the whole document
+        (outline, representative sections, tables) within digest_tokens,
+        "clip" sends the first max_tokens tokens.
         """
-        document_trunct = clip_text_by_token(document, max_tokens)
+        if sampling_strategy == "digest":
+            document_sample = build_document_digest(document, max_tokens=digest_tokens)
+            sample_note = "sampled digest of the whole document: outline, representative sections and tables"
+        elif sampling_strategy == "clip":
+            document_sample = clip_text_by_token(document, max_tokens)
+            sample_note = f"using first {max_tokens} tokens for analysis"
+        else:
+            raise ValueError(f"Invalid sampling strategy: {sampling_strategy}")
         prompt = f"""
         Analyze the following document and suggest:
         1. A natural language description of how to structure this data
         2. A JSON schema for parsing similar documents
         
-        Document:
-        {document_trunct}...  # Using first {max_tokens} tokens for analysis
+        Document ({sample_note}):
+        {document_sample}
 
         Output the schema in valid JSON format.
         example output:
@@ -95,7 +109,7 @@ class SchemaGenerator:
         schema = safe_eval(extract_python_code(response))
         if not schema:
             return response
-        self.message_history.append({"role": "user", "content": document})
+        self.message_history.append({"role": "user", "content": document_sample})
         self.message_history.append({"role": "assistant", "content": schema})
         return schema
 
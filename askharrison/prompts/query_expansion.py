@@ -1,7 +1,6 @@
-from collections import defaultdict
-import arxiv
-from tqdm import tqdm
-from askharrison.llm_models import process_question, safe_eval, extract_python_code
+from typing import Iterator
+from askharrison.llm_models import process_question, safe_eval, extract_python_code, stream_question, iter_list_strings
+from askharrison.telemetry import span, traced_iter
 
 def generate_search_queries_prompt(problem_statement: str, num_queries: int=10, search_engine="google") -> str:
     prompt = f"""generate {num_queries} {search_engine} search queries only including plain text without any advanced querying macros, strategize the search query you make to increase chance of finding relevant results 
@@ -29,8 +28,10 @@ def generate_search_queries(problem_statement: str, num_queries: int, search_eng
     Expand a query using LLM and return a list of queries
     """
     prompt = generate_search_queries_prompt(problem_statement, num_queries, search_engine)
-    queries_llm_output = process_question(prompt, model=model)
-    queries = safe_eval(extract_python_code(queries_llm_output))
+    with span("query_expansion", model=model, search_engine=search_engine) as current:
+        queries_llm_output = process_question(prompt, model=model)
+        queries = safe_eval(extract_python_code(queries_llm_output))
+        current.set(queries=len(queries) if isinstance(queries, list) else 0)
     return queries
 
 def generate_diffusion_search_queries(problem_statement: str, num_queries: int, search_engine: str, model="gpt-4") -> list[str]:
@@ -38,6 +39,19 @@ def generate_diffusion_search_queries(problem_statement: str, num_queries: int,
     Expand a query using LLM and return a list of queries
     """
     prompt = generate_diffusion_search_queries_prompt(problem_statement, num_queries, search_engine)
-    queries_llm_output = process_question(prompt, model=model)
-    queries = safe_eval(extract_python_code(queries_llm_output))
-    return queries
\ No newline at end of file
+    with span("query_expansion", model=model, search_engine=search_engine) as current:
+        queries_llm_output = process_question(prompt, model=model)
+        queries = safe_eval(extract_python_code(queries_llm_output))
+        current.set(queries=len(queries) if isinstance(queries, list) else 0)
+    return queries
+
+def stream_search_queries(problem_statement: str, num_queries: int, search_engine: str, model="gpt-4",
+                          diverse: bool = False) -> Iterator[str]:
+    """
+    Like generate_search_queries (or generate_diffusion_search_queries when diverse), but yields
+    each query as soon as it is parsed from the streaming LLM output
+    """
+    prompt_fn = generate_diffusion_search_queries_prompt if diverse else generate_search_queries_prompt
+    prompt = prompt_fn(problem_statement, num_queries, search_engine)
+    yield from traced_iter("query_expansion", iter_list_strings(stream_question(prompt, model=model)),
+                           model=model, search_engine=search_engine, stream=True)
@@ -0,0 +1,285 @@
+"""
+Research pipeline: Google and arXiv searched together.
+
+For each source, queries are expanded once (one streaming LLM call per source) and each
+query is searched as soon as it is parsed; the two sources run side by side, so end-to-end
+latency is about the slowest source rather than the sum. Results are normalized into ResearchRecord,
+de-duplicated across sources by DOI / arXiv id / canonical URL, and ranked once.
+
+Example usage:
+    pipeline = ResearchPipeline(num_queries={"google": 10, "arxiv": 3})
+    result = pipeline.run("efficient long context attention", top_k=10)
+    for record in result.ranked:
+        print(record.score, record.title, record.url)
+"""
+import re
+import logging
+import concurrent.futures
+import contextvars
+from dataclasses import dataclass, field, asdict, replace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from askharrison.llm_models import process_question, safe_eval, extract_python_code
+from askharrison.telemetry import span
+
+logger = logging.getLogger(__name__)
+
+DOI_PATTERN = re.compile(r'\b(10\.\d{4,9}/[^\s"<>?#]+)', re.IGNORECASE)
+ARXIV_ID_PATTERN = re.compile(r'arxiv\.org/(?:abs|pdf)/([^\s?#]+?)(?:v\d+)?(?:\.pdf)?$', re.IGNORECASE)
+TRACKING_PARAMS = re.compile(r'^(utm_\w+|fbclid|gclid|mc_cid|mc_eid|ref|ref_src)$', re.IGNORECASE)
+# arXiv searches are sent one at a time, 3 s apart (arxiv_search.ARXIV_LOCK), so every arXiv
+# query adds about 3 s to a research run; fewer are expanded than for the other sources
+MAX_QUERIES_PER_SOURCE = {"arxiv": 3}
+
+
+@dataclass
+class ResearchRecord:
+    """one search result, whatever the source"""
+    source: str
+    query: str
+    title: str
+    url: str
+    snippet: str
+    doi: Optional[str] = None
+    arxiv_id: Optional[str] = None
+    authors: List[str] = field(default_factory=list)
+    published: Optional[str] = None
+    queries: List[str] = field(default_factory=list)
+    sources: List[str] = field(default_factory=list)
+    score: Optional[float] = None
+
+    def __post_init__(self):
+        self.queries = self.queries or [self.query]
+        self.sources = self.sources or [self.source]
+        if self.arxiv_id is None:
+            match = ARXIV_ID_PATTERN.search(self.url)
+            self.arxiv_id = match.group(1) if match else None
+        if self.doi is None:
+            match = DOI_PATTERN.search(self.url)
+            self.doi = match.group(1).rstrip('.').lower() if match else None
+
+    @property
+    def keys(self) -> List[str]:
+        """identities used for de-duplication across sources, strongest first"""
+        keys = []
+        if self.doi:
+            keys.append(f"doi:{self.doi.lower()}")
+        if self.arxiv_id:
+            keys.append(f"arxiv:{self.arxiv_id}")
+        keys.append(f"url:{canonicalize_url(self.url)}")
+        return keys
+
+    @property
+    def key(self) -> str:
+        return self.keys[0]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def canonicalize_url(url: str) -> str:
+    """lowercase host without www, no fragment, tracking parameters or trailing slash"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if not TRACKING_PARAMS.match(k)))
+    return urlunsplit(("https" if parts.scheme in ("http", "https") else parts.scheme,
+                       host, parts.path.rstrip("/"), query, ""))
+
+
+def google_response_to_records(query: str, response: Dict[str, Any]) -> List[ResearchRecord]:
+    return [
+        ResearchRecord(source="google", query=query, title=item.get("title", ""),
+                       url=item.get("link", ""), snippet=item.get("snippet", ""))
+        for item in response.get("items", [])
+    ]
+
+
+def arxiv_result_to_record(query: str, result) -> ResearchRecord:
+    """only the fields the pipeline uses, instead of every attribute of arxiv.Result"""
+    return ResearchRecord(
+        source="arxiv", query=query, title=result.title, url=result.entry_id,
+        snippet=result.summary.replace("\n", " "), doi=(result.doi or None) and result.doi.lower(),
+        authors=[author.name for author in result.authors],
+        published=result.published.date().isoformat() if result.published else None,
+    )
+
+
+def default_expander(source: str, query_type: str = "normal", model: str = "gpt-4") -> Callable[[str, int], Iterable[str]]:
+    from askharrison.prompts.query_expansion import stream_search_queries
+
+    def expand(problem: str, num_queries: int) -> Iterable[str]:
+        if query_type == "disable":
+            return [problem]
+        return stream_search_queries(problem, num_queries, source, model=model, diverse=query_type == "diverse")
+    return expand
+
+
+def default_searchers() -> Dict[str, Callable[[str], List[ResearchRecord]]]:
+    from askharrison.google_search import google_custom_search
+    from askharrison.arxiv_search import search_arxiv
+
+    return {
+        "google": lambda query: google_response_to_records(query, google_custom_search(query)),
+        "arxiv": lambda query: [arxiv_result_to_record(query, result) for result in search_arxiv(query)],
+    }
+
+
+def parse_rank_scores(output: str, num_results: int) -> List[Tuple[int, float]]:
+    """
+    (0-based index, overall score) of each valid item of a reranking prompt's output: a dict
+    with an integer "idx" between 1 and num_results. Malformed items and repeated indexes are
+    skipped, an unparsable output gives no scores.
+    """
+    items = safe_eval(extract_python_code(output or ""), default_output=[])
+    scores, seen = [], set()
+    for item in items if isinstance(items, list) else []:
+        try:
+            idx = int(item["idx"]) - 1
+            score = float(item.get("overall", 0))
+        except (KeyError, AttributeError, TypeError, ValueError):
+            logger.warning(f"Skipping malformed ranking item: {item!r}")
+            continue
+        if 0 <= idx < num_results and idx not in seen:
+            seen.add(idx)
+            scores.append((idx, score))
+    return scores
+
+
+def llm_rank(problem: str, records: Sequence[ResearchRecord], top_k: int, model: str = "gpt-4o") -> List[ResearchRecord]:
+    """
+    single LLM reranking over the merged records of all sources; the ranked records are scored
+    copies, records may be shared through the search caches and are left as they are
+    """
+    from askharrison.prompts.content_curation import create_google_reranking_prompt
+
+    compact = [{"title": r.title, "link": r.url, "snippet": r.snippet[:300], "source": "/".join(r.sources)}
+               for r in records]
+    output = process_question(create_google_reranking_prompt(problem, compact, top_k=top_k), model=model)
+    ranked = []
+    for idx, score in parse_rank_scores(output, len(records)):
+        ranked.append(replace(records[idx], score=score))
+    return sorted(ranked, key=lambda r: r.score, reverse=True)[:top_k]
+
+
+def deduplicate_records(records: Sequence[ResearchRecord]) -> List[ResearchRecord]:
+    """merge records sharing a DOI, arXiv id or canonical URL, keeping the first one's fields"""
+    merged: List[ResearchRecord] = []
+    by_key: Dict[str, ResearchRecord] = {}
+    for record in records:
+        existing = next((by_key[key] for key in record.keys if key in by_key), None)
+        if existing is None:
+            merged.append(record)
+            by_key.update((key, record) for key in record.keys)
+            continue
+        existing.queries.extend(q for q in record.queries if q not in existing.queries)
+        existing.sources.extend(s for s in record.sources if s not in existing.sources)
+        existing.doi = existing.doi or record.doi
+        existing.arxiv_id = existing.arxiv_id or record.arxiv_id
+        existing.authors = existing.authors or record.authors
+        existing.published = existing.published or record.published
+        by_key.update((key, existing) for key in existing.keys + record.keys)
+    return merged
+
+
+@dataclass
+class ResearchResult:
+    problem: str
+    queries: Dict[str, List[str]]
+    records: List[ResearchRecord]
+    ranked: List[ResearchRecord]
+    # {source: error} of failed sources, {"source: query": error} of failed searches
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+class ResearchPipeline:
+    def __init__(self, num_queries: Optional[Dict[str, int]] = None, query_type: str = "normal",
+                 model: str = "gpt-4", max_workers: int = 8,
+                 expanders: Optional[Dict[str, Callable[[str, int], Iterable[str]]]] = None,
+                 searchers: Optional[Dict[str, Callable[[str], List[ResearchRecord]]]] = None,
+                 ranker: Optional[Callable[[str, List[ResearchRecord], int], List[ResearchRecord]]] = None,
+                 max_queries_per_source: Optional[Dict[str, int]] = None):
+        """
+        :param num_queries: expanded queries per source, e.g. {"google": 10, "arxiv": 3}; its keys are the sources
+        :param query_type: "normal", "diverse" or "disable" (search the problem as is)
+        :param model: model used for query expansion
+        :param max_workers: concurrent searches per source
+        :param expanders: source -> (problem, num_queries) -> queries, streaming LLM expansion by default;
+            a generator is consumed lazily, each query is searched as soon as it is yielded
+        :param searchers: source -> query -> records, Google Custom Search and arXiv API by default
+        :param ranker: (problem, records, top_k) -> ranked records, llm_rank by default
+        :param max_queries_per_source: caps num_queries per source, MAX_QUERIES_PER_SOURCE by default
+        """
+        max_queries = MAX_QUERIES_PER_SOURCE if max_queries_per_source is None else max_queries_per_source
+        self.num_queries = {source: min(count, max_queries.get(source, count))
+                            for source, count in (num_queries or {"google": 10, "arxiv": 3}).items()}
+        self.query_type = query_type
+        self.model = model
+        self.max_workers = max_workers
+        self.expanders = expanders or {source: default_expander(source, query_type, model) for source in self.num_queries}
+        self._searchers = searchers
+        self.ranker = ranker or llm_rank
+
+    @property
+    def searchers(self) -> Dict[str, Callable[[str], List[ResearchRecord]]]:
+        if self._searchers is None:
+            self._searchers = default_searchers()
+        return self._searchers
+
+    def search_source(self, source: str, problem: str, errors: Optional[Dict[str, str]] = None):
+        """
+        expand once for the source, searching each query as it arrives; returns (queries, records).
+        Failed searches add no records, their errors are put in errors as {"source: query": error}.
+        """
+        search = self.searchers[source]
+        queries, futures = [], []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for query in self.expanders[source](problem, self.num_queries[source]) or []:
+                if query in queries:
+                    continue
+                queries.append(query)
+                futures.append(executor.submit(contextvars.copy_context().run, self._safe_search, search, query,
+                                               source, errors))
+        if not queries:
+            # the expansion produced nothing usable, search the problem itself
+            return [problem], self._safe_search(search, problem, source, errors)
+        records = []
+        # results are collected in query order, so they are deterministic
+        for future in futures:
+            records.extend(future.result())
+        return queries, records
+
+    @staticmethod
+    def _safe_search(search, query: str, source: Optional[str] = None,
+                     errors: Optional[Dict[str, str]] = None) -> List[ResearchRecord]:
+        with span("search", query=query, source=source) as current:
+            try:
+                records = search(query)
+            except Exception as e:
+                logger.error(f"Search failed for {query!r}: {e}")
+                current.status, current.error = "error", str(e)
+                if errors is not None:
+                    errors[f"{source}: {query}" if source else query] = str(e)
+                return []
+            current.set(results=len(records))
+            return records
+
+    def run(self, problem: str, top_k: int = 10) -> ResearchResult:
+        queries, records, errors = {}, [], {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(self.num_queries)) as executor:
+            futures = {source: executor.submit(contextvars.copy_context().run, self.search_source, source, problem,
+                                               errors)
+                       for source in self.num_queries}
+            for source, future in futures.items():
+                try:
+                    queries[source], source_records = future.result()
+                    records.extend(source_records)
+                except Exception as e:
+                    logger.error(f"{source} pipeline failed: {e}")
+                    queries[source], errors[source] = [], str(e)
+        records = deduplicate_records(records)
+        with span("rerank", records=len(records), top_k=top_k):
+            ranked = self.ranker(problem, records, top_k) if records else []
+        return ResearchResult(problem, queries, records, ranked, errors)
@@ -0,0 +1,145 @@
+"""
+Pipelined search: query expansion, search and pre-ranking overlap.
+
+Queries are submitted to search as soon as they are parsed from the streaming LLM output
+(see stream_search_queries), and every search result feeds an incremental pre-ranker when
+its search completes, so nothing waits for the whole query list or for every search.
+The final LLM rerank only looks at the pre-ranker's best candidates.
+
+Example usage:
+    queries = stream_search_queries(problem, 10, "google")
+    result = pipelined_search(problem, queries, google_items, max_candidates=30)
+    reranked = rerank(problem, result.candidates)
+"""
+import re
+import heapq
+import logging
+import threading
+import concurrent.futures
+import contextvars
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from askharrison.telemetry import span
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"\w+")
+STOPWORDS = frozenset("""a an and are as at be by for from how in is it of on or that the this to what when
+where which who why with without vs do does can i my we our you your""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS and len(token) > 1]
+
+
+def google_items(query: str) -> List[Dict[str, Any]]:
+    """search function of pipelined_search: google_custom_search items as {title, link, snippet}"""
+    from askharrison.google_search import google_custom_search
+
+    return [{"title": item.get("title", ""), "link": item.get("link", ""), "snippet": item.get("snippet", "")}
+            for item in google_custom_search(query).get("items", [])]
+
+
+class IncrementalPreRanker:
+    def __init__(self, problem: str, max_candidates: int = 30, title_weight: float = 2.0,
+                 multi_query_bonus: float = 0.1):
+        """
+        Cheap lexical scorer updated one result at a time, thread safe.
+
+        :param problem: problem statement, its terms are matched against title and snippet
+        :param max_candidates: size of candidates(), the shortlist sent to the LLM reranker
+        :param title_weight: weight of a term found in the title, relative to the snippet
+        :param multi_query_bonus: added per extra query that returned the same link
+        """
+        self.terms = set(tokenize(problem))
+        self.max_candidates = max_candidates
+        self.title_weight = title_weight
+        self.multi_query_bonus = multi_query_bonus
+        self._by_link: Dict[str, Dict[str, Any]] = {}
+        self._queries: Dict[str, set] = {}
+        self._base_scores: Dict[str, float] = {}
+        self._scores: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def score(self, result: Dict[str, Any]) -> float:
+        if not self.terms:
+            return 0.0
+        title, snippet = set(tokenize(result.get("title", ""))), set(tokenize(result.get("snippet", "")))
+        hits = self.title_weight * len(self.terms & title) + len(self.terms & snippet)
+        return hits / ((self.title_weight + 1) * len(self.terms))
+
+    def add(self, result: Dict[str, Any]):
+        """add one result ({query, title, link, snippet}), results sharing a link are merged"""
+        link = result.get("link", "")
+        score = self.score(result)
+        with self._lock:
+            if score > self._base_scores.get(link, -1.0):
+                self._by_link[link], self._base_scores[link] = result, score
+            queries = self._queries.setdefault(link, set())
+            queries.add(result.get("query"))
+            self._scores[link] = self._base_scores[link] + self.multi_query_bonus * (len(queries) - 1)
+
+    def __len__(self) -> int:
+        return len(self._by_link)
+
+    def candidates(self) -> List[Dict[str, Any]]:
+        """best max_candidates unique results so far, best first"""
+        with self._lock:
+            best = heapq.nlargest(self.max_candidates, self._scores.items(), key=lambda item: item[1])
+            return [self._by_link[link] for link, _ in best]
+
+
+@dataclass
+class PipelinedSearchResult:
+    queries: List[str]
+    results: List[Dict[str, Any]]  # every result, in query order
+    candidates: List[Dict[str, Any]]  # pre-ranked shortlist, best first
+    errors: Dict[str, str] = field(default_factory=dict)
+
+
+def pipelined_search(problem: str, queries: Iterable[str], search: Callable[[str], List[Dict[str, Any]]],
+                     max_workers: int = 8, max_candidates: int = 30,
+                     preranker: Optional[IncrementalPreRanker] = None,
+                     on_query: Optional[Callable[[str], None]] = None) -> PipelinedSearchResult:
+    """
+    Search each query as soon as the queries iterable yields it (e.g. a streaming expansion),
+    pre-ranking results as each search completes.
+
+    :param queries: the queries, typically stream_search_queries(...), consumed in the calling thread
+    :param search: query -> [{title, link, snippet}], e.g. google_items
+    :param max_workers: concurrent searches
+    :param max_candidates: size of the pre-ranked shortlist, ignored when preranker is given
+    :param on_query: called (in the calling thread) with each query before it is searched, for progress display
+    """
+    if preranker is None:
+        preranker = IncrementalPreRanker(problem, max_candidates=max_candidates)
+    seen, ordered, futures, errors = set(), [], [], {}
+
+    def search_and_rank(query: str) -> List[Dict[str, Any]]:
+        with span("search", query=query) as current:
+            results = [{"query": query, **item} for item in search(query)]
+            current.set(results=len(results))
+        for result in results:
+            preranker.add(result)
+        return results
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for query in queries:
+            query = query.strip()
+            if not query or query in seen:
+                continue
+            seen.add(query)
+            ordered.append(query)
+            if on_query is not None:
+                on_query(query)
+            futures.append(executor.submit(contextvars.copy_context().run, search_and_rank, query))
+
+    results = []
+    for query, future in zip(ordered, futures):
+        try:
+            results.extend(future.result())
+        except Exception as e:
+            logger.error(f"Search failed for {query!r}: {e}")
+            errors[query] = str(e)
+    return PipelinedSearchResult(ordered, results, preranker.candidates(), errors)
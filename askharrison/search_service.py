@@ -0,0 +1,230 @@
+"""
+Search stages of the search page (query expansion, Google search, pipelined expand + search,
+LLM rerank, multi-source research), independent of Streamlit so the same code runs in
+process or behind the HTTP API (askharrison.api_server).
+
+Every stage is cached process-wide, keyed by the normalized problem and the settings, in
+bounded TTL caches shared by all users of the process. Cached values are shared and must
+not be mutated. Results of runs where some searches failed are returned but not cached.
+
+Example usage:
+    service = SearchService()
+    queries, results, candidates = service.expand_and_search("best vector database", 10, "normal", 10)
+    reranked = service.rerank_results("best vector database", candidates, top_k=10)
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import pandas as pd
+
+from askharrison.prompts.query_expansion import generate_search_queries, generate_diffusion_search_queries, stream_search_queries
+from askharrison.prompts.content_curation import create_google_reranking_prompt
+from askharrison.llm_models import process_question
+from askharrison.search_pipeline import google_items, pipelined_search
+from askharrison.research_pipeline import ResearchPipeline, parse_rank_scores
+from askharrison.telemetry import span, record_cache
+
+CACHE_TTL_SECONDS = int(os.environ.get("SEARCH_CACHE_TTL", 24 * 3600))
+QUERY_CACHE_ENTRIES = 2048
+PROBLEM_CACHE_ENTRIES = 256
+RERANK_COLUMNS = ['title', 'link', 'snippet', 'overall']
+
+
+@dataclass
+class SearchResult:
+    query: str
+    title: str
+    link: str
+    snippet: str
+
+
+def normalize_text(text: str) -> str:
+    """cache key of a problem or query: case and whitespace differences don't matter"""
+    return " ".join(text.split()).lower()
+
+
+class TTLCache:
+    """thread safe LRU cache with at most max_entries entries, each expiring after ttl seconds"""
+
+    def __init__(self, max_entries: int, ttl: float = CACHE_TTL_SECONDS, name: Optional[str] = None):
+        """
+        :param name: when given, hits and misses of get are counted in askharrison_cache_requests_total{cache=name}
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.name = name
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if self.name is not None:
+            record_cache(self.name, entry is not None)
+        return default if entry is None else entry[1]
+
+    def set(self, key: Hashable, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def rerank_to_records(reranked: pd.DataFrame) -> List[Dict[str, Any]]:
+    return reranked.to_dict('records')
+
+
+def records_to_rerank(records: List[Dict[str, Any]]) -> pd.DataFrame:
+    return pd.DataFrame(records, columns=RERANK_COLUMNS)
+
+
+class SearchService:
+    def __init__(self, search: Optional[Callable[[str], List[Dict]]] = None,
+                 query_cache_entries: int = QUERY_CACHE_ENTRIES, problem_cache_entries: int = PROBLEM_CACHE_ENTRIES,
+                 ttl: float = CACHE_TTL_SECONDS):
+        """
+        :param search: query -> [{title, link, snippet}], google_items by default
+        :param query_cache_entries: bound of the per-query search cache
+        :param problem_cache_entries: bound of each per-problem stage cache
+        :param ttl: seconds before a cached entry expires
+        """
+        self.search = search or google_items
+        self._search_cache = TTLCache(query_cache_entries, ttl, name="search")
+        self._queries_cache = TTLCache(problem_cache_entries, ttl, name="query_expansion")
+        self._pipeline_cache = TTLCache(problem_cache_entries, ttl, name="search_pipeline")
+        self._rerank_cache = TTLCache(problem_cache_entries, ttl, name="rerank")
+        self._research_cache = TTLCache(problem_cache_entries, ttl, name="research")
+
+    def search_query(self, query: str) -> List[Dict]:
+        # exceptions propagate and are not cached
+        return self._search_cache.get_or_compute(normalize_text(query), lambda: self.search(query))
+
+    def expand_queries(self, problem: str, num_queries: int, query_type: str) -> List[str]:
+        def compute():
+            if query_type == "normal":
+                queries = generate_search_queries(problem, num_queries, "google")
+            elif query_type == "diverse":
+                queries = generate_diffusion_search_queries(problem, num_queries, "google")
+            elif query_type == "disable":
+                queries = [problem]
+            else:
+                raise ValueError("Invalid query type")
+            if not queries:
+                raise ValueError("Could not parse the expanded queries")
+            return queries
+        return self._queries_cache.get_or_compute((normalize_text(problem), num_queries, query_type), compute)
+
+    def perform_search(self, queries: List[str]) -> List[SearchResult]:
+        processed_results = []
+        for query in queries:
+            with span("search", query=query):
+                items = self.search_query(query)
+            for item in items:
+                processed_results.append(SearchResult(
+                    query=query,
+                    title=item["title"],
+                    link=item["link"],
+                    snippet=item["snippet"]
+                ))
+        return processed_results
+
+    def rerank_results(self, problem: str, results: List[SearchResult], top_k: int) -> pd.DataFrame:
+        """
+        LLM reranking of results; items of the LLM output that aren't a valid ranking are skipped.
+        When none is valid the frame is empty, and not cached so that the next call tries again.
+        """
+        key = (normalize_text(problem), tuple((r.link, r.title, r.snippet) for r in results), top_k)
+        with span("rerank", results=len(results), top_k=top_k):
+            cached = self._rerank_cache.get(key)
+            if cached is not None:
+                return cached
+            results_dict = [asdict(r) for r in results]
+            reranking_prompt = create_google_reranking_prompt(problem, results_dict, top_k=top_k)
+            reranking_output = process_question(reranking_prompt, model="gpt-4o")
+            records = [{**results_dict[idx], "overall": score}
+                       for idx, score in parse_rank_scores(reranking_output, len(results))]
+            reranked = records_to_rerank(sorted(records, key=lambda record: record["overall"], reverse=True))
+            if not reranked.empty:
+                self._rerank_cache.set(key, reranked)
+            return reranked
+
+    def expand_and_search(self, problem: str, num_queries: int, query_type: str, top_k: int,
+                          on_query: Optional[Callable[[str], None]] = None):
+        """
+        Pipelined expand_queries + perform_search: each query is searched as soon as it is parsed
+        from the streaming LLM output, and results are pre-ranked as they arrive.
+        Returns (expanded queries, search results, pre-ranked candidates for rerank_results).
+        """
+        with span("search_pipeline", num_queries=num_queries, query_type=query_type):
+            return self._expand_and_search(problem, num_queries, query_type, top_k, on_query)
+
+    def _expand_and_search(self, problem: str, num_queries: int, query_type: str, top_k: int,
+                           on_query: Optional[Callable[[str], None]]):
+        key = (normalize_text(problem), num_queries, query_type, top_k)
+        cached = self._pipeline_cache.get(key)
+        if cached is not None:
+            return cached
+        if query_type == "disable":
+            queries = [problem]
+        elif query_type in ("normal", "diverse"):
+            queries = stream_search_queries(problem, num_queries, "google", diverse=query_type == "diverse")
+        else:
+            raise ValueError("Invalid query type")
+        # the reranking prompt only gets a shortlist, a few times what is shown
+        max_candidates = max(3 * top_k, 30)
+        result = pipelined_search(problem, queries, self.search_query, max_candidates=max_candidates, on_query=on_query)
+        if not result.queries:
+            # nothing could be parsed from the expansion, search the problem itself
+            result = pipelined_search(problem, [problem], self.search_query, max_candidates=max_candidates,
+                                      on_query=on_query)
+        value = (result.queries, [SearchResult(**r) for r in result.results],
+                 [SearchResult(**r) for r in result.candidates])
+        if not result.errors:
+            self._pipeline_cache.set(key, value)
+        return value
+
+    def research(self, problem: str, num_queries: int, query_type: str, top_k: int, sources: List[str]):
+        """expand, search and rank all sources concurrently (e.g. Google and arXiv) in one pipeline"""
+        with span("research", num_queries=num_queries, query_type=query_type, sources=",".join(sources)):
+            return self._research(problem, num_queries, query_type, top_k, sources)
+
+    def _research(self, problem: str, num_queries: int, query_type: str, top_k: int, sources: List[str]):
+        key = (normalize_text(problem), num_queries, query_type, top_k, tuple(sources))
+        cached = self._research_cache.get(key)
+        if cached is not None:
+            return cached
+        pipeline = ResearchPipeline(num_queries={source: num_queries for source in sources}, query_type=query_type)
+        result = pipeline.run(problem, top_k=top_k)
+        expanded_queries = [query for source in sources for query in result.queries.get(source, [])]
+        search_results = [SearchResult(query=r.query, title=r.title, link=r.url, snippet=r.snippet)
+                          for r in result.records]
+        reranked = records_to_rerank([{"title": r.title, "link": r.url, "snippet": r.snippet, "overall": r.score}
+                                      for r in result.ranked])
+        value = expanded_queries, search_results, reranked
+        if not result.errors:
+            self._research_cache.set(key, value)
+        return value
@@ -0,0 +1,301 @@
+"""
+Tracing and metrics for the search, parsing and crawl pipelines.
+
+Stages run inside spans (query_expansion, search, rerank, parse_chunk, llm_call, crawl_fetch,
+crawl_parse, ...). A finished span is exported as one JSON line when a trace file is configured
+(ASKHARRISON_TRACE_FILE or configure(jsonl_path=...)), and always updates in-process metrics:
+span durations (histogram), errors, LLM calls with prompt / completion tokens and retries, and
+cache hits / misses. render_prometheus() returns them in the Prometheus text format, served by
+the API at /metrics or by serve_metrics() in other processes.
+
+Example usage:
+    with span("rerank", results=len(results)) as current:
+        output = process_question(prompt)      # records an llm_call span with token counts
+        current.set(ranked=len(ranked))
+
+    summarize_traces("traces.jsonl")          # count, p50, p95 and max duration per span
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+TRACE_FILE_ENV = "ASKHARRISON_TRACE_FILE"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("askharrison_span", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start: float = field(default_factory=time.time)
+    duration: Optional[float] = None
+    status: str = "ok"
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    clock: float = field(default_factory=time.perf_counter, repr=False)  # monotonic start, not exported
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = asdict(self)
+        record.pop("clock")
+        return record
+
+
+class MetricsRegistry:
+    """counters and histograms keyed by name and labels, thread safe"""
+
+    def __init__(self, buckets: Sequence[float] = DURATION_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters: Dict[Tuple[str, Tuple], float] = defaultdict(float)
+        self._histograms: Dict[Tuple[str, Tuple], List[float]] = {}
+        self._help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> Tuple[str, Tuple]:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name: str, value: float = 1, help: str = "", **labels):
+        with self._lock:
+            self._counters[self._key(name, labels)] += value
+            self._help.setdefault(name, help)
+
+    def observe(self, name: str, value: float, help: str = "", **labels):
+        with self._lock:
+            # per bucket counts, then sum and count
+            histogram = self._histograms.setdefault(self._key(name, labels), [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[i] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+            self._help.setdefault(name, help)
+
+    def counter_value(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get(self._key(name, labels), 0)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render_prometheus(self) -> str:
+        def labels_text(labels, extra=()):
+            pairs = [*labels, *extra]
+            if not pairs:
+                return ""
+            escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(values)) for key, values in self._histograms.items())
+            help_texts = dict(self._help)
+        declared = set()
+        for (name, labels), value in counters:
+            if name not in declared:
+                lines += [f"# HELP {name} {help_texts.get(name) or name}", f"# TYPE {name} counter"]
+                declared.add(name)
+            lines.append(f"{name}{labels_text(labels)} {value:g}")
+        for (name, labels), values in histograms:
+            if name not in declared:
+                lines += [f"# HELP {name} {help_texts.get(name) or name}", f"# TYPE {name} histogram"]
+                declared.add(name)
+            for bound, count in zip(self.buckets, values):
+                lines.append(f"{name}_bucket{labels_text(labels, [('le', f'{bound:g}')])} {count}")
+            lines.append(f"{name}_bucket{labels_text(labels, [('le', '+Inf')])} {values[-1]}")
+            lines.append(f"{name}_sum{labels_text(labels)} {values[-2]:g}")
+            lines.append(f"{name}_count{labels_text(labels)} {values[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+class JsonlSpanExporter:
+    """appends finished spans to a JSON lines file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, finished: Span):
+        line = json.dumps(finished.to_dict(), default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+metrics = MetricsRegistry()
+_exporters: List[Any] = [JsonlSpanExporter(os.environ[TRACE_FILE_ENV])] if os.environ.get(TRACE_FILE_ENV) else []
+
+
+def configure(jsonl_path: Optional[str] = None, exporters: Optional[List[Any]] = None):
+    """
+    Replace the span exporters.
+
+    :param jsonl_path: write spans to this JSON lines file
+    :param exporters: objects with an export(span) method, e.g. an in-memory list for tests
+    """
+    _exporters[:] = list(exporters or [])
+    if jsonl_path:
+        _exporters.append(JsonlSpanExporter(jsonl_path))
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """
+    Time the enclosed block as a child of the current span (of this thread or context).
+    Exceptions are recorded and re-raised.
+    """
+    current = start_span(name, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        _current_span.reset(token)
+        end_span(current, e)
+        raise
+    _current_span.reset(token)
+    end_span(current)
+
+
+def start_span(name: str, **attributes) -> Span:
+    """
+    Start a span without making it current, for generators: a span() held open across yields
+    would leak into the consumer's context. Finish it with end_span.
+    """
+    parent = _current_span.get()
+    return Span(name=name, trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+                span_id=uuid.uuid4().hex[:16], parent_id=parent.span_id if parent else None,
+                attributes=attributes)
+
+
+def end_span(started: Span, error: Optional[BaseException] = None):
+    started.duration = time.perf_counter() - started.clock
+    if error is not None:
+        started.status, started.error = "error", f"{type(error).__name__}: {error}"
+    _finish(started)
+
+
+def traced_iter(name: str, iterable: Iterable, **attributes) -> Iterator:
+    """yield from iterable inside a span from the first to the last item, counting the items"""
+    started, count = start_span(name, **attributes), 0
+    try:
+        for item in iterable:
+            count += 1
+            yield item
+    except GeneratorExit:  # the consumer stopped early, not an error
+        started.set(items=count)
+        end_span(started)
+        raise
+    except BaseException as e:
+        started.set(items=count)
+        end_span(started, e)
+        raise
+    started.set(items=count)
+    end_span(started)
+
+
+def _finish(finished: Span):
+    metrics.observe("askharrison_span_duration_seconds", finished.duration, "Duration of pipeline stages",
+                    span=finished.name)
+    if finished.status == "error":
+        metrics.inc("askharrison_span_errors_total", help="Pipeline stages that raised", span=finished.name)
+    for exporter in list(_exporters):
+        try:
+            exporter.export(finished)
+        except Exception:
+            pass  # tracing must never break the traced code
+
+
+def record_llm_usage(model: str, prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None,
+                     retries: int = 0, cache_hit: bool = False, target: Optional[Span] = None):
+    """count one LLM call and put its usage on target, the current span by default"""
+    current = target or _current_span.get()
+    if current is not None:
+        current.set(model=model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                    retries=retries, cache_hit=cache_hit)
+    metrics.inc("askharrison_llm_calls_total", help="LLM calls", model=model, cache_hit=str(cache_hit).lower())
+    if prompt_tokens:
+        metrics.inc("askharrison_llm_tokens_total", prompt_tokens, help="LLM tokens", model=model, kind="prompt")
+    if completion_tokens:
+        metrics.inc("askharrison_llm_tokens_total", completion_tokens, help="LLM tokens", model=model,
+                    kind="completion")
+    if retries:
+        metrics.inc("askharrison_llm_retries_total", retries, help="LLM request retries", model=model)
+
+
+def record_cache(cache: str, hit: bool):
+    current = _current_span.get()
+    if current is not None:
+        current.set(cache_hit=hit)
+    metrics.inc("askharrison_cache_requests_total", help="Cache lookups", cache=cache, result="hit" if hit else "miss")
+
+
+def render_prometheus() -> str:
+    return metrics.render_prometheus()
+
+
+def serve_metrics(port: int = 9464, host: str = "127.0.0.1"):
+    """serve render_prometheus() at /metrics from a daemon thread, for processes without the API"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+def summarize_traces(path: str) -> List[Dict[str, Any]]:
+    """count, p50, p95, max and total duration (seconds) and tokens per span name of a JSONL trace file"""
+    durations, tokens = defaultdict(list), defaultdict(lambda: [0, 0])
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            durations[record["name"]].append(record["duration"] or 0.0)
+            attributes = record.get("attributes", {})
+            tokens[record["name"]][0] += attributes.get("prompt_tokens") or 0
+            tokens[record["name"]][1] += attributes.get("completion_tokens") or 0
+
+    def percentile(values, fraction):
+        return values[max(0, int(round(len(values) * fraction)) - 1)]
+
+    summary = []
+    for name, values in durations.items():
+        values.sort()
+        summary.append({"span": name, "count": len(values), "p50_s": round(percentile(values, 0.5), 4),
+                        "p95_s": round(percentile(values, 0.95), 4), "max_s": round(values[-1], 4),
+                        "total_s": round(sum(values), 4), "prompt_tokens": tokens[name][0],
+                        "completion_tokens": tokens[name][1]})
+    return sorted(summary, key=lambda item: item["total_s"], reverse=True)
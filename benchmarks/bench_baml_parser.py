@@ -0,0 +1,163 @@
+"""
+Benchmark the BAML extraction backend against the free-form prompt path of DocumentParser.
+
+For every document in a directory both backends extract the same schema; the script reports
+per-backend latency (mean/p50/p95), prompt/completion tokens, API calls and parse-failure rate.
+A free-form result counts as a failure when it does not validate against the BAML pydantic type.
+
+Token counts are the usage the OpenAI API reports: both backends send their requests through a
+local proxy (OPENAI_BASE_URL for the openai client, a BAML client registry for BAML) that
+forwards them to --upstream and adds up the "usage" of every response. Both use --model.
+
+Usage:
+    python benchmarks/bench_baml_parser.py resumes/ --schema Resume --runs 3
+"""
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+from baml_py import ClientRegistry
+from pydantic import ValidationError
+
+from askharrison.llm.openai_llm_client import OpenAIClient
+from askharrison.llmparse.baml_client import types
+from askharrison.llmparse.baml_parser import BamlDocumentParser
+from askharrison.llmparse.document_parser import DocumentParser, ParsingConfig
+
+
+def is_valid(result, schema_type) -> bool:
+    results = result if isinstance(result, list) else [result]
+    try:
+        for item in results:
+            schema_type.model_validate(item)
+    except (ValidationError, TypeError):
+        return False
+    return True
+
+
+class UsageRecordingProxy:
+    """forwards POST requests to an OpenAI compatible API and adds up the usage of the responses"""
+
+    def __init__(self, upstream: str):
+        self.usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self.lock = threading.Lock()
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                headers = {key: value for key, value in self.headers.items()
+                           if key.lower() in ("authorization", "content-type", "openai-organization")}
+                response = requests.post(upstream.rstrip("/") + self.path, data=body, headers=headers, timeout=600)
+                try:
+                    usage = response.json().get("usage") or {}
+                except ValueError:
+                    usage = {}
+                with proxy.lock:
+                    proxy.usage["calls"] += 1
+                    proxy.usage["prompt_tokens"] += usage.get("prompt_tokens", 0)
+                    proxy.usage["completion_tokens"] += usage.get("completion_tokens", 0)
+                self.send_response(response.status_code)
+                self.send_header("Content-Type", response.headers.get("Content-Type", "application/json"))
+                self.send_header("Content-Length", str(len(response.content)))
+                self.end_headers()
+                self.wfile.write(response.content)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.usage)
+
+
+class FixedModelClient(OpenAIClient):
+    """OpenAIClient generating with the benchmark model, DocumentParser uses the default model otherwise"""
+
+    def __init__(self, model: str):
+        super().__init__()
+        self.model = model
+
+    def generate(self, question: str, model: str = None, messages=[]) -> str:
+        return super().generate(question, model=self.model, messages=messages)
+
+
+def run_backend(name, parse_fn, documents, schema_type, proxy, runs):
+    latencies, failures = [], 0
+    usage_before = proxy.snapshot()
+    for _ in range(runs):
+        for document in documents:
+            start = time.perf_counter()
+            try:
+                result = parse_fn(document)
+            except Exception as e:
+                print(f"[{name}] parse error: {e}")
+                result = None
+            latencies.append(time.perf_counter() - start)
+            if result is None or not is_valid(result, schema_type):
+                failures += 1
+    calls = len(latencies)
+    usage = {key: value - usage_before[key] for key, value in proxy.snapshot().items()}
+    return {
+        "backend": name,
+        "calls": calls,
+        "latency_mean_s": round(statistics.mean(latencies), 3),
+        "latency_p50_s": round(statistics.median(latencies), 3),
+        "latency_p95_s": round(sorted(latencies)[max(0, int(calls * 0.95) - 1)], 3),
+        "api_calls": usage["calls"],
+        "prompt_tokens": usage["prompt_tokens"],
+        "completion_tokens": usage["completion_tokens"],
+        "failure_rate": round(failures / calls, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("docs_dir", type=Path, help="directory of .txt/.md documents")
+    parser.add_argument("--schema", default="Resume", choices=["Resume", "FeatureList"])
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--max-concurrency", type=int, default=5)
+    parser.add_argument("--model", default="gpt-4o")
+    parser.add_argument("--upstream", default="https://api.openai.com/v1")
+    args = parser.parse_args()
+
+    documents = [path.read_text(encoding="utf-8") for path in sorted(args.docs_dir.glob("*"))
+                 if path.suffix in (".txt", ".md")]
+    if not documents:
+        raise SystemExit(f"No .txt/.md documents found in {args.docs_dir}")
+    schema_type = getattr(types, args.schema)
+    json_schema = schema_type.model_json_schema()
+
+    proxy = UsageRecordingProxy(args.upstream)
+    registry = ClientRegistry()
+    registry.add_llm_client("BenchmarkClient", "openai", {
+        "model": args.model, "api_key": os.environ["OPENAI_API_KEY"], "base_url": proxy.base_url})
+    registry.set_primary("BenchmarkClient")
+    os.environ["OPENAI_BASE_URL"] = proxy.base_url  # read by the openai client
+
+    baml_parser = BamlDocumentParser(max_concurrency=args.max_concurrency,
+                                     baml_options={"client_registry": registry})
+    prompt_parser = DocumentParser(FixedModelClient(args.model), ParsingConfig(use_baml=False))
+
+    reports = [
+        run_backend("baml", lambda doc: baml_parser.parse_document(doc, args.schema),
+                    documents, schema_type, proxy, args.runs),
+        run_backend("prompt", lambda doc: prompt_parser.parse_document(doc, json_schema),
+                    documents, schema_type, proxy, args.runs),
+    ]
+    for report in reports:
+        print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark HTMLParserExtended (BeautifulSoup, html.parser) against LxmlHTMLParser on arXiv HTML papers.
+
+Papers are read from a directory of saved .html files, or downloaded from arxiv.org/html
+for the given arXiv ids (and cached in the directory). Reports per-paper parse time for
+both backends, the speedup, and section/table/image counts so regressions in output are visible.
+--synthetic N adds a generated arXiv-style page of N sections, for machines without network access.
+
+Usage:
+    python benchmarks/bench_html_parser.py data/html --ids 2402.03300 2401.04088 --repeat 5
+    python benchmarks/bench_html_parser.py /tmp/html --synthetic 40
+"""
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+import requests
+
+from askharrison.crawl.htmlParser import HTMLParserExtended
+from askharrison.crawl.lxmlHtmlParser import LxmlHTMLParser
+
+
+def load_papers(html_dir: Path, arxiv_ids):
+    html_dir.mkdir(parents=True, exist_ok=True)
+    for arxiv_id in arxiv_ids:
+        path = html_dir / f"{arxiv_id}.html"
+        if not path.exists():
+            response = requests.get(f"https://arxiv.org/html/{arxiv_id}", timeout=30)
+            response.raise_for_status()
+            path.write_text(response.text, encoding="utf-8")
+    return {path.stem: path.read_text(encoding="utf-8") for path in sorted(html_dir.glob("*.html"))}
+
+
+def synthetic_paper(num_sections: int) -> str:
+    """arXiv-style HTML: sections with subsections, paragraphs, tables and figures with sub-figure panels"""
+    parts = ["<html><body><article class='ltx_document'><h1 class='ltx_title'>Synthetic paper</h1>"]
+    for i in range(1, num_sections + 1):
+        parts.append(f"<section class='ltx_section' id='S{i}'><h2 class='ltx_title'>{i} Section {i}</h2>")
+        for j in range(1, 4):
+            parts.append(f"<section class='ltx_subsection'><h3 class='ltx_title'>{i}.{j} Part {j}</h3>")
+            parts += [f"<p class='ltx_p'>Paragraph {k} of {i}.{j} with <em>inline</em> "
+                      f"<span class='ltx_Math'>x_{k}</span> math. {'word ' * 40}</p>" for k in range(4)]
+            rows = "".join(f"<tr><td>row {r}</td><td>{r * 0.1:.1f}</td><td>{r * 2}</td></tr>" for r in range(8))
+            parts.append(f"<figure class='ltx_table'><figcaption>Table {i}.{j}: results</figcaption>"
+                         f"<table><tr><th>name</th><th>score</th><th>n</th></tr>{rows}</table></figure>")
+            parts.append(f"<figure class='ltx_figure'><figure class='ltx_figure ltx_figure_panel'>"
+                         f"<img src='x{i}_{j}a.png'/><figcaption>(a)</figcaption></figure>"
+                         f"<figure class='ltx_figure ltx_figure_panel'><img src='x{i}_{j}b.png'/>"
+                         f"<figcaption>(b)</figcaption></figure><figcaption>Figure {i}.{j}</figcaption></figure>")
+            parts.append("</section>")
+        parts.append("</section>")
+    parts.append("</article></body></html>")
+    return "".join(parts)
+
+
+def time_parser(parser, html_text: str, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser.parse_html_str(html_text)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("html_dir", type=Path, help="directory of arXiv .html papers")
+    arg_parser.add_argument("--ids", nargs="*", default=[], help="arXiv ids to download into html_dir")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--synthetic", type=int, default=0, help="add a generated page of this many sections")
+    args = arg_parser.parse_args()
+
+    papers = load_papers(args.html_dir, args.ids)
+    if args.synthetic:
+        papers[f"synthetic-{args.synthetic}"] = synthetic_paper(args.synthetic)
+    if not papers:
+        raise SystemExit(f"No .html papers in {args.html_dir}")
+
+    bs4_parser, lxml_parser = HTMLParserExtended(), LxmlHTMLParser()
+    total_bs4, total_lxml = 0.0, 0.0
+    print(f"{'paper':<16}{'KB':>8}{'bs4 s':>10}{'lxml s':>10}{'speedup':>9}  sections/tables/images (bs4 | lxml)")
+    for name, html_text in papers.items():
+        bs4_time = time_parser(bs4_parser, html_text, args.repeat)
+        lxml_time = time_parser(lxml_parser, html_text, args.repeat)
+        total_bs4 += bs4_time
+        total_lxml += lxml_time
+        counts = [
+            f"{len(p.sections)}/{len(p.get_tables())}/{len(p.get_images())}"
+            for p in (bs4_parser, lxml_parser)
+        ]
+        print(f"{name:<16}{len(html_text) // 1024:>8}{bs4_time:>10.3f}{lxml_time:>10.3f}"
+              f"{bs4_time / lxml_time:>8.1f}x  {counts[0]} | {counts[1]}")
+    print(f"{'total':<16}{'':>8}{total_bs4:>10.3f}{total_lxml:>10.3f}{total_bs4 / total_lxml:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Import time regression benchmark, based on `python -X importtime`.
+
+Every module is imported in a fresh interpreter --runs times; the script reports the
+cumulative import time of the module (min and median, in ms) and the heaviest top-level
+packages it pulled in, one JSON line per module.
+
+It exits with status 1 when a module takes longer than its budget (--budget module=ms,
+or --max-ms for all), or when it imports a package it should load lazily (FORBIDDEN, e.g.
+openai for askharrison.llm_models) - the latter check doesn't depend on machine speed.
+
+Usage:
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py askharrison.llm_models --runs 10 --budget askharrison.llm_models=50
+"""
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+DEFAULT_MODULES = [
+    "askharrison.config",
+    "askharrison.llm_models",
+    "askharrison.prompts.query_expansion",
+    "askharrison.google_search",
+    "askharrison.search_pipeline",
+    "askharrison.job_queue",
+    "askharrison.telemetry",
+    "askharrison.cli",
+]
+
+HEAVY_PACKAGES = ["openai", "pandas", "numpy", "tiktoken", "tqdm", "arxiv", "transformers", "streamlit",
+                  "baml_py", "fastapi"]
+
+# module -> packages it must not import (they are loaded when the code that needs them runs)
+FORBIDDEN = {
+    "askharrison.config": HEAVY_PACKAGES,
+    "askharrison.llm_models": HEAVY_PACKAGES,
+    "askharrison.prompts.query_expansion": HEAVY_PACKAGES,
+    "askharrison.google_search": HEAVY_PACKAGES,
+    "askharrison.search_pipeline": HEAVY_PACKAGES,
+    "askharrison.job_queue": HEAVY_PACKAGES,
+    "askharrison.telemetry": HEAVY_PACKAGES,
+    "askharrison.cli": HEAVY_PACKAGES,
+}
+
+LINE_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def import_times(module: str):
+    """(cumulative microseconds of module, {imported module: self microseconds}) of one fresh import"""
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+    cumulative, self_times = None, {}
+    for line in completed.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        self_times[name] = int(self_us)
+        if name == module:
+            cumulative = int(cumulative_us)
+    return cumulative or 0, self_times
+
+
+def measure(module: str, runs: int):
+    totals, by_package = [], defaultdict(list)
+    for _ in range(runs):
+        cumulative, self_times = import_times(module)
+        totals.append(cumulative)
+        per_package = defaultdict(int)
+        for name, self_us in self_times.items():
+            per_package[name.split(".")[0]] += self_us
+        for package, us in per_package.items():
+            by_package[package].append(us)
+    heaviest = sorted(((min(us), package) for package, us in by_package.items()), reverse=True)[:5]
+    return {
+        "module": module,
+        "min_ms": round(min(totals) / 1000, 1),
+        "median_ms": round(statistics.median(totals) / 1000, 1),
+        "heaviest": {package: round(us / 1000, 1) for us, package in heaviest},
+        "imported_modules": set(self_times),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", nargs="*", default=[], help="module=ms, maximum median import time")
+    parser.add_argument("--max-ms", type=float, default=None, help="maximum median import time of every module")
+    args = parser.parse_args()
+
+    budgets = {module: float(ms) for module, ms in (item.split("=", 1) for item in args.budget)}
+    failures = []
+    for module in args.modules:
+        report = measure(module, args.runs)
+        imported = report.pop("imported_modules")
+        forbidden = sorted(package for package in FORBIDDEN.get(module, []) if package in imported)
+        report["forbidden_imports"] = forbidden
+        print(json.dumps(report))
+        budget = budgets.get(module, args.max_ms)
+        if budget is not None and report["median_ms"] > budget:
+            failures.append(f"{module}: {report['median_ms']} ms > {budget} ms")
+        if forbidden:
+            failures.append(f"{module} imports {', '.join(forbidden)}")
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Load test of the askharrison HTTP/JSON API (askharrison.api_server).
+
+For every concurrency level, that many clients send requests back to back to one endpoint
+until --requests requests are done; the script reports requests/sec, latency (mean/p50/p95/p99)
+and the error rate per level, one JSON line each.
+
+Each request reuses the same payload, so after the first one the search stages are served
+from the workers' caches; pass --unique to append a counter to the problem and measure
+uncached (LLM and Google bound) throughput instead.
+
+Usage:
+    python -m askharrison.api_server --workers 4 &
+    python benchmarks/bench_search_api.py --concurrency 1 4 16 --requests 200
+    python benchmarks/bench_search_api.py --endpoint /search/pipeline \\
+        --payload '{"problem": "vector database benchmarks", "num_queries": 5, "top_k": 10}' --unique
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    return sorted_values[max(0, int(len(sorted_values) * fraction) - 1)]
+
+
+def run_level(url: str, payload, concurrency: int, total_requests: int, unique: bool, timeout: float):
+    counter = iter(range(total_requests))
+    counter_lock = threading.Lock()
+
+    def next_index():
+        with counter_lock:
+            return next(counter, None)
+
+    def client():
+        # one connection per client thread, like a browser session
+        session = requests.Session()
+        latencies, errors = [], 0
+        while (index := next_index()) is not None:
+            body = payload
+            if unique and payload is not None:
+                body = {**payload, "problem": f"{payload.get('problem', '')} {index}"}
+            start = time.perf_counter()
+            try:
+                if body is None:
+                    response = session.get(url, timeout=timeout)
+                else:
+                    response = session.post(url, json=body, timeout=timeout)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+        return latencies, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(lambda _: client(), range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for client_latencies, _ in outcomes for latency in client_latencies)
+    errors = sum(client_errors for _, client_errors in outcomes)
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "requests_per_s": round(len(latencies) / elapsed, 2),
+        "latency_mean_s": round(statistics.mean(latencies), 4),
+        "latency_p50_s": round(percentile(latencies, 0.50), 4),
+        "latency_p95_s": round(percentile(latencies, 0.95), 4),
+        "latency_p99_s": round(percentile(latencies, 0.99), 4),
+        "error_rate": round(errors / len(latencies), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8520", help="API base url")
+    parser.add_argument("--endpoint", default="/search/expand")
+    parser.add_argument("--payload", default='{"problem": "efficient long context attention", "num_queries": 5}',
+                        help="JSON body, 'null' to send GET requests (e.g. to /health)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=100, help="requests per concurrency level")
+    parser.add_argument("--unique", action="store_true", help="make every problem unique to bypass the caches")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    payload = json.loads(args.payload)
+    url = args.url.rstrip("/") + args.endpoint
+    for concurrency in args.concurrency:
+        print(json.dumps(run_level(url, payload, concurrency, args.requests, args.unique, args.timeout)))
+
+
+if __name__ == "__main__":
+    main()
@@ -24,5 +24,12 @@ setup(
         "tiktoken",
         "Pillow",
         "baml-py==0.73.4"          
-        ]
+        ],
+    entry_points={
+        "console_scripts": ["askharrison=askharrison.cli:main"],
+    },
+    extras_require={
+        # HTTP/JSON API served by askharrison.api_server
+        "api": ["fastapi", "uvicorn"],
+    }
 )
\ No newline at end of file
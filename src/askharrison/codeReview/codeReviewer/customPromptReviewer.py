@@ -2,13 +2,31 @@
 This module defines a class CustomPromptReviewer that uses OpenAI's API to review code files.
 It generates comprehensive prompts based on custom prompts and review scopes, and then
 uses these prompts to review the code files provided.
+
+The comprehensive prompt is generated once per config (and cached on disk when a
+ReviewCache is given), files are reviewed concurrently, and reviews are cached by
+(content hash, prompt hash).
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict
 import openai
 import logging
+import threading
 from pathlib import Path
 
+from askharrison.codeReview.diffChunker import FileReview, attach_context, pack_hunks, parse_unified_diff, render_chunk
+from askharrison.codeReview.reviewCache import ReviewCache, hash_text
+
+DIFF_REVIEW_INSTRUCTIONS = (
+    "The changes below are hunks of a unified diff. Lines are prefixed with their line number "
+    "in the new file ('+' added, '-' removed, ' ' unchanged). Report each finding on its own "
+    "line as `L<line number>: <finding>`; findings about the change as a whole go on lines "
+    "without a line number."
+)
+# tokens reserved for the system message, instructions and message framing
+PROMPT_OVERHEAD_TOKENS = 200
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,7 +36,8 @@ class CustomPromptReviewer:
     A class that reviews code files using OpenAI's API by generating comprehensive prompts.
     """
     
-    def __init__(self, api_key: str, custom_prompts: List[str], review_scopes: Optional[List[str]] = None, model: str = "text-davinci-003", max_tokens: int = 4000) -> None:
+    def __init__(self, api_key: str, custom_prompts: List[str], review_scopes: Optional[List[str]] = None, model: str = "text-davinci-003", max_tokens: int = 4000,
+                 cache: Optional[ReviewCache] = None, max_workers: int = 4, client=None, token_counter=None) -> None:
         """
         Initializes the CustomPromptReviewer with the necessary parameters.
 
@@ -26,15 +45,31 @@ class CustomPromptReviewer:
         :param custom_prompts: A list of custom prompts to be included in the review.
         :param review_scopes: Optional list of scopes to focus the review on.
         :param model: The model to be used for generating prompts and reviews.
-        :param max_tokens: The maximum number of tokens to be used in the API calls.
+        :param max_tokens: The maximum number of tokens to be used in the API calls; larger diffs are reviewed in hunk chunks.
+        :param cache: Optional on-disk cache for the comprehensive prompt and review results.
+        :param max_workers: The maximum number of LLM requests in flight, over all files and diff chunks.
+        :param client: Optional OpenAI compatible client, built from api_key by default.
+        :param token_counter: Optional text -> token count function, token_util.get_token_count by default.
         """
         self.api_key = api_key
         self.custom_prompts = custom_prompts
         self.review_scopes = review_scopes or []
         self.model = model
         self.max_tokens = max_tokens
+        self.cache = cache
+        self.max_workers = max_workers
         openai.api_key = api_key
-        self.client = openai.OpenAI()
+        self.client = client or openai.OpenAI(api_key=api_key)
+        self.token_counter = token_counter
+        self._prompt = None
+        self._prompt_lock = threading.Lock()
+        # shared by file and chunk reviews: review_diff's chunk pool runs inside review_contents' file pool
+        self._request_slots = threading.BoundedSemaphore(max_workers)
+
+    @property
+    def config_hash(self) -> str:
+        """hash of everything the comprehensive prompt depends on"""
+        return hash_text(self.custom_prompts, self.review_scopes, self.model)
 
     def review_code_files(self, file_paths: List[Path]) -> Dict[Path, Optional[str]]:
         """
@@ -43,15 +78,38 @@ class CustomPromptReviewer:
         :param file_paths: A list of file paths to the code files to be reviewed.
         :return: A dictionary mapping file paths to their respective review texts.
         """
-        reviews = {}
+        contents = {}
         for file_path in file_paths:
             try:
-                content = self.get_file_content(file_path)
-                reviews[file_path] = self.review_code_file(file_path, content)
+                contents[file_path] = self.get_file_content(file_path)
+            except Exception as e:
+                logger.error(f"Failed to read file {file_path}: {e}")
+        reviews = self.review_contents(contents)
+        return {file_path: reviews.get(file_path) for file_path in file_paths}
+
+    def review_contents(self, contents: Dict[Path, str]) -> Dict[Path, Optional[str]]:
+        """
+        Reviews several files concurrently, with at most max_workers requests in flight.
+
+        :param contents: A dictionary mapping file paths to the content (or diff) to review.
+        :return: A dictionary mapping file paths to their respective review texts.
+        """
+        if not contents:
+            return {}
+        # generate the prompt before fanning out, so it is only generated once
+        if not self.get_comprehensive_prompt():
+            return {file_path: None for file_path in contents}
+
+        def review(item):
+            file_path, content = item
+            try:
+                return file_path, self.review_code_file(file_path, content)
             except Exception as e:
                 logger.error(f"Failed to review file {file_path}: {e}")
-                reviews[file_path] = None
-        return reviews
+                return file_path, None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return dict(executor.map(review, contents.items()))
 
     def review_code_file(self, file_path: Path, content: str) -> Optional[str]:
         """
@@ -61,10 +119,89 @@ class CustomPromptReviewer:
         :param content: The content of the code file.
         :return: The review text or None if an error occurred.
         """
-        generated_prompt = self.generate_comprehensive_prompt()
-        if generated_prompt:
+        generated_prompt = self.get_comprehensive_prompt()
+        if not generated_prompt:
+            return None
+        if self.cache is None:
+            return self._review_content(file_path, content, generated_prompt)
+
+        content_hash, prompt_hash = hash_text(content), hash_text(generated_prompt)
+        review = self.cache.get_review(content_hash, prompt_hash)
+        if review is not None:
+            logger.info(f"Using cached review for {file_path}")
+            return review
+        review = self._review_content(file_path, content, generated_prompt)
+        if review is not None:
+            self.cache.set_review(content_hash, prompt_hash, review)
+        return review
+
+    def count_tokens(self, text: str) -> int:
+        if self.token_counter is None:
+            from askharrison.llm.token_util import get_token_count
+            self.token_counter = get_token_count
+        return self.token_counter(text)
+
+    def _review_content(self, file_path: Path, content: str, generated_prompt: str) -> Optional[str]:
+        """diffs that don't fit in one request are reviewed hunk by hunk"""
+        if self.count_tokens(generated_prompt) + self.count_tokens(content) + PROMPT_OVERHEAD_TOKENS <= self.max_tokens:
             return self.review_code(content, generated_prompt)
-        return None
+        if not (content.startswith('@@ ') or '\n@@ ' in content):
+            logger.error(f"{file_path} exceeds max_tokens and is not a diff, skipping review")
+            return None
+        report = self.review_diff(file_path, content, generated_prompt)
+        return report.to_text() if report.failed_chunks < report.chunk_count else None
+
+    def review_diff(self, file_path: Path, diff_text: str, generated_prompt: Optional[str] = None,
+                    file_lines: Optional[List[str]] = None) -> FileReview:
+        """
+        Reviews a diff hunk by hunk: hunks (with their enclosing function as context) are
+        packed into requests that fit max_tokens, reviewed concurrently, and the findings are
+        merged into one report keyed by line number.
+
+        :param file_path: The path of the changed file.
+        :param diff_text: The unified diff of the file.
+        :param generated_prompt: The review prompt, the comprehensive prompt by default.
+        :param file_lines: Lines of the new file version, read from file_path by default, for context.
+        :return: The merged FileReview.
+        """
+        generated_prompt = generated_prompt or self.get_comprehensive_prompt()
+        hunks = [hunk for file_hunks in parse_unified_diff(diff_text, str(file_path)).values() for hunk in file_hunks]
+        if file_lines is None and Path(file_path).is_file():
+            with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+                file_lines = file.read().splitlines()
+        if file_lines:
+            attach_context(hunks, file_lines)
+
+        prompt = f"{generated_prompt}\n\n{DIFF_REVIEW_INSTRUCTIONS}"
+        budget = self.max_tokens - self.count_tokens(prompt) - PROMPT_OVERHEAD_TOKENS
+        chunks = pack_hunks(hunks, max(budget, 1), self.count_tokens)
+
+        report = FileReview(str(file_path))
+        report.chunk_count = len(chunks)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            reviews = executor.map(lambda chunk: self.review_code(render_chunk(chunk), prompt), chunks)
+            for review in reviews:
+                if review is None:
+                    report.failed_chunks += 1
+                else:
+                    report.add_review(review)
+        return report
+
+    def get_comprehensive_prompt(self) -> Optional[str]:
+        """
+        Returns the comprehensive prompt, generating it at most once per config: it is kept
+        in memory and, with a cache, on disk keyed by config_hash.
+
+        :return: A comprehensive prompt string or None if it could not be generated.
+        """
+        with self._prompt_lock:
+            if self._prompt is None and self.cache is not None:
+                self._prompt = self.cache.get_prompt(self.config_hash)
+            if self._prompt is None:
+                self._prompt = self.generate_comprehensive_prompt()
+                if self._prompt and self.cache is not None:
+                    self.cache.set_prompt(self.config_hash, self._prompt)
+            return self._prompt
 
     def generate_comprehensive_prompt(self) -> Optional[str]:
         """
@@ -112,11 +249,12 @@ class CustomPromptReviewer:
                 {"role": "system", "content": "You are an experienced software engineer and architect. You are reviewing code for a large software company. It is very important that you provide a thorough review of the code."},
                 {"role": "user", "content": prompt}
             ]
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=prompt_message,
-                temperature=0.0,
-            )
+            with self._request_slots:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=prompt_message,
+                    temperature=0.0,
+                )
             return response.choices[0].message.content
         except Exception as e:
             logger.error(f"Error reviewing code: {e}")
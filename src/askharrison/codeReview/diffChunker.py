@@ -0,0 +1,212 @@
+"""
+Hunk-level chunking of unified diffs for code review.
+
+A staged diff is parsed into hunks, each hunk gets a bounded amount of enclosing function
+context, and hunks are packed into token-budgeted review requests. Hunks are rendered with
+new-file line numbers so findings can be reported, and merged back, per line.
+
+Example usage:
+    files = parse_unified_diff(subprocess.check_output(['git', 'diff', '--cached'], text=True))
+    for file_path, hunks in files.items():
+        chunks = pack_hunks(hunks, max_tokens=3000)
+"""
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+from askharrison.codeReview.gitHandler import _header_path
+
+HUNK_HEADER_PATTERN = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@ ?(.*)$')
+# lines that open a function or class scope in the languages of detect_language
+SCOPE_PATTERN = re.compile(r'^\s*(export\s+)?(async\s+)?(def|class|function|func|fn|impl|struct|interface|module'
+                           r'|public|private|protected|static|internal)\b')
+FINDING_PATTERN = re.compile(r'^\s*[-*]?\s*L(\d+)(?:\s*-\s*L?\d+)?\s*:\s*(.+)$')
+
+
+@dataclass
+class Hunk:
+    file_path: str
+    old_start: int
+    old_count: int
+    new_start: int
+    new_count: int
+    section: str = ''
+    lines: List[str] = field(default_factory=list)
+    context: List[str] = field(default_factory=list)
+
+    @property
+    def header(self) -> str:
+        return f"@@ -{self.old_start},{self.old_count} +{self.new_start},{self.new_count} @@ {self.section}".rstrip()
+
+    def numbered_lines(self) -> List[str]:
+        """hunk lines prefixed with their new-file line number (blank for removed lines)"""
+        numbered, line_number = [], self.new_start
+        for line in self.lines:
+            if line.startswith('-'):
+                numbered.append(f"{'':>6} {line}")
+            else:
+                numbered.append(f"{line_number:>6} {line}")
+                line_number += 1
+        return numbered
+
+    def render(self) -> str:
+        parts = [f"File: {self.file_path}", self.header]
+        if self.context:
+            parts.append("Enclosing context (unchanged):")
+            parts.extend(self.context)
+            parts.append("Changes:")
+        parts.extend(self.numbered_lines())
+        return '\n'.join(parts)
+
+
+def parse_unified_diff(diff_text: str, file_path: Optional[str] = None) -> Dict[str, List[Hunk]]:
+    """
+    Parse `git diff` output into hunks per file.
+
+    :param diff_text: unified diff of one or more files
+    :param file_path: file name to use when the diff has no `diff --git` header
+    """
+    files = defaultdict(list)
+    current_file, hunk = file_path, None
+    old_left = new_left = 0  # lines of the current hunk still to come, from its header
+    for line in diff_text.splitlines():
+        if hunk is not None and (old_left or new_left):
+            # hunk content, even if it looks like a header ("----" is a removed "---")
+            if line.startswith('\\'):
+                continue  # "\ No newline at end of file"
+            kind = line[:1]
+            if (kind == ' ' and old_left and new_left) or (kind == '-' and old_left) or (kind == '+' and new_left):
+                old_left -= kind != '+'
+                new_left -= kind != '-'
+                hunk.lines.append(line)
+                continue
+            hunk = None  # truncated hunk
+        if line.startswith('diff --git '):
+            current_file, hunk = _header_path(line), None
+            continue
+        header_path = next((line[len(prefix):] for prefix in ('+++ b/', 'rename to ', 'copy to ')
+                            if line.startswith(prefix)), None)
+        if header_path is not None:
+            # exact path of renamed and copied files; git ends "+++" paths containing spaces with a tab
+            current_file, hunk = header_path.rstrip('\t'), None
+            continue
+        header_match = HUNK_HEADER_PATTERN.match(line)
+        if header_match:
+            old_start, old_count, new_start, new_count, section = header_match.groups()
+            hunk = Hunk(current_file or '', int(old_start), int(old_count or 1),
+                        int(new_start), int(new_count or 1), section.strip())
+            old_left, new_left = hunk.old_count, hunk.new_count
+            files[hunk.file_path].append(hunk)
+        elif hunk is not None and line.startswith('\\'):
+            continue  # "\ No newline at end of file" after the hunk's last line
+        else:
+            hunk = None  # file headers (index, ---, +++), binary notices...
+    return dict(files)
+
+
+def attach_context(hunks: Sequence[Hunk], file_lines: Sequence[str], max_context_lines: int = 20):
+    """
+    Give each hunk the lines from the start of its enclosing function or class up to the
+    hunk, looking back at most max_context_lines lines of the new file.
+    """
+    for hunk in hunks:
+        # 0-based index of the hunk's first line, file_lines may be a slightly different version
+        first_line = min(hunk.new_start - 1, len(file_lines))
+        start = max(0, first_line - max_context_lines)
+        scope_start = next((i for i in range(first_line - 1, start - 1, -1)
+                            if SCOPE_PATTERN.match(file_lines[i])), None)
+        if scope_start is not None:
+            hunk.context = [f"{i + 1:>6}  {file_lines[i]}" for i in range(scope_start, first_line)]
+
+
+def _split_hunk(hunk: Hunk, max_tokens: int, token_counter: Callable[[str], int]) -> List[Hunk]:
+    """split a hunk larger than max_tokens into consecutive line ranges"""
+    pieces, lines = [], []
+    old_line, new_line = hunk.old_start, hunk.new_start
+    piece_old, piece_new = old_line, new_line
+    budget = max_tokens - token_counter(Hunk(hunk.file_path, 0, 0, 0, 0, hunk.section, [], hunk.context).render())
+
+    def close_piece():
+        old_count = sum(1 for line in lines if not line.startswith('+'))
+        new_count = sum(1 for line in lines if not line.startswith('-'))
+        pieces.append(Hunk(hunk.file_path, piece_old, old_count, piece_new, new_count,
+                           hunk.section, list(lines), hunk.context))
+
+    used = 0
+    for line in hunk.lines:
+        line_tokens = token_counter(line) + 2
+        if lines and used + line_tokens > budget:
+            close_piece()
+            lines, used = [], 0
+            piece_old, piece_new = old_line, new_line
+        lines.append(line)
+        used += line_tokens
+        if not line.startswith('+'):
+            old_line += 1
+        if not line.startswith('-'):
+            new_line += 1
+    if lines:
+        close_piece()
+    return pieces
+
+
+def pack_hunks(hunks: Sequence[Hunk], max_tokens: int,
+               token_counter: Optional[Callable[[str], int]] = None) -> List[List[Hunk]]:
+    """
+    Greedily pack hunks, in order, into chunks whose rendered size stays within max_tokens.
+    Hunks larger than max_tokens on their own are split by lines.
+
+    :param token_counter: text -> token count, defaults to token_util.get_token_count
+    """
+    if token_counter is None:
+        from askharrison.llm.token_util import get_token_count as token_counter
+
+    chunks, chunk, used = [], [], 0
+    for hunk in hunks:
+        hunk_tokens = token_counter(hunk.render())
+        pieces = [hunk] if hunk_tokens <= max_tokens else _split_hunk(hunk, max_tokens, token_counter)
+        for piece in pieces:
+            piece_tokens = hunk_tokens if piece is hunk else token_counter(piece.render())
+            if chunk and used + piece_tokens > max_tokens:
+                chunks.append(chunk)
+                chunk, used = [], 0
+            chunk.append(piece)
+            used += piece_tokens
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def render_chunk(chunk: Sequence[Hunk]) -> str:
+    return '\n\n'.join(hunk.render() for hunk in chunk)
+
+
+@dataclass
+class FileReview:
+    """findings of a file's chunk reviews, merged and keyed by new-file line number"""
+    file_path: str
+    findings: Dict[int, List[str]] = field(default_factory=lambda: defaultdict(list))
+    general: List[str] = field(default_factory=list)
+    chunk_count: int = 0
+    failed_chunks: int = 0
+
+    def add_review(self, review_text: str):
+        for line in review_text.splitlines():
+            match = FINDING_PATTERN.match(line)
+            if match:
+                self.findings[int(match.group(1))].append(match.group(2).strip())
+            elif line.strip():
+                self.general.append(line.strip())
+
+    def to_text(self) -> str:
+        parts = [f"Review of {self.file_path}"]
+        for line_number in sorted(self.findings):
+            for finding in self.findings[line_number]:
+                parts.append(f"L{line_number}: {finding}")
+        if self.general:
+            parts.append("General:")
+            parts.extend(self.general)
+        if self.failed_chunks:
+            parts.append(f"({self.failed_chunks} chunk(s) could not be reviewed)")
+        return '\n'.join(parts)
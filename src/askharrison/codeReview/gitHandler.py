@@ -1,8 +1,114 @@
 # git_handler.py
 
+import fnmatch
+import os
 import subprocess
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Sequence
+
+# generated or machine-written files that are not worth an LLM review
+DEFAULT_SKIP_PATTERNS = [
+    "*.lock", "package-lock.json", "pnpm-lock.yaml", "go.sum", "*.ipynb",
+    "*.min.js", "*.min.css", "*.map", "*_pb2.py", "*_pb2_grpc.py", "*.pb.go",
+    "dist/*", "build/*", "*.svg", "*.csv",
+]
+DEFAULT_MAX_DIFF_BYTES = 200_000
+
+# one process for all staged files; no pager, colors, external diff drivers or path quoting
+STAGED_DIFF_COMMAND = ['git', '-c', 'core.quotePath=false', 'diff', '--cached', '--no-color', '--no-ext-diff']
+
+
+@dataclass
+class StagedDiff:
+    path: str
+    diff: str
+    skipped: Optional[str] = None  # reason the file is not reviewed: binary, pattern, size
+
+    @property
+    def reviewable(self) -> bool:
+        return self.skipped is None
+
+
+def matches_skip_pattern(path: str, skip_patterns: Sequence[str]) -> bool:
+    name = os.path.basename(path)
+    return any(fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(name, pattern) for pattern in skip_patterns)
+
+
+def _header_path(line: str) -> str:
+    """
+    path of a "diff --git a/<path> b/<path>" line. Both paths are the same unless the file
+    is renamed or copied, so the path is the second half of the line, even if it contains
+    " b/"; for renames and copies this is a first guess, fixed by the "+++ b/" line.
+    """
+    paths = line.rstrip('\n')[len('diff --git '):]
+    half = (len(paths) - 1) // 2
+    if paths.startswith('a/') and paths[half:half + 3] == ' b/' and paths[2:half] == paths[half + 3:]:
+        return paths[half + 3:]
+    return paths.split(' b/', 1)[-1]
+
+
+def split_diff_stream(lines, skip_patterns: Sequence[str] = (), max_diff_bytes: int = DEFAULT_MAX_DIFF_BYTES) -> Iterator[StagedDiff]:
+    """
+    Split `git diff` output into one StagedDiff per file as lines arrive.
+
+    Lines of skipped files (matching skip_patterns, binary, or larger than max_diff_bytes
+    of UTF-8) are dropped while streaming, they are never accumulated. The path comes from
+    the "+++ b/<path>" (or "rename to", "copy to") header line when there is one.
+    """
+    path, parts, size, skipped, in_header = None, [], 0, None, False
+
+    def finish():
+        return StagedDiff(path, '' if skipped else ''.join(parts), skipped)
+
+    for line in lines:
+        if line.startswith('diff --git '):
+            if path is not None:
+                yield finish()
+            path, in_header = _header_path(line), True
+            parts, size = [line], len(line.encode())
+            skipped = 'pattern' if matches_skip_pattern(path, skip_patterns) else None
+            continue
+        if path is None:
+            continue
+        if in_header:
+            if line.startswith('@@'):
+                in_header = False
+            else:
+                for prefix in ('+++ b/', 'rename to ', 'copy to '):
+                    if line.startswith(prefix):
+                        # git ends "+++" paths containing spaces with a tab
+                        header_path = line[len(prefix):].rstrip('\n').rstrip('\t')
+                        if header_path != path:
+                            path = header_path
+                            if skipped in (None, 'pattern'):
+                                skipped = 'pattern' if matches_skip_pattern(path, skip_patterns) else None
+        if skipped:
+            continue
+        if line.startswith('Binary files ') or line.startswith('GIT binary patch'):
+            skipped, parts = 'binary', []
+            continue
+        size += len(line.encode())
+        if size > max_diff_bytes:
+            skipped, parts = 'size', []
+            continue
+        parts.append(line)
+    if path is not None:
+        yield finish()
+
 
 class GitHandler:
+    def __init__(self, skip_patterns: Optional[Sequence[str]] = None, max_diff_bytes: int = DEFAULT_MAX_DIFF_BYTES):
+        """
+        :param skip_patterns: glob patterns (matched on the path and the file name) of files never reviewed
+        :param max_diff_bytes: files with a larger diff (or content) are skipped
+        """
+        self.skip_patterns = DEFAULT_SKIP_PATTERNS if skip_patterns is None else list(skip_patterns)
+        self.max_diff_bytes = max_diff_bytes
+
+    @staticmethod
+    def get_git_dir():
+        return subprocess.check_output(['git', 'rev-parse', '--git-dir'], text=True).strip()
+
     @staticmethod
     def get_staged_files():
         return subprocess.check_output(['git', 'diff', '--cached', '--name-only'], text=True).splitlines()
@@ -14,3 +120,38 @@ class GitHandler:
         else:
             with open(file_path, 'r') as file:
                 return file.read()
+
+    def iter_staged_diffs(self, include_skipped: bool = False) -> Iterator[StagedDiff]:
+        """
+        Stream the staged diff of every file from a single `git diff --cached` process.
+
+        :param include_skipped: also yield skipped files (with an empty diff and the reason)
+        """
+        process = subprocess.Popen(STAGED_DIFF_COMMAND, stdout=subprocess.PIPE, text=True,
+                                   encoding='utf-8', errors='replace')
+        completed = False
+        try:
+            for staged_diff in split_diff_stream(process.stdout, self.skip_patterns, self.max_diff_bytes):
+                if include_skipped or staged_diff.reviewable:
+                    yield staged_diff
+            completed = True
+        finally:
+            process.stdout.close()
+            if not completed:
+                process.kill()  # the consumer stopped early
+            process.wait()
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, STAGED_DIFF_COMMAND)
+
+    def iter_staged_contents(self) -> Iterator[StagedDiff]:
+        """full working tree contents of the reviewable staged files, for whole-file reviews"""
+        for staged_diff in self.iter_staged_diffs(include_skipped=True):
+            if staged_diff.skipped in ('pattern', 'binary'):
+                continue
+            if not os.path.isfile(staged_diff.path) or os.path.getsize(staged_diff.path) > self.max_diff_bytes:
+                continue  # deleted or too large
+            with open(staged_diff.path, 'r', encoding='utf-8', errors='replace') as file:
+                yield StagedDiff(staged_diff.path, file.read())
+
+    def get_reviewable_changes(self, review_changes_only: bool = True) -> List[StagedDiff]:
+        return list(self.iter_staged_diffs() if review_changes_only else self.iter_staged_contents())
@@ -1,37 +1,131 @@
 # main.py
-import os 
+"""
+Code review pre-commit hook.
+
+    python -m askharrison.codeReview.main                 # review staged changes (sync, or async per config)
+    python -m askharrison.codeReview.main hook --async    # enqueue the review and return immediately
+    python -m askharrison.codeReview.main worker          # background worker reviewing queued jobs
+    python -m askharrison.codeReview.main show HEAD       # print the stored review of a commit
+    python -m askharrison.codeReview.main show HEAD --check   # exit 1 unless the review is done
+"""
+import argparse
+import os
+import subprocess
+import sys
 from askharrison import codeReview
-from askharrison.codeReview.codeReviewerconfig_manager import ConfigManager
-from askharrison.codeReview.utils import detect_language, GitHandler
+from askharrison.codeReview.configManager import ConfigManager
+from askharrison.codeReview.utils import detect_language
+from askharrison.codeReview.gitHandler import DEFAULT_MAX_DIFF_BYTES, GitHandler
 from askharrison.codeReview.reviewLogger import Logger
+from askharrison.codeReview.reviewCache import ReviewCache
+from askharrison.codeReview.reviewQueue import (ReviewStore, ReviewWorker, ensure_worker_running,
+                                                install_signal_handlers, worker_command)
 from askharrison.codeReview.codeReviewer.customPromptReviewer import CustomPromptReviewer
 
-def main():
+def load_config():
     CONFIG_PATH = os.environ.get("CONFIG_PATH", os.path.join(os.path.dirname(codeReview.__file__), "reviewconfig.yaml"))
-    config_manager = ConfigManager(CONFIG_PATH)
-    git_handler = GitHandler()
-    logger = Logger(__name__)
-    reviewer = OpenAIReviewer(config_manager.get("openai_api_key"))
+    return ConfigManager(CONFIG_PATH)
 
-    staged_files = git_handler.get_staged_files()
-    generated_prompt = reviewer.generate_comprehensive_prompt(
-        config_manager.get("review_scopes"),
-        config_manager.get("custom_prompts")
+def state_dir(config_manager):
+    # prompts, reviews and the job queue live inside .git, so they survive amends but are never committed
+    return config_manager.get("cache_dir") or os.path.join(GitHandler.get_git_dir(), "askharrison-review")
+
+def build_reviewer(config_manager):
+    return CustomPromptReviewer(
+        config_manager.get("openai_api_key"),
+        config_manager.get("custom_prompts", []),
+        review_scopes=config_manager.get("review_scopes"),
+        model=config_manager.get("model", "gpt-4o-mini"),
+        cache=ReviewCache(os.path.join(state_dir(config_manager), "cache")),
+        max_workers=config_manager.get("max_workers", 4),
     )
 
-    if not generated_prompt:
+def review_store(config_manager):
+    return ReviewStore(os.path.join(state_dir(config_manager), "reviews.db"))
+
+def collect_changes(config_manager, logger):
+    git_handler = GitHandler(
+        skip_patterns=config_manager.get("skip_patterns"),
+        max_diff_bytes=config_manager.get("max_diff_bytes", DEFAULT_MAX_DIFF_BYTES),
+    )
+    # one git process for all staged files; lockfiles, notebooks, binaries and huge diffs are filtered out
+    contents = {}
+    for staged in git_handler.get_reviewable_changes(config_manager.get("review_changes_only", True)):
+        language = detect_language(staged.path)
+        logger.info(f"Reviewing {staged.path} for language: {language}")
+        contents[staged.path] = staged.diff
+    return contents
+
+def run_hook(config_manager, logger, run_async):
+    contents = collect_changes(config_manager, logger)
+    if not contents:
+        return 0
+
+    if run_async:
+        tree_sha = subprocess.check_output(['git', 'write-tree'], text=True).strip()
+        job_id = review_store(config_manager).enqueue(tree_sha, contents)
+        ensure_worker_running(os.path.join(state_dir(config_manager), "worker.pid"), worker_command())
+        logger.info(f"Queued review job {job_id} for tree {tree_sha}")
+        print("Code review queued, see it with: python -m askharrison.codeReview.main show <commit>")
+        return 0
+
+    reviewer = build_reviewer(config_manager)
+    if not reviewer.get_comprehensive_prompt():
         logger.error("Could not generate a comprehensive prompt for review.")
-        return
+        return 0
 
-    for file_path in staged_files:
-        language = detect_language(file_path)
-        logger.info(f"Reviewing {file_path} for language: {language}")
-        content = git_handler.get_file_changes(file_path, config_manager.get("review_changes_only", True))
-        review_result = reviewer.review_code(content, generated_prompt)
+    for file_path, review_result in reviewer.review_contents(contents).items():
         if review_result:
             logger.info(f"Review for {file_path}: {review_result}")
         else:
             logger.error(f"Failed to review {file_path}")
+    return 0
+
+def run_worker(config_manager, logger):
+    worker = ReviewWorker(review_store(config_manager), build_reviewer(config_manager),
+                          max_jobs=config_manager.get("max_jobs", 2), review_logger=logger)
+    install_signal_handlers(worker)
+    worker.run_forever()
+    return 0
+
+def show_review(config_manager, commit, check):
+    try:
+        tree_sha = subprocess.check_output(['git', 'rev-parse', '--verify', '--quiet', f'{commit}^{{tree}}'],
+                                           text=True).strip()
+    except subprocess.CalledProcessError:
+        print(f"Unknown commit: {commit}", file=sys.stderr)
+        return 1
+    job = review_store(config_manager).get_job(tree_sha)
+    if job is None:
+        print(f"No review found for {commit}")
+        return 1 if check else 0
+    print(f"Review of {commit} (tree {tree_sha}): {job['status']}" + (f" - {job['error']}" if job['error'] else ""))
+    for file_path, review in job["reviews"].items():
+        print(f"\n=== {file_path}\n{review if review is not None else '(failed)'}")
+    return 0 if job["status"] == "done" or not check else 1
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LLM code review for staged changes")
+    subparsers = parser.add_subparsers(dest="command")
+    hook_parser = subparsers.add_parser("hook", help="review staged changes (default)")
+    hook_parser.add_argument("--async", dest="run_async", action="store_true", default=None,
+                             help="enqueue the review for the background worker and return")
+    subparsers.add_parser("worker", help="process queued reviews")
+    show_parser = subparsers.add_parser("show", help="print the stored review of a commit")
+    show_parser.add_argument("commit", nargs="?", default="HEAD")
+    show_parser.add_argument("--check", action="store_true", help="exit 1 unless the review is done")
+    args = parser.parse_args(argv)
+
+    config_manager = load_config()
+    logger = Logger(__name__)
+    if args.command == "worker":
+        return run_worker(config_manager, logger)
+    if args.command == "show":
+        return show_review(config_manager, args.commit, args.check)
+    run_async = getattr(args, "run_async", None)
+    if run_async is None:
+        run_async = config_manager.get("review_mode", "sync") == "async"
+    return run_hook(config_manager, logger, run_async)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Optional
+
+
+def hash_text(*parts: Any) -> str:
+    """stable sha256 of the JSON encoding of parts"""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ReviewCache:
+    """
+    On-disk cache of the code review hook.
+
+    - comprehensive prompts, keyed by the hash of the config they were generated from,
+      so the prompt-generation LLM call only happens when the config changes
+    - review results, keyed by (diff hash, prompt hash), so re-running the hook after
+      amending a commit doesn't re-review files whose staged diff is unchanged
+
+    Example usage:
+        cache = ReviewCache(".git/askharrison-review-cache")
+        prompt = cache.get_prompt(config_hash)
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(os.path.join(cache_dir, "prompts"), exist_ok=True)
+        os.makedirs(os.path.join(cache_dir, "reviews"), exist_ok=True)
+
+    def _read(self, path: str) -> Optional[str]:
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, path: str, text: str):
+        # concurrent reviewers may write the same entry, rename keeps every read whole
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(tmp_path, path)
+
+    def _prompt_path(self, config_hash: str) -> str:
+        return os.path.join(self.cache_dir, "prompts", f"{config_hash}.txt")
+
+    def _review_path(self, diff_hash: str, prompt_hash: str) -> str:
+        return os.path.join(self.cache_dir, "reviews", f"{diff_hash[:32]}-{prompt_hash[:32]}.json")
+
+    def get_prompt(self, config_hash: str) -> Optional[str]:
+        return self._read(self._prompt_path(config_hash))
+
+    def set_prompt(self, config_hash: str, prompt: str):
+        self._write(self._prompt_path(config_hash), prompt)
+
+    def get_review(self, diff_hash: str, prompt_hash: str) -> Optional[str]:
+        cached = self._read(self._review_path(diff_hash, prompt_hash))
+        return json.loads(cached)["review"] if cached is not None else None
+
+    def set_review(self, diff_hash: str, prompt_hash: str, review: str):
+        self._write(self._review_path(diff_hash, prompt_hash), json.dumps({"review": review}))
@@ -0,0 +1,287 @@
+"""
+Background review mode: the pre-commit hook enqueues a job and returns, a local worker
+daemon reviews queued jobs concurrently and stores the results.
+
+Jobs are keyed by the staged tree SHA (`git write-tree`), since the commit doesn't exist
+yet while the pre-commit hook runs; a commit's review is found through `<commit>^{tree}`.
+A running job records its worker's pid and a heartbeat, so only the jobs of a worker that
+died (or stopped heartbeating) are queued again.
+
+Example usage:
+    store = ReviewStore(".git/askharrison-review/reviews.db")
+    job_id = store.enqueue(tree_sha, {"app.py": diff})
+    ReviewWorker(store, reviewer).run_forever()
+    store.get_job(tree_sha)["reviews"]
+"""
+import json
+import logging
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # not on Windows, the pid file is then checked without a lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE_SECONDS = 300.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tree_sha TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    diffs TEXT NOT NULL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    worker_pid INTEGER,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_tree ON jobs (tree_sha, id);
+CREATE TABLE IF NOT EXISTS reviews (
+    job_id INTEGER NOT NULL REFERENCES jobs (id),
+    file_path TEXT NOT NULL,
+    review TEXT,
+    PRIMARY KEY (job_id, file_path)
+);
+"""
+
+
+class ReviewStore:
+    """SQLite queue of review jobs and their per-file results, safe across processes"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+            # stores created before jobs had an owner
+            columns = {row["name"] for row in connection.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in (("worker_pid", "INTEGER"), ("heartbeat_at", "REAL")):
+                if column not in columns:
+                    connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # autocommit mode, transactions are explicit BEGIN IMMEDIATE ... COMMIT;
+        # closing the connection rolls back a transaction interrupted by an error
+        connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def enqueue(self, tree_sha: str, diffs: Dict[str, str]) -> int:
+        """queue a review of diffs, reusing a queued, running or done job of the same tree"""
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            existing = connection.execute(
+                "SELECT id FROM jobs WHERE tree_sha = ? AND status != 'failed' ORDER BY id DESC LIMIT 1",
+                (tree_sha,)).fetchone()
+            if existing:
+                connection.execute("COMMIT")
+                return existing["id"]
+            cursor = connection.execute("INSERT INTO jobs (tree_sha, diffs, created_at) VALUES (?, ?, ?)",
+                                        (tree_sha, json.dumps(diffs), time.time()))
+            connection.execute("COMMIT")
+            return cursor.lastrowid
+
+    def claim_next(self, worker_pid: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """atomically move the oldest queued job to running, owned by worker_pid (this process), and return it"""
+        worker_pid = os.getpid() if worker_pid is None else worker_pid
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute("SELECT * FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1").fetchone()
+            if row is None:
+                connection.execute("COMMIT")
+                return None
+            now = time.time()
+            connection.execute("UPDATE jobs SET status = 'running', started_at = ?, worker_pid = ?, heartbeat_at = ? "
+                               "WHERE id = ?", (now, worker_pid, now, row["id"]))
+            connection.execute("COMMIT")
+        job = dict(row)
+        job["diffs"] = json.loads(job["diffs"])
+        return job
+
+    def heartbeat(self, job_ids: Iterable[int]):
+        """renew the lease of running jobs"""
+        with self._connect() as connection:
+            connection.executemany("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running'",
+                                   [(time.time(), job_id) for job_id in job_ids])
+
+    def requeue_running(self, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> int:
+        """
+        put running jobs whose worker is gone back in the queue: its process is dead, or it
+        hasn't renewed the job's heartbeat for lease_seconds (hung, or its pid was reused)
+        """
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            rows = connection.execute(
+                "SELECT id, worker_pid, heartbeat_at FROM jobs WHERE status = 'running'").fetchall()
+            stale_before = time.time() - lease_seconds
+            orphaned = [(row["id"],) for row in rows
+                        if row["worker_pid"] is None or not pid_is_alive(row["worker_pid"])
+                        or (row["heartbeat_at"] or 0) < stale_before]
+            connection.executemany("UPDATE jobs SET status = 'queued', worker_pid = NULL WHERE id = ?", orphaned)
+            connection.execute("COMMIT")
+        return len(orphaned)
+
+    def complete(self, job_id: int, reviews: Dict[str, Optional[str]]):
+        with self._connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany("INSERT OR REPLACE INTO reviews (job_id, file_path, review) VALUES (?, ?, ?)",
+                                   [(job_id, path, review) for path, review in reviews.items()])
+            status = "done" if all(review is not None for review in reviews.values()) else "failed"
+            error = None if status == "done" else "some files could not be reviewed"
+            connection.execute("UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                               (status, error, time.time(), job_id))
+            connection.execute("COMMIT")
+
+    def fail(self, job_id: int, error: str):
+        with self._connect() as connection:
+            connection.execute("UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                               (error, time.time(), job_id))
+
+    def get_job(self, tree_sha: str) -> Optional[Dict[str, Any]]:
+        """latest job of a tree with its reviews ({file path: review}), without the diffs"""
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT id, tree_sha, status, error, created_at, started_at, finished_at FROM jobs "
+                "WHERE tree_sha = ? ORDER BY id DESC LIMIT 1", (tree_sha,)).fetchone()
+            if row is None:
+                return None
+            job = dict(row)
+            job["reviews"] = {r["file_path"]: r["review"] for r in connection.execute(
+                "SELECT file_path, review FROM reviews WHERE job_id = ? ORDER BY file_path", (job["id"],))}
+        return job
+
+
+class ReviewWorker:
+    def __init__(self, store: ReviewStore, reviewer, max_jobs: int = 2, poll_interval: float = 1.0,
+                 idle_timeout: Optional[float] = 600.0, review_logger=None,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        """
+        :param store: queue to take jobs from
+        :param reviewer: CustomPromptReviewer, reviews the files of a job (itself concurrently)
+        :param max_jobs: jobs processed at the same time
+        :param poll_interval: seconds between queue polls when idle
+        :param idle_timeout: exit after this many idle seconds, None to run forever
+        :param review_logger: Logger receiving the reviews, like the synchronous hook (review_hook.log)
+        :param lease_seconds: running jobs without a heartbeat for this long are requeued by other workers;
+            heartbeats are sent every lease_seconds / 10
+        """
+        self.store = store
+        self.reviewer = reviewer
+        self.max_jobs = max_jobs
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.review_logger = review_logger
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+
+    def process(self, job: Dict[str, Any]):
+        try:
+            reviews = self.reviewer.review_contents(job["diffs"])
+            self.store.complete(job["id"], reviews)
+        except Exception as e:
+            logger.exception(f"Review job {job['id']} failed")
+            self.store.fail(job["id"], str(e))
+            return
+        if self.review_logger is not None:
+            for file_path, review in reviews.items():
+                if review:
+                    self.review_logger.info(f"Review for {file_path} (tree {job['tree_sha']}): {review}")
+                else:
+                    self.review_logger.error(f"Failed to review {file_path} (tree {job['tree_sha']})")
+
+    def stop(self):
+        self._stop.set()
+
+    def run_forever(self):
+        running = {}
+        idle_since = last_heartbeat = time.monotonic()
+        last_recovery = float("-inf")
+        with ThreadPoolExecutor(max_workers=self.max_jobs) as executor:
+            while not self._stop.is_set():
+                running = {future: job_id for future, job_id in running.items() if not future.done()}
+                if running and time.monotonic() - last_heartbeat > self.lease_seconds / 10:
+                    self.store.heartbeat(running.values())
+                    last_heartbeat = time.monotonic()
+                if time.monotonic() - last_recovery > self.lease_seconds:
+                    # on start and then every lease: only jobs whose worker is gone, another
+                    # live worker keeps its own
+                    self.store.requeue_running(self.lease_seconds)
+                    last_recovery = time.monotonic()
+                job = self.store.claim_next() if len(running) < self.max_jobs else None
+                if job is not None:
+                    running[executor.submit(self.process, job)] = job["id"]
+                    idle_since = time.monotonic()
+                    continue
+                if running:
+                    idle_since = time.monotonic()
+                elif self.idle_timeout is not None and time.monotonic() - idle_since > self.idle_timeout:
+                    break
+                self._stop.wait(self.poll_interval)
+
+
+def pid_is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except PermissionError:
+        return True  # alive, owned by another user
+    except OSError:
+        return False
+    return True
+
+
+def worker_is_running(pid_path: str) -> bool:
+    try:
+        with open(pid_path) as f:
+            return pid_is_alive(int(f.read().strip()))
+    except (OSError, ValueError):
+        return False
+
+
+def ensure_worker_running(pid_path: str, command) -> bool:
+    """
+    Start the worker daemon (command) detached from the hook's process group unless the
+    pid file points to a live process. Returns True when a worker was started.
+
+    The check and the start happen under an exclusive lock of the pid file, so hooks of
+    concurrent commits start a single worker.
+    """
+    with open(pid_path, "a+") as pid_file:
+        if fcntl is not None:
+            fcntl.flock(pid_file, fcntl.LOCK_EX)  # released when the file is closed
+        if worker_is_running(pid_path):
+            return False
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL, start_new_session=True)
+        pid_file.seek(0)
+        pid_file.truncate()
+        pid_file.write(str(process.pid))
+        pid_file.flush()
+    return True
+
+
+def install_signal_handlers(worker: ReviewWorker):
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: worker.stop())
+
+
+def worker_command():
+    return [sys.executable, "-m", "askharrison.codeReview.main", "worker"]
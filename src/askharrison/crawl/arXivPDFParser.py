@@ -1,10 +1,61 @@
 import fitz  # PyMuPDF
 import pandas as pd
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from askharrison.crawl.markdownParser import MarkdownParser
+from askharrison.crawl.pdfHeadingClassifier import FontStatsHeadingClassifier
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+# "2 ", "3.1 ", "A.2 ", "B. ": a line starting like this opens a new numbered heading
+SECTION_NUMBER_PATTERN = re.compile(r'^\s*(\d+(\.\d+)*\.?|[A-Z](\.\d+)+\.?|[A-Z]\.)\s')
+# text only "dict" extraction, image blocks (and their bytes) are never materialized
+TEXT_ONLY_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+
+def extract_page_lines(filepath: str, start_page: int, end_page: int) -> List[List[List[Tuple[str, float, int]]]]:
+    """
+    Extract the text lines of pages [start_page, end_page), each line being a list
+    of (text, font size, font flags) spans.
+
+    Runs in worker processes: the document is reopened per call because PyMuPDF
+    documents can't be shared across processes. Returns one line list per page.
+    """
+    return extract_pages_lines(filepath, range(start_page, end_page))
+
+
+def extract_pages_lines(filepath: str, page_nums: Sequence[int]) -> List[List[List[Tuple[str, float, int]]]]:
+    """same as extract_page_lines, for the pages page_nums"""
+    pages = []
+    with fitz.open(filepath) as document:
+        for page_num in page_nums:
+            page_lines = []
+            blocks = document[page_num].get_text("dict", flags=TEXT_ONLY_FLAGS)["blocks"]
+            for b in blocks:
+                for line in b.get('lines', []):
+                    page_lines.append([(span['text'], span['size'], span['flags']) for span in line['spans']])
+            pages.append(page_lines)
+    return pages
+
 
 class ArXivPDFParser:
-    def __init__(self, filepath):
+    def __init__(self, filepath, max_workers: Optional[int] = None, pages_per_worker: int = 8,
+                 heading_classifier: Optional[FontStatsHeadingClassifier] = None, font_sample_pages: int = 16):
+        """
+        :param filepath: path of the PDF
+        :param max_workers: processes used to extract page ranges, defaults to the CPU count
+        :param pages_per_worker: pages per task; documents with fewer pages are parsed in-process
+        :param heading_classifier: detects headings from font statistics, fitted on this document
+        :param font_sample_pages: pages, spread over the document, the heading classifier is fitted on;
+            shorter documents are fitted on all pages
+        """
         self.filepath = filepath
+        self.heading_classifier = heading_classifier or FontStatsHeadingClassifier()
+        self.max_workers = max_workers
+        self.pages_per_worker = pages_per_worker
+        self.font_sample_pages = font_sample_pages
         self.document = fitz.open(filepath)
         self.metadata = self.extract_metadata()
         self.content = []
@@ -19,7 +70,7 @@ class ArXivPDFParser:
             'author': metadata.get('author', ''),
             'creationDate': metadata.get('creationDate', ''),
         }
-    
+
     def extract_text(self):
         # Extracts text from each page
         for page in self.document:
@@ -32,49 +83,158 @@ class ArXivPDFParser:
                 # Store image info and the page it's found on
                 self.figures.append({'page': page_num, 'image': img})
 
-    def extract_sections(self):
-        # Initialize a dictionary to hold the sections
-        sections = {}
-        current_section = "Introduction"  # The first section is often the Introduction
+    def iter_page_lines(self, sample_pages: Sequence[int] = (),
+                        on_sample: Optional[Callable[[List], None]] = None) -> Iterator[List[List[Tuple[str, float, int]]]]:
+        """
+        Yield the text lines of each page in order.
 
-        for page in self.document:
-            blocks = page.get_text("dict")["blocks"]
-
-            for b in blocks:  # iterate through the text blocks
-                if 'lines' in b:  # text blocks only
-                    for line in b['lines']:
-                        for span in line['spans']:  # check each text span within the line
-                            if span['flags'] & 16 or span['size'] > 13:  # heuristic for bold text or font size indicative of a title
-                                current_section = span['text'].strip()
-                                sections[current_section] = ""
-                            else:
-                                sections[current_section] += span['text'] + ' '
+        Page ranges are extracted in a process pool; results are yielded as soon as
+        the next range in page order is done, so consumers start before the whole
+        document is processed.
+
+        :param sample_pages: sorted page indexes extracted ahead of the others, in the same pool;
+            on_sample is called with their lines (one line list per sample page) before the first
+            page is yielded. Every page is still extracted once.
+        """
+        page_count = self.document.page_count
+        ranges = [(start, min(start + self.pages_per_worker, page_count))
+                  for start in range(0, page_count, self.pages_per_worker)]
+        if len(ranges) <= 1:
+            pages = [page for start, end in ranges for page in extract_page_lines(self.filepath, start, end)]
+            if on_sample is not None:
+                on_sample([pages[page_num] for page_num in sample_pages])
+            yield from pages
+            return
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            # sample pages are queued first, split over the workers
+            group_size = -(-len(sample_pages) // (self.max_workers or os.cpu_count() or 1)) or 1
+            sample_groups = [list(sample_pages[i:i + group_size]) for i in range(0, len(sample_pages), group_size)]
+            sample_futures = [executor.submit(extract_pages_lines, self.filepath, group) for group in sample_groups]
+            sampled = set(sample_pages)
+            range_pages = [[page_num for page_num in range(start, end) if page_num not in sampled]
+                           for start, end in ranges]
+            range_futures = [executor.submit(extract_pages_lines, self.filepath, pages) if pages else None
+                             for pages in range_pages]
 
+            sample_lines = {}
+            for group, future in zip(sample_groups, sample_futures):
+                sample_lines.update(zip(group, future.result()))
+            if on_sample is not None:
+                on_sample([sample_lines[page_num] for page_num in sample_pages])
+            for (start, end), pages, future in zip(ranges, range_pages, range_futures):
+                extracted = dict(zip(pages, future.result())) if future is not None else {}
+                for page_num in range(start, end):
+                    yield sample_lines.pop(page_num) if page_num in sample_lines else extracted[page_num]
+
+    def _iter_classified_lines(self) -> Iterator[Tuple[List[Tuple[str, float, int]], Optional[int], int]]:
+        """
+        Yield (line, heading level or None, page index) in document order.
+
+        The heading classifier is fitted on font_sample_pages pages spread over the document,
+        extracted first by iter_page_lines' process pool, then the pages are classified as it
+        streams them. Documents of at most font_sample_pages pages are fitted on all of their pages.
+        """
+        page_count = self.document.page_count
+        step = (page_count - 1) / max(self.font_sample_pages - 1, 1)
+        sample = (range(page_count) if page_count <= self.font_sample_pages
+                  else sorted({round(i * step) for i in range(self.font_sample_pages)}))
+
+        def fit(sample_lines):
+            self.heading_classifier.fit([line for page_lines in sample_lines for line in page_lines])
+
+        for page_num, page_lines in enumerate(self.iter_page_lines(sample, on_sample=fit)):
+            for line, level in zip(page_lines, self.heading_classifier.classify(page_lines)):
+                yield line, level, page_num
+
+    def iter_leveled_sections(self) -> Iterator[Tuple[str, int, str]]:
+        """
+        Yield (section name, heading level, section text) in document order, streaming
+        while the pages are extracted.
+
+        A heading line directly followed by a line of the same heading level on the same
+        page, e.g. a title wrapped over two lines, is merged with it, unless that line
+        starts with a section number ("2 Method" after "1 Introduction" is a new heading).
+        Text before the first heading is yielded as "Introduction" at level 1.
+        """
+        current_section, current_level = "Introduction", 1  # The first section is often the Introduction
+        text_parts = []
+        heading_parts, heading_level, heading_page = [], None, None
+        for line, level, page_num in self._iter_classified_lines():
+            line_text = ''.join(span[0] for span in line)
+            if (level is not None and level == heading_level and page_num == heading_page
+                    and not SECTION_NUMBER_PATTERN.match(line_text)):
+                heading_parts.append(line_text)
+                continue
+            if heading_parts:
+                # the pending heading is complete, it starts the next section
+                yield current_section, current_level, self._clean_text(text_parts)
+                current_section, current_level = self._clean_text(heading_parts), heading_level
+                text_parts, heading_parts, heading_level = [], [], None
+            if level is not None:
+                heading_parts, heading_level, heading_page = [line_text], level, page_num
+            else:
+                text_parts.append(line_text)
+        if heading_parts:
+            yield current_section, current_level, self._clean_text(text_parts)
+            current_section, current_level, text_parts = self._clean_text(heading_parts), heading_level, []
+        yield current_section, current_level, self._clean_text(text_parts)
+
+    def iter_sections(self) -> Iterator[Tuple[str, str]]:
+        """Stream (section name, section text) pairs in document order"""
+        for section, _, text in self.iter_leveled_sections():
+            yield section, text
+
+    def to_markdown_parser(self) -> MarkdownParser:
+        """
+        Build the section tree as a MarkdownParser, so PDF sections can be used
+        wherever markdown sections are (digests, diffs, CompactDocument...).
+        """
+        parser = MarkdownParser()
+        header_stack = []
+        for index, (name, level, text) in enumerate(self.iter_leveled_sections()):
+            if index == 0 and not text:
+                continue
+            while header_stack and header_stack[-1].level >= level:
+                header_stack.pop()
+            section = parser.add_section(name, level, header_stack[-1] if header_stack else None)
+            section.text = text
+            header_stack.append(section)
+        parser.link_sections()
+        return parser
+
+    @staticmethod
+    def _clean_text(text_parts: List[str]) -> str:
         # Clean up any space and newline characters
-        for section, text in sections.items():
-            sections[section] = re.sub('\s+', ' ', text).strip()
+        return WHITESPACE_PATTERN.sub(' ', ' '.join(text_parts)).strip()
 
+    def extract_sections(self):
+        # a repeated heading keeps its last occurrence, as before
+        sections = {}
+        for index, (section, text) in enumerate(self.iter_sections()):
+            if index == 0 and not text:
+                # nothing before the first heading
+                continue
+            sections[section] = text
         self.sections = sections
 
     def extract_tables(self):
         # Placeholder for table extraction logic
+        # We assume that tables are also presented as images. Only the xref (the
+        # reference number of the image) is kept, bytes are loaded on request
+        # with get_image_bytes.
         for page_num, page in enumerate(self.document, start=1):
             for image in page.get_images(full=True):
-                # We assume that tables are also presented as images
-                xref = image[0]  # xref is the reference number for the image
-                base_image = self.document.extract_image(xref)
-                image_bytes = base_image["image"]
-
-                # Here you would have the image bytes of what is likely a table
-                # You could use additional image processing to convert this to data
-                # For this example, we'll just keep the bytes
                 self.tables.append({
                     'page': page_num,
-                    'image_bytes': image_bytes,
-                    # 'data': ... # Some function to convert image_bytes to data
+                    'xref': image[0],
+                    # 'data': ... # Some function to convert image bytes to data
                 })
 
+    def get_image_bytes(self, xref: int) -> bytes:
+        """load the bytes of an embedded image, e.g. get_image_bytes(parser.tables[0]['xref'])"""
+        return self.document.extract_image(xref)["image"]
+
     def parse(self):
         self.extract_sections()
         #self.extract_tables()
-
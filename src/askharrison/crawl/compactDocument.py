@@ -0,0 +1,151 @@
+import json
+from array import array
+from typing import Any, Dict, List, Optional
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, JSON serialization always works
+    msgpack = None
+
+
+class CompactDocument:
+    """
+    Struct-of-arrays representation of a parsed section tree.
+
+    Instead of one object (plus __dict__ and linked-list pointers) per section and content,
+    a document is stored as a handful of flat arrays indexed by section position:
+        - names, levels, parents (-1 for top level sections)
+        - one UTF-8 text buffer with per-section byte offsets, so section text can be
+          sliced without copying through section_text_view
+        - contents grouped by section, with per-section offsets into the content lists
+    It serializes to JSON or msgpack without walking object references.
+
+    Example usage:
+        parser = MarkdownParser()
+        parser.parse_markdown_str(text)
+        document = CompactDocument.from_parser(parser)
+        del parser
+
+        document.section_text(3)
+        payload = document.to_msgpack()
+        document = CompactDocument.from_msgpack(payload)
+    """
+
+    def __init__(self, names: List[str], levels: array, parents: array, text_buffer: bytes,
+                 text_offsets: array, content_offsets: array, content_types: List[str],
+                 content_values: List[Any]):
+        self.names = names
+        self.levels = levels
+        self.parents = parents
+        self.text_buffer = text_buffer
+        self.text_offsets = text_offsets
+        self.content_offsets = content_offsets
+        self.content_types = content_types
+        self.content_values = content_values
+
+    @classmethod
+    def from_sections(cls, sections) -> 'CompactDocument':
+        """build from Section/HTMLSection objects, e.g. MarkdownParser.sections"""
+        position = {id(section): i for i, section in enumerate(sections)}
+        names, levels, parents = [], array('b'), array('i')
+        text_parts, text_offsets = [], array('q', [0])
+        content_offsets, content_types, content_values = array('q', [0]), [], []
+        text_length = 0
+        for section in sections:
+            names.append(section.name)
+            levels.append(section.level)
+            parent = section.parent_section
+            parents.append(position.get(id(parent), -1) if parent is not None else -1)
+
+            encoded_text = section.text.encode('utf-8')
+            text_parts.append(encoded_text)
+            text_length += len(encoded_text)
+            text_offsets.append(text_length)
+
+            for content in section.contents:
+                content_types.append(content.type)
+                content_values.append(content.content)
+            content_offsets.append(len(content_types))
+        return cls(names, levels, parents, b''.join(text_parts), text_offsets,
+                   content_offsets, content_types, content_values)
+
+    @classmethod
+    def from_parser(cls, parser) -> 'CompactDocument':
+        """build from a MarkdownParser or HTMLParserExtended after parsing"""
+        return cls.from_sections(parser.sections)
+
+    def __len__(self):
+        return len(self.names)
+
+    def section_text(self, index: int) -> str:
+        return self.text_buffer[self.text_offsets[index]:self.text_offsets[index + 1]].decode('utf-8')
+
+    def section_text_view(self, index: int) -> memoryview:
+        """zero-copy view of a section's UTF-8 encoded text"""
+        return memoryview(self.text_buffer)[self.text_offsets[index]:self.text_offsets[index + 1]]
+
+    def parent(self, index: int) -> Optional[int]:
+        parent = self.parents[index]
+        return None if parent < 0 else parent
+
+    def children(self, index: int) -> List[int]:
+        return [i for i, parent in enumerate(self.parents) if parent == index]
+
+    def contents(self, index: int) -> List[Dict[str, Any]]:
+        start, end = self.content_offsets[index], self.content_offsets[index + 1]
+        return [
+            {'type': self.content_types[i], 'content': self.content_values[i]}
+            for i in range(start, end)
+        ]
+
+    def section(self, index: int) -> Dict[str, Any]:
+        return {
+            'id': index,
+            'name': self.names[index],
+            'level': self.levels[index],
+            'parent_section': self.parent(index),
+            'text': self.section_text(index),
+            'contents': self.contents(index)
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'names': self.names,
+            'levels': self.levels.tolist(),
+            'parents': self.parents.tolist(),
+            'text': self.text_buffer.decode('utf-8'),
+            'text_offsets': self.text_offsets.tolist(),
+            'content_offsets': self.content_offsets.tolist(),
+            'content_types': self.content_types,
+            'content_values': self.content_values
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CompactDocument':
+        text_buffer = data['text']
+        if isinstance(text_buffer, str):
+            text_buffer = text_buffer.encode('utf-8')
+        return cls(data['names'], array('b', data['levels']), array('i', data['parents']),
+                   text_buffer, array('q', data['text_offsets']), array('q', data['content_offsets']),
+                   data['content_types'], data['content_values'])
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, payload: str) -> 'CompactDocument':
+        return cls.from_dict(json.loads(payload))
+
+    def to_msgpack(self) -> bytes:
+        if msgpack is None:
+            raise ImportError("msgpack is required for to_msgpack, install it with `pip install msgpack`")
+        data = self.to_dict()
+        # msgpack stores the text buffer as raw bytes, no re-encoding on load
+        data['text'] = self.text_buffer
+        return msgpack.packb(data, use_bin_type=True)
+
+    @classmethod
+    def from_msgpack(cls, payload: bytes) -> 'CompactDocument':
+        if msgpack is None:
+            raise ImportError("msgpack is required for from_msgpack, install it with `pip install msgpack`")
+        return cls.from_dict(msgpack.unpackb(payload, raw=False))
@@ -0,0 +1,212 @@
+"""
+Deduplication of crawled pages before storage and LLM processing.
+
+Three stages, cheapest first:
+    1. boilerplate blocks: lines (or list items) repeated on a large share of the pages
+       of a host, e.g. sidebars, navigation and footers, are removed from every page
+       and kept once in DedupResult.boilerplate
+    2. exact duplicates: pages whose normalized remaining text has the same hash
+    3. near duplicates: MinHash signatures over word shingles, bucketed with LSH bands,
+       candidate pairs confirmed on the estimated Jaccard similarity
+
+Duplicates are collapsed onto the first page seen (the canonical page).
+
+Example usage:
+    result = ContentDeduplicator(threshold=0.85).deduplicate(url_to_text)
+    result.pages        # {canonical url: text without boilerplate}
+    result.duplicates   # {duplicate url: canonical url}
+"""
+import hashlib
+import re
+import zlib
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlsplit
+
+import numpy as np
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+WORD_PATTERN = re.compile(r'\w+')
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+# a page is its text, or a list of text blocks (e.g. SidebarCrawler content)
+PageContent = Union[str, Sequence[str]]
+
+
+def normalize_block(text: str) -> str:
+    return WHITESPACE_PATTERN.sub(' ', text).strip().lower()
+
+
+def content_hash(text: str) -> str:
+    """hash of text ignoring case and whitespace differences"""
+    return hashlib.sha256(normalize_block(text).encode('utf-8')).hexdigest()
+
+
+def split_blocks(page: PageContent) -> List[str]:
+    """non-empty lines of a text, or the non-empty blocks of a block list"""
+    blocks = page.splitlines() if isinstance(page, str) else page
+    return [block for block in blocks if block.strip()]
+
+
+class MinHasher:
+    """MinHash signatures of word shingles, vectorized over a document's shingles"""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        generator = np.random.RandomState(seed)
+        # (a * x + b) mod p permutations with p = 2**61 - 1, a, b and x are < 2**32
+        self.a = generator.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = generator.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> np.ndarray:
+        words = WORD_PATTERN.findall(text.lower())
+        size = min(self.shingle_size, len(words)) or 1
+        shingles = {' '.join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+        return np.array([zlib.crc32(s.encode('utf-8')) for s in shingles], dtype=np.uint64) & MAX_HASH
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = self.shingles(text) & MAX_HASH
+        # a * x < 2**64 fits in uint64 but adding b may not, so reduce before the addition:
+        # (a * x) mod p + b < 2**61 + 2**32
+        products = np.outer(hashes, self.a & MAX_HASH) % MERSENNE_PRIME
+        permuted = (products + (self.b & MAX_HASH)) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0)
+
+    @staticmethod
+    def similarity(signature: np.ndarray, other: np.ndarray) -> float:
+        """estimated Jaccard similarity of the shingle sets"""
+        return float(np.mean(signature == other))
+
+
+@dataclass
+class DedupResult:
+    pages: Dict[str, PageContent] = field(default_factory=dict)
+    duplicates: Dict[str, str] = field(default_factory=dict)
+    boilerplate: Dict[str, List[str]] = field(default_factory=dict)
+    chars_before: int = 0
+    chars_after: int = 0
+
+    @property
+    def saved_ratio(self) -> float:
+        return 1 - self.chars_after / self.chars_before if self.chars_before else 0.0
+
+
+class ContentDeduplicator:
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, bands: int = 32,
+                 shingle_size: int = 5, boilerplate_ratio: float = 0.5, min_boilerplate_pages: int = 3):
+        """
+        :param threshold: estimated Jaccard similarity above which pages are near duplicates
+        :param num_perm: MinHash signature length, must be divisible by bands
+        :param bands: LSH bands; more bands find less similar candidate pairs
+        :param shingle_size: words per shingle
+        :param boilerplate_ratio: blocks on more than this share of a host's pages are boilerplate
+        :param min_boilerplate_pages: hosts with fewer pages get no boilerplate removal
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.boilerplate_ratio = boilerplate_ratio
+        self.min_boilerplate_pages = min_boilerplate_pages
+        self.min_hasher = MinHasher(num_perm, shingle_size)
+
+    def find_boilerplate(self, pages: Dict[str, PageContent]) -> Dict[str, Dict[str, str]]:
+        """per host: normalized block -> original text, for blocks repeated on most pages"""
+        host_block_counts = defaultdict(Counter)
+        host_page_counts = Counter()
+        block_texts = {}
+        for url, page in pages.items():
+            host = urlsplit(url).netloc
+            host_page_counts[host] += 1
+            page_blocks = set()
+            for block in split_blocks(page):
+                normalized = normalize_block(block)
+                block_texts.setdefault(normalized, block.strip())
+                page_blocks.add(normalized)
+            host_block_counts[host].update(page_blocks)
+
+        boilerplate = {}
+        for host, page_count in host_page_counts.items():
+            if page_count < self.min_boilerplate_pages:
+                continue
+            min_pages = max(2, page_count * self.boilerplate_ratio)
+            blocks = {block: block_texts[block] for block, count in host_block_counts[host].items()
+                      if count > min_pages}
+            if blocks:
+                boilerplate[host] = blocks
+        return boilerplate
+
+    @staticmethod
+    def _strip_blocks(page: PageContent, blocks: Dict[str, str]) -> PageContent:
+        kept = [block for block in split_blocks(page) if normalize_block(block) not in blocks]
+        return '\n'.join(kept) if isinstance(page, str) else kept
+
+    def _band_keys(self, signature: np.ndarray) -> Iterable[bytes]:
+        for band_index, band in enumerate(np.split(signature, self.bands)):
+            yield band_index.to_bytes(2, 'little') + band.tobytes()
+
+    def iter_deduplicate(self, pages: Iterable[Tuple[str, PageContent]], result: Optional[DedupResult] = None,
+                         boilerplate_sample: int = 50) -> Iterator[Tuple[str, PageContent]]:
+        """
+        Streaming deduplication: yield (url, page without boilerplate) for each canonical page
+        as soon as it is known not to be a duplicate.
+
+        Boilerplate is learned from the first boilerplate_sample pages, which are buffered;
+        after that only the MinHash signatures of canonical pages are kept in memory.
+
+        :param pages: (url, page text or list of text blocks) in crawl order
+        :param result: filled with duplicates, boilerplate and character counts (pages stays empty)
+        :param boilerplate_sample: pages buffered to learn the boilerplate blocks
+        """
+        result = result if result is not None else DedupResult()
+        pages = iter(pages)
+        sample = dict(islice(pages, boilerplate_sample))
+        boilerplate = self.find_boilerplate(sample)
+        result.boilerplate = {host: list(blocks.values()) for host, blocks in boilerplate.items()}
+
+        canonical_by_hash = {}
+        signatures, page_order = {}, {}
+        lsh_buckets = defaultdict(list)
+        for url, page in chain(sample.items(), pages):
+            result.chars_before += sum(len(block) for block in split_blocks(page))
+            host_boilerplate = boilerplate.get(urlsplit(url).netloc)
+            if host_boilerplate:
+                page = self._strip_blocks(page, host_boilerplate)
+            text = '\n'.join(split_blocks(page))
+
+            digest = content_hash(text)
+            if digest in canonical_by_hash:
+                result.duplicates[url] = canonical_by_hash[digest]
+                continue
+
+            signature = self.min_hasher.signature(text)
+            band_keys = list(self._band_keys(signature))
+            candidates = {candidate for key in band_keys for candidate in lsh_buckets[key]}
+            # the earliest similar page becomes canonical
+            canonical = next((candidate for candidate in sorted(candidates, key=page_order.get)
+                              if self.min_hasher.similarity(signature, signatures[candidate]) >= self.threshold),
+                             None)
+            if canonical is not None:
+                result.duplicates[url] = canonical
+                continue
+
+            canonical_by_hash[digest] = url
+            signatures[url] = signature
+            page_order[url] = len(page_order)
+            for key in band_keys:
+                lsh_buckets[key].append(url)
+            result.chars_after += len(text)
+            yield url, page
+
+    def deduplicate(self, pages: Dict[str, PageContent]) -> DedupResult:
+        """
+        :param pages: url -> page text or list of text blocks, in crawl order
+        """
+        result = DedupResult()
+        for url, page in self.iter_deduplicate(pages.items(), result, boilerplate_sample=len(pages)):
+            result.pages[url] = page
+        return result
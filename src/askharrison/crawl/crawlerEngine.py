@@ -0,0 +1,367 @@
+"""
+Concurrent, polite crawler engine.
+
+Pages are fetched by a bounded thread pool with:
+    - per-host concurrency limits and a minimum delay between requests to the same host
+    - a robots.txt cache (one fetch per host)
+    - a frontier of normalized URLs with max-depth and max-pages budgets
+    - conditional GETs (ETag / Last-Modified), so unchanged pages cost a 304 on re-crawls;
+      a 304 result carries the links and data parsed on the previous crawl
+
+Example usage:
+    engine = CrawlerEngine(max_workers=8, max_depth=3, max_pages=2000,
+                           validator_cache_path='crawl_validators.json')
+    for result in engine.crawl('https://docs.trychroma.com/'):
+        if result.ok and not result.not_modified:
+            save(result.url, result.content)
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib import robotparser
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+import lxml.html
+import requests
+
+try:
+    from askharrison.telemetry import span
+except ImportError:  # the telemetry module lives in the root askharrison package, crawl untraced without it
+    class _UntracedSpan:
+        def set(self, **attributes):
+            pass
+
+    @contextmanager
+    def span(name: str, **attributes):
+        yield _UntracedSpan()
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = "askharrison-crawler/0.1"
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# parse_page(url, content) -> (data, links to follow)
+PageParser = Callable[[str, bytes], Tuple[Any, List[str]]]
+
+
+def normalize_url(url: str, base_url: Optional[str] = None) -> Optional[str]:
+    """
+    Resolve url against base_url and normalize it so the same page is only crawled once:
+    lowercase scheme and host, no default port, no fragment, sorted query parameters,
+    '/' for an empty path. Returns None for non-http(s) URLs (mailto:, javascript:...).
+    """
+    if base_url:
+        url = urljoin(base_url, url)
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+    netloc = parts.hostname.lower()
+    if parts.port and parts.port != DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+def extract_links(url: str, content: bytes) -> Tuple[None, List[str]]:
+    """default page parser: follow every <a href> of the page"""
+    try:
+        document = lxml.html.fromstring(content)
+    except (lxml.etree.ParserError, ValueError):
+        return None, []
+    return None, [urljoin(url, href) for href in document.xpath("//a/@href")]
+
+
+@dataclass
+class CrawlResult:
+    url: str
+    depth: int
+    status_code: Optional[int] = None
+    content: Optional[bytes] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    data: Any = None
+    links: List[str] = field(default_factory=list)
+    not_modified: bool = False
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status_code is not None and self.status_code < 400
+
+
+class RobotsCache:
+    """robots.txt rules per host, fetched once per host and shared by all workers"""
+
+    def __init__(self, user_agent: str, timeout: float):
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self._parsers: Dict[str, Optional[robotparser.RobotFileParser]] = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, session: requests.Session, origin: str) -> Optional[robotparser.RobotFileParser]:
+        try:
+            response = session.get(f"{origin}/robots.txt", timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.warning(f"Could not fetch robots.txt for {origin}: {e}")
+            return None
+        if response.status_code >= 400:
+            return None
+        parser = robotparser.RobotFileParser()
+        parser.parse(response.text.splitlines())
+        return parser
+
+    def allowed(self, session: requests.Session, url: str) -> bool:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            if origin not in self._parsers:
+                self._parsers[origin] = self._fetch(session, origin)
+            parser = self._parsers[origin]
+        return parser is None or parser.can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, url: str) -> Optional[float]:
+        parts = urlsplit(url)
+        parser = self._parsers.get(f"{parts.scheme}://{parts.netloc}")
+        delay = parser.crawl_delay(self.user_agent) if parser else None
+        return float(delay) if delay is not None else None
+
+
+class HostLimiter:
+    """bounds in-flight requests per host and spaces requests to a host by min_delay seconds"""
+
+    def __init__(self, per_host_concurrency: int, min_delay: float):
+        self.per_host_concurrency = per_host_concurrency
+        self.min_delay = min_delay
+        self._semaphores: Dict[str, threading.Semaphore] = {}
+        self._next_request_time: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str, min_delay: Optional[float] = None):
+        with self._lock:
+            semaphore = self._semaphores.setdefault(host, threading.BoundedSemaphore(self.per_host_concurrency))
+        semaphore.acquire()
+        delay = max(self.min_delay, min_delay or 0.0)
+        with self._lock:
+            now = time.monotonic()
+            request_time = max(now, self._next_request_time.get(host, now))
+            self._next_request_time[host] = request_time + delay
+        if request_time > now:
+            time.sleep(request_time - now)
+
+    def release(self, host: str):
+        self._semaphores[host].release()
+
+
+class ValidatorCache:
+    """
+    ETag / Last-Modified validators, outgoing links and parsed data of crawled pages,
+    optionally persisted as JSON, so a re-crawl sends conditional GETs and still has the
+    links and data of pages that answer 304 Not Modified. Data that can't be stored as
+    JSON is only kept in memory when the cache is persisted.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self._entries = json.load(f)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._entries.get(url)
+
+    def update(self, url: str, headers, links: List[str], data: Any = None):
+        etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+        entry = {"etag": etag, "last_modified": last_modified, "links": links}
+        if data is not None:
+            if self.path:
+                try:
+                    json.dumps(data)
+                    entry["data"] = data
+                except (TypeError, ValueError):
+                    logger.debug(f"Data of {url} is not JSON serializable, not cached")
+            else:
+                entry["data"] = data
+        with self._lock:
+            self._entries[url] = entry
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+
+
+class CrawlerEngine:
+    def __init__(self,
+                 max_workers: int = 8,
+                 per_host_concurrency: int = 2,
+                 min_delay: float = 0.25,
+                 max_depth: int = 3,
+                 max_pages: int = 1000,
+                 timeout: float = 10.0,
+                 user_agent: str = DEFAULT_USER_AGENT,
+                 respect_robots: bool = True,
+                 same_host_only: bool = True,
+                 validator_cache_path: Optional[str] = None):
+        """
+        :param max_workers: threads fetching pages
+        :param per_host_concurrency: maximum in-flight requests to a single host
+        :param min_delay: minimum seconds between requests to the same host (robots.txt Crawl-delay wins if larger)
+        :param max_depth: links further than max_depth hops from the start URL are not followed
+        :param max_pages: maximum number of pages fetched per crawl
+        :param timeout: connect/read timeout of every request in seconds
+        :param user_agent: User-Agent header, also used to match robots.txt rules
+        :param respect_robots: skip URLs disallowed by robots.txt
+        :param same_host_only: only follow links on the start URL's host
+        :param validator_cache_path: JSON file keeping ETag/Last-Modified validators between crawls
+        """
+        self.max_workers = max_workers
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self.respect_robots = respect_robots
+        self.same_host_only = same_host_only
+        self.host_limiter = HostLimiter(per_host_concurrency, min_delay)
+        self.robots = RobotsCache(user_agent, timeout)
+        self.validators = ValidatorCache(validator_cache_path)
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._sessions_lock = threading.Lock()
+
+    def _session(self) -> requests.Session:
+        """one keep-alive session per worker thread, closed by close()"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers["User-Agent"] = self.user_agent
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.max_workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def close(self):
+        """close the sessions of all worker threads, crawl() does this when it finishes"""
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+            self._local = threading.local()
+        for session in sessions:
+            session.close()
+
+    def fetch(self, url: str, depth: int, parse_page: PageParser) -> CrawlResult:
+        """fetch one URL, honouring robots.txt, host limits and cached validators"""
+        result = CrawlResult(url=url, depth=depth)
+        session = self._session()
+        if self.respect_robots and not self.robots.allowed(session, url):
+            result.error = "disallowed by robots.txt"
+            return result
+
+        headers = {}
+        cached = self.validators.get(url)
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        host = urlsplit(url).netloc
+        self.host_limiter.acquire(host, self.robots.crawl_delay(url))
+        try:
+            with span("crawl_fetch", url=url, host=host) as current:
+                response = session.get(url, headers=headers, timeout=self.timeout)
+                current.set(status_code=response.status_code, bytes=len(response.content))
+        except requests.RequestException as e:
+            result.error = str(e)
+            return result
+        finally:
+            self.host_limiter.release(host)
+
+        result.status_code = response.status_code
+        result.headers = dict(response.headers)
+        if response.status_code == 304 and cached:
+            # unchanged: the links and data are those of the previous crawl
+            result.not_modified = True
+            result.links = cached.get("links", [])
+            result.data = cached.get("data")
+            return result
+        if response.status_code >= 400:
+            result.error = f"HTTP {response.status_code}"
+            return result
+
+        result.content = response.content
+        content_type = response.headers.get("Content-Type", "text/html")
+        if "html" in content_type:
+            try:
+                with span("crawl_parse", url=url):
+                    result.data, links = parse_page(url, result.content)
+            except Exception as e:
+                result.error = f"parse failed: {e}"
+                return result
+            result.links = [link for link in (normalize_url(link, url) for link in links) if link]
+        self.validators.update(url, response.headers, result.links, result.data)
+        return result
+
+    def _should_follow(self, url: str, start_host: str) -> bool:
+        return not self.same_host_only or urlsplit(url).netloc == start_host
+
+    def crawl(self, start_url: str, parse_page: Optional[PageParser] = None) -> Iterator[CrawlResult]:
+        """
+        Crawl from start_url, yielding a CrawlResult as soon as each page is done.
+
+        :param start_url: first URL of the frontier, depth 0
+        :param parse_page: (url, content) -> (data, links to follow), defaults to every <a href>
+        """
+        parse_page = parse_page or extract_links
+        start_url = normalize_url(start_url)
+        if start_url is None:
+            raise ValueError("start_url must be an http(s) URL")
+        start_host = urlsplit(start_url).netloc
+
+        frontier = deque([(start_url, 0)])
+        seen = {start_url}
+        pages_submitted = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                in_flight = set()
+                while frontier or in_flight:
+                    while frontier and len(in_flight) < self.max_workers * 2 and pages_submitted < self.max_pages:
+                        url, depth = frontier.popleft()
+                        in_flight.add(executor.submit(self.fetch, url, depth, parse_page))
+                        pages_submitted += 1
+                    if pages_submitted >= self.max_pages:
+                        frontier.clear()
+                    if not in_flight:
+                        break
+
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result = future.result()
+                        if result.error:
+                            logger.info(f"Skipped {result.url}: {result.error}")
+                        if result.depth < self.max_depth:
+                            for link in result.links:
+                                if link not in seen and self._should_follow(link, start_host):
+                                    seen.add(link)
+                                    frontier.append((link, result.depth + 1))
+                        yield result
+        finally:
+            self.validators.save()
+            self.close()
@@ -6,6 +6,8 @@ import re
 from askharrison.crawl.utils import parse_table, parse_image
 
 class HTMLContent:
+    __slots__ = ('id', 'type', 'content', 'section_name')
+
     def __init__(self, id, content_type, content, section_name):
         self.id = id
         self.type = content_type
@@ -20,6 +22,9 @@ class HTMLContent:
     
 
 class HTMLSection:
+    __slots__ = ('id', 'name', 'level', 'text', 'contents', 'previous_section',
+                 'next_section', 'parent_section', 'child_sections')
+
     def __init__(self, id, name, level, text=''):
         self.id = id
         self.name = name
@@ -0,0 +1,12 @@
+import html2text
+
+
+def html_to_text(html: str) -> str:
+    """
+    Markdown text of an HTML page, for LLM prompts and crawl records: headings, lists,
+    tables and links are kept, images dropped, and lines are not wrapped.
+    """
+    converter = html2text.HTML2Text()
+    converter.ignore_images = True
+    converter.body_width = 0
+    return converter.handle(html).strip()
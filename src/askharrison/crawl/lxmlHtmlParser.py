@@ -0,0 +1,152 @@
+import re
+
+import lxml.html
+
+from askharrison.crawl.htmlParser import HTMLParserExtended
+
+HEADER_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def _classes(element):
+    return element.get('class', '').split()
+
+
+def _strip_text(element):
+    """same text as BeautifulSoup's get_text(strip=True): stripped text pieces joined without separator"""
+    return ''.join(piece.strip() for piece in element.itertext())
+
+
+def _own_element(figure, tag):
+    """first descendant of figure with tag that isn't inside a nested sub-figure"""
+    for element in figure.iter(tag):
+        if next(element.iterancestors('figure'), None) is figure:
+            return element
+    return None
+
+
+def _table_content(figure):
+    """table figure -> {'type': 'table', 'caption': str, 'content': list of rows}"""
+    rows = []
+    for row in figure.iter('tr'):
+        rows.append([_strip_text(cell) for cell in row if cell.tag in ('td', 'th')])
+    caption = next(figure.iter('figcaption'), None)
+    return {
+        'type': 'table',
+        'caption': _strip_text(caption) if caption is not None else '',
+        'content': rows
+    }
+
+
+def _image_content(figure):
+    """image figure (and its sub-figures) -> list of {'type': 'image', 'caption': str, 'content': src}"""
+    image_contents = []
+    for sub_figure in figure.iter('figure'):
+        if sub_figure is not figure and 'ltx_figure' not in _classes(sub_figure):
+            continue
+        image = _own_element(sub_figure, 'img')
+        caption = _own_element(sub_figure, 'figcaption')
+        image_contents.append({
+            'type': 'image',
+            'caption': _strip_text(caption) if caption is not None else 'No caption available.',
+            'content': image.get('src', 'No image source available.') if image is not None else 'No image source available.'
+        })
+    return image_contents
+
+
+class _SectionFrame:
+    """a <section> element being walked, its HTMLSection is created once its header is found"""
+    def __init__(self, parent_frame):
+        self.parent_frame = parent_frame
+        self.section = None
+        self.pending_contents = []
+        self.text_parts = []
+
+    def parent_section(self):
+        frame = self.parent_frame
+        while frame is not None and frame.section is None:
+            frame = frame.parent_frame
+        return frame.section if frame is not None else None
+
+
+class LxmlHTMLParser(HTMLParserExtended):
+    """
+    HTMLParserExtended backend that parses with lxml and walks the DOM once.
+
+    Sections, their paragraph text, table and image contents are all built during
+    one depth-first traversal; figures are read from the already parsed tree instead
+    of being re-serialized and parsed again. Tables and images belong to the innermost
+    section they appear in, and nested <section> elements become child sections.
+
+    Example usage:
+        html_parser = LxmlHTMLParser()
+        html_parser.parse_html_str(content)
+        html_parser.print_hierarchy()
+    """
+
+    def parse_html_str(self, html_text: str):
+        self.reset()
+        root = lxml.html.document_fromstring(html_text)
+
+        frames = []
+        # (element, is_exit) stack, exit markers close <section> frames
+        stack = [(root, False)]
+        while stack:
+            element, is_exit = stack.pop()
+            tag = element.tag
+            if not isinstance(tag, str):
+                # comments and processing instructions
+                continue
+
+            if is_exit:
+                self._close_frame(frames.pop())
+                continue
+
+            current_frame = frames[-1] if frames else None
+            if tag == 'section':
+                frames.append(_SectionFrame(current_frame))
+                stack.append((element, True))
+            elif current_frame is not None:
+                if tag in HEADER_TAGS and current_frame.section is None:
+                    self._open_section(current_frame, _strip_text(element), int(tag[1]))
+                    continue
+                if tag == 'figure':
+                    classes = _classes(element)
+                    if 'ltx_table' in classes:
+                        self._add_frame_content(current_frame, _table_content(element), 'table')
+                        continue
+                    if 'ltx_figure' in classes:
+                        self._add_frame_content(current_frame, _image_content(element), 'image')
+                        continue
+                if tag == 'p':
+                    current_frame.text_parts.append(WHITESPACE_PATTERN.sub(' ', element.text_content()).strip())
+                    continue
+
+            # children are pushed in reverse so they pop in document order
+            stack.extend((child, False) for child in reversed(element))
+
+        self.link_sections()
+
+    def _open_section(self, frame, name, level):
+        frame.section = self.add_section(name, level, frame.parent_section())
+        for content, content_type in frame.pending_contents:
+            self.add_content(frame.section, content, content_type)
+        frame.pending_contents = []
+
+    def _add_frame_content(self, frame, content, content_type):
+        if not content:
+            return
+        if frame.section is None:
+            # contents before the section header are added once the header is found
+            frame.pending_contents.append((content, content_type))
+        else:
+            self.add_content(frame.section, content, content_type)
+
+    def _close_frame(self, frame):
+        if frame.section is not None:
+            frame.section.text = '\n'.join(part for part in frame.text_parts if part)
+        elif frame.parent_frame is not None:
+            # headerless section: hand its text and contents to the enclosing section
+            frame.parent_frame.text_parts.extend(frame.text_parts)
+            for content, content_type in frame.pending_contents:
+                self._add_frame_content(frame.parent_frame, content, content_type)
@@ -1,10 +1,17 @@
+import hashlib
+import json
 import re
 from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple
+
+HEADER_PATTERN = re.compile(r'^(#{1,6})\s*(.*)')
+IMAGE_PATTERN = re.compile(r'!\[(.*?)\]\((.*?)\)')
 
-import re
-from typing import List, Optional, Dict, Any
 
 class Content:
+    __slots__ = ('id', 'type', 'content', 'section_name')
+
     def __init__(self, id, content_type, content, section_name):
         self.id = id
         self.type = content_type
@@ -15,6 +22,9 @@ class Content:
         return f"Content {self.id}: {self.type} ({self.content})"
 
 class Section:
+    __slots__ = ('id', 'name', 'level', 'text', 'contents', 'previous_section',
+                 'next_section', 'parent_section', 'child_sections')
+
     def __init__(self, id, name, level, text=''):
         self.id = id
         self.name = name
@@ -35,7 +45,7 @@ class Section:
         print('  ' * current_indent + f'- {self.name} (Level {self.level})')
         if print_contents:
             for content in self.contents:
-                print(' ' * (indent + 2) + f'* {content.type}: {content.content}')
+                print(' ' * (current_indent + 2) + f'* {content.type}: {content.content}')
         # Recursively print each child section with increased indentation
         for child in self.child_sections:
             # The level difference for children is their level minus this section's level
@@ -44,89 +54,227 @@ class Section:
     def __repr__(self):
         return f"Section {self.id}: {self.name} (Level {self.level})"
 
+    @property
+    def path(self) -> Tuple[str, ...]:
+        """names from the top level section down to this one, stable across re-parses"""
+        names = []
+        section = self
+        while section:
+            names.append(section.name)
+            section = section.parent_section
+        return tuple(reversed(names))
+
+    @property
+    def content_hash(self) -> str:
+        """
+        hash of this section's own name, level, text and contents.
+        Child sections are not included, so an edit only changes the hash of the section it is in.
+        """
+        hasher = hashlib.sha256()
+        hasher.update(f'{self.level}\0{self.name}\0{self.text}'.encode('utf-8'))
+        for content in self.contents:
+            hasher.update(f'\0{content.type}\0'.encode('utf-8'))
+            hasher.update(json.dumps(content.content, sort_keys=True).encode('utf-8'))
+        return hasher.hexdigest()
+
     def to_dict(self):
-        """convert to dict"""
+        """convert to a JSON serializable dict, linked sections are referenced by id"""
         return {
             'id': self.id,
             'name': self.name,
             'level': self.level,
             'text': self.text,
-            'contents': self.contents,
-            'previous_section': self.previous_section,
-            'next_section': self.next_section,
-            'parent_section': self.parent_section,
-            'child_sections': self.child_sections
+            'contents': [
+                {'id': content.id, 'type': content.type, 'content': content.content}
+                for content in self.contents
+            ],
+            'previous_section': self.previous_section.id if self.previous_section else None,
+            'next_section': self.next_section.id if self.next_section else None,
+            'parent_section': self.parent_section.id if self.parent_section else None,
+            'child_sections': [child.id for child in self.child_sections]
         }
 
 
+@dataclass
+class SectionDiff:
+    """Sections added, changed, removed or unchanged between two parses of a document"""
+    added: List[Section] = field(default_factory=list)      # sections of the new parse
+    changed: List[Section] = field(default_factory=list)    # sections of the new parse
+    removed: List[Section] = field(default_factory=list)    # sections of the old parse
+    unchanged: List[Section] = field(default_factory=list)  # sections of the new parse
+
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+def _keyed_sections(sections) -> Dict[Tuple, Section]:
+    """key sections by (path, occurrence) so repeated headings at the same path stay distinct"""
+    occurrences = defaultdict(int)
+    keyed = {}
+    for section in sections:
+        path = section.path
+        keyed[(path, occurrences[path])] = section
+        occurrences[path] += 1
+    return keyed
+
+
+def diff_sections(old_sections: List[Section], new_sections: List[Section]) -> SectionDiff:
+    """
+    Compare two section lists by section path and content hash.
+
+    Only the sections in diff.added and diff.changed need to be re-chunked / re-extracted,
+    downstream results for diff.removed can be dropped.
+    """
+    old_keyed = _keyed_sections(old_sections)
+    new_keyed = _keyed_sections(new_sections)
+    diff = SectionDiff()
+    for key, section in new_keyed.items():
+        old_section = old_keyed.get(key)
+        if old_section is None:
+            diff.added.append(section)
+        elif old_section.content_hash != section.content_hash:
+            diff.changed.append(section)
+        else:
+            diff.unchanged.append(section)
+    diff.removed = [section for key, section in old_keyed.items() if key not in new_keyed]
+    return diff
+
+
 class MarkdownParser:
+    """
+    Single pass markdown parser building a Section tree with its contents
+    (code blocks, tables, images).
+
+    Sections and contents are indexed by id and contents by type, so lookups
+    and get_tables/get_images/get_code_blocks don't rescan the document.
+
+    Example usage:
+        parser = MarkdownParser()
+        parser.parse_markdown_str(text)
+
+        # large exports can be parsed from a file object without reading it into memory
+        with open('export.md') as f:
+            parser.parse_markdown_lines(f)
+
+        # after a re-crawl, only re-process what changed
+        diff = parser.update_markdown_str(new_text)
+        sections_to_reindex = diff.added + diff.changed
+    """
     def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """reset the parser"""
         self.sections = []
         self.contents = []
         self.current_section_id = 0
         self.current_content_id = 0
+        self._sections_by_id = {}
+        self._contents_by_id = {}
+        self._contents_by_type = defaultdict(list)
 
     def parse_markdown_str(self, text: str):
-        lines = text.split('\n')
+        self.parse_markdown_lines(text.split('\n'))
+
+    def parse_markdown_lines(self, lines: Iterable[str]):
+        """Parse markdown from any line iterable, e.g. a list of lines or an open file"""
+        for _ in self.iter_sections(lines):
+            pass
+
+    def iter_sections(self, lines: Iterable[str]) -> Iterator[Section]:
+        """
+        Streaming parse: consume lines one at a time and yield each Section
+        as soon as its text and contents are complete (i.e. when the next header starts).
+        Sections are linked (previous/next) once the input is exhausted.
+        """
         current_section = None
-        code_block_delimiter = False
-        table_started = False
-        code_block = ''
-        table = []
+        # open headers from the outermost to the innermost, used to find parents
+        header_stack = []
+        in_code_block = False
+        code_lines = []
+        table_lines = []
+        text_lines = []
 
         for line in lines:
-            header_match = re.match(r'^(#{1,6})\s*(.*)', line)
-            image_match = re.match(r'!\[(.*?)\]\((.*?)\)', line)
+            line = line.rstrip('\r\n')
+
+            if in_code_block:
+                if line.startswith('```'):
+                    self.add_content(current_section, ''.join(code_lines), 'code_block')
+                    code_lines = []
+                    in_code_block = False
+                else:
+                    code_lines.append(line + '\n')
+                continue
+
+            if table_lines:
+                if line.startswith('|') and '|' in line[1:]:
+                    table_lines.append(line)
+                    continue
+                if not line.strip():
+                    # Empty line ends the table
+                    self.add_content(current_section, '\n'.join(table_lines), 'table')
+                    table_lines = []
+                    continue
+
+            first_char = line[:1]
+            header_match = HEADER_PATTERN.match(line) if first_char == '#' else None
             if header_match:
-                # End the previous code block or table if it exists
-                if code_block_delimiter:
-                    self.add_content(current_section, code_block, 'code_block')
-                    code_block = ''
-                    code_block_delimiter = False
-                if table_started:
-                    self.add_content(current_section, '\n'.join(table), 'table')
-                    table = []
-                    table_started = False
+                # End the previous table if it exists
+                if table_lines:
+                    self.add_content(current_section, '\n'.join(table_lines), 'table')
+                    table_lines = []
+                if current_section:
+                    current_section.text = ''.join(text_lines)
+                    yield current_section
+                text_lines = []
 
                 level = len(header_match.group(1))
                 name = header_match.group(2).strip()
-                current_section = self.add_section(name, level, current_section)
+                while header_stack and header_stack[-1].level >= level:
+                    header_stack.pop()
+                parent_section = header_stack[-1] if header_stack else None
+                current_section = self.add_section(name, level, parent_section)
+                header_stack.append(current_section)
             elif line.startswith('```'):
-                if not code_block_delimiter:
-                    code_block_delimiter = True
-                else:
-                    self.add_content(current_section, code_block, 'code_block')
-                    code_block = ''
-                    code_block_delimiter = False
-            elif code_block_delimiter:
-                code_block += line + '\n'
-            elif image_match:
-                image_description = image_match.group(1).strip()
-                image_src = image_match.group(2).strip()
-                image_content = {
-                    'description': image_description,
-                    'src': image_src
-                }
-                self.add_content(current_section, image_content, 'image')
-            elif line.startswith('|') and '|' in line[1:]:
-                table.append(line)
-                table_started = True
-            elif table_started and not line.strip():
-                # Empty line ends the table
-                self.add_content(current_section, '\n'.join(table), 'table')
-                table = []
-                table_started = False
+                in_code_block = True
+            elif first_char == '!' and line.startswith('!['):
+                image_match = IMAGE_PATTERN.match(line)
+                if image_match:
+                    image_content = {
+                        'description': image_match.group(1).strip(),
+                        'src': image_match.group(2).strip()
+                    }
+                    self.add_content(current_section, image_content, 'image')
+                elif current_section:
+                    text_lines.append(line + '\n')
+            elif first_char == '|' and '|' in line[1:]:
+                table_lines.append(line)
             elif current_section:
-                current_section.text += line + '\n'
+                text_lines.append(line + '\n')
 
         # If a code block or table was the last thing in the document
-        if code_block_delimiter:
-            self.add_content(current_section, code_block, 'code_block')
-        if table_started:
-            self.add_content(current_section, '\n'.join(table), 'table')
+        if in_code_block:
+            self.add_content(current_section, ''.join(code_lines), 'code_block')
+        if table_lines:
+            self.add_content(current_section, '\n'.join(table_lines), 'table')
+        if current_section:
+            current_section.text = ''.join(text_lines)
+            yield current_section
 
         self.link_sections()
 
+    def update_markdown_str(self, text: str) -> SectionDiff:
+        """
+        Re-parse an edited version of the document and return what changed
+        compared to the current parse. The parser then holds the new parse.
+        """
+        new_parser = MarkdownParser()
+        new_parser.parse_markdown_str(text)
+        diff = diff_sections(self.sections, new_parser.sections)
+        self.__dict__.update(new_parser.__dict__)
+        return diff
+
     def add_section(self, name, level, parent_section):
         section = Section(self.current_section_id, name, level)
         self.current_section_id += 1
@@ -134,12 +282,15 @@ class MarkdownParser:
             section.parent_section = parent_section
             parent_section.child_sections.append(section)
         self.sections.append(section)
+        self._sections_by_id[section.id] = section
         return section
 
     def add_content(self, section, content, content_type):
         content_obj = Content(self.current_content_id, content_type, content, section.name if section else '')
         self.current_content_id += 1
         self.contents.append(content_obj)
+        self._contents_by_id[content_obj.id] = content_obj
+        self._contents_by_type[content_type].append(content_obj)
         if section:
             section.add_content(content_obj)
 
@@ -153,52 +304,31 @@ class MarkdownParser:
     def get_hierarchy(self):
         return self.sections
 
-    # def print_hierarchy(self):
-    #     for section in self.sections:
-    #         print(f"Section {section.id}: {section.name} (Level {section.level})")
-    #         for child in section.child_sections:
-    #             print(f"  Child Section {child.id}: {child.name}")
-    # def print_hierarchy(self):
-    #     def print_section(section, indent=''):
-    #         print(f"{indent}- {section.name} (Level {section.level})")
-    #         for content in section.contents:
-    #             print(f"{indent}  * {content.type}: {content.id}")
-    #         for child in section.child_sections:
-    #             print_section(child, indent + '  '*2)
-        
-    #     for section in self.sections:
-    #         if section.parent_section is None:  # print only top level sections
-    #             print_section(section)
     def print_hierarchy(self, print_contents=False):
         # Determine the base level to calculate correct indentation
         base_level = min(section.level for section in self.sections if section.parent_section is None)
         # Start with the top-level sections (which have no parent)
         for section in self.sections:
             if section.parent_section is None:
-                section.print_section(level_diff=base_level)
+                section.print_section(level_diff=base_level, print_contents=print_contents)
 
+    def get_contents_by_type(self, content_type):
+        return list(self._contents_by_type.get(content_type, []))
 
     def get_images(self):
-        return [content for content in self.contents if content.type == 'image']
+        return self.get_contents_by_type('image')
 
     def get_tables(self):
-        return [content for content in self.contents if content.type == 'table']
+        return self.get_contents_by_type('table')
 
     def get_code_blocks(self):
-        return [content for content in self.contents if content.type == 'code_block']
-
+        return self.get_contents_by_type('code_block')
 
     def get_section(self, id):
-        for section in self.sections:
-            if section.id == id:
-                return section
-        return None
+        return self._sections_by_id.get(id)
 
     def get_content(self, id):
-        for content in self.contents:
-            if content.id == id:
-                return content
-        return None
+        return self._contents_by_id.get(id)
 
 class MarkdownParser1:
     def __init__(self, markdown_text):
@@ -0,0 +1,96 @@
+import re
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+BOLD_FLAG = 16
+LETTER_PATTERN = re.compile(r'[^\W\d_]')
+
+# a line is a list of (text, font size, font flags) spans
+Span = Tuple[str, float, int]
+
+
+class FontStatsHeadingClassifier:
+    """
+    Detects PDF headings and their level from the document's font statistics.
+
+    fit computes, in one vectorized pass over all lines, the character-weighted font size
+    histogram (rounded to half points). The most used size is the body size; larger sizes
+    that are used for only a small share of the text are heading sizes, the largest one
+    being level 1. Bold lines at body size are the lowest heading level.
+    A line is only a heading when the whole line has the heading style and it is short,
+    so bold words and large symbols inside body text are not mistaken for headings.
+
+    Example usage:
+        classifier = FontStatsHeadingClassifier().fit(lines)
+        levels = classifier.classify(lines)  # heading level or None for each line
+    """
+
+    def __init__(self, size_ratio: float = 1.15, max_heading_share: float = 0.05,
+                 max_heading_words: int = 12, max_levels: int = 6):
+        """
+        :param size_ratio: minimum size relative to the body size for a larger-font heading
+        :param max_heading_share: sizes covering more of the document's characters are not heading sizes
+        :param max_heading_words: longer lines are never headings
+        :param max_levels: deepest heading level produced
+        """
+        self.size_ratio = size_ratio
+        self.max_heading_share = max_heading_share
+        self.max_heading_words = max_heading_words
+        self.max_levels = max_levels
+        self.body_size = None
+        self.size_levels = {}
+        self.bold_level = 1
+
+    @staticmethod
+    def _line_features(lines: Sequence[Sequence[Span]]):
+        """per line: char-weighted font size (rounded to .5pt), all-bold flag, character count"""
+        sizes, bold, chars = [], [], []
+        for line in lines:
+            weighted_size, line_chars, all_bold = 0.0, 0, True
+            for text, size, flags in line:
+                span_chars = len(text.strip())
+                if not span_chars:
+                    continue
+                weighted_size += size * span_chars
+                line_chars += span_chars
+                all_bold = all_bold and bool(flags & BOLD_FLAG)
+            sizes.append(weighted_size / line_chars if line_chars else 0.0)
+            bold.append(all_bold and line_chars > 0)
+            chars.append(line_chars)
+        return np.round(np.array(sizes) * 2) / 2, np.array(bold, dtype=bool), np.array(chars)
+
+    def fit(self, lines: Sequence[Sequence[Span]]) -> 'FontStatsHeadingClassifier':
+        self.body_size, self.size_levels, self.bold_level = None, {}, 1
+        sizes, _, chars = self._line_features(lines)
+        if not chars.sum():
+            return self
+        unique_sizes, inverse = np.unique(sizes, return_inverse=True)
+        size_chars = np.bincount(inverse, weights=chars)
+        self.body_size = float(unique_sizes[np.argmax(size_chars)])
+
+        share = size_chars / size_chars.sum()
+        is_heading_size = (unique_sizes >= self.body_size * self.size_ratio) & (share <= self.max_heading_share)
+        heading_sizes = sorted(unique_sizes[is_heading_size], reverse=True)[:self.max_levels - 1]
+        self.size_levels = {float(size): level for level, size in enumerate(heading_sizes, start=1)}
+        self.bold_level = len(self.size_levels) + 1
+        return self
+
+    def classify(self, lines: Sequence[Sequence[Span]]) -> List[Optional[int]]:
+        """heading level of each line, None for body text"""
+        if self.body_size is None:
+            self.fit(lines)
+        sizes, bold, _ = self._line_features(lines)
+        levels = []
+        for line, size, is_bold in zip(lines, sizes, bold):
+            text = ''.join(span[0] for span in line).strip()
+            if (not text or len(text.split()) > self.max_heading_words
+                    or not LETTER_PATTERN.search(text)):
+                levels.append(None)
+            elif float(size) in self.size_levels:
+                levels.append(self.size_levels[float(size)])
+            elif is_bold and self.body_size is not None and size >= self.body_size:
+                levels.append(self.bold_level)
+            else:
+                levels.append(None)
+        return levels
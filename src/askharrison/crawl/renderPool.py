@@ -0,0 +1,148 @@
+"""
+Pool of warm headless browsers for pages that need JavaScript.
+
+Most docs pages are server-rendered, so pages are fetched statically first and
+needs_javascript decides whether rendering is worth a browser. Rendering uses one of
+N already started Chrome drivers, each with a page-load timeout and with images and
+fonts blocked.
+
+Example usage:
+    with BrowserRenderPool(size=4) as pool:
+        html = pool.render("https://docs.example.com/app")
+"""
+import logging
+import queue
+import re
+import threading
+from typing import Callable, Optional
+
+import lxml.html
+
+logger = logging.getLogger(__name__)
+
+# resources a headless render never needs for text extraction
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+]
+# empty mount points of client-side rendered apps
+APP_ROOT_IDS = {"root", "app", "__next", "__nuxt", "___gatsby", "svelte"}
+NOSCRIPT_PATTERN = re.compile(r"(enable|requires?)\s+javascript", re.IGNORECASE)
+
+
+def needs_javascript(html, min_text_chars: int = 200) -> bool:
+    """
+    Cheap check on statically fetched HTML: does the page only show its content after
+    JavaScript runs? A page with at least min_text_chars of visible text never does, even
+    with an empty id="root" div (server-rendered apps keep one for hydration). Below that,
+    True for an empty app mount point, a noscript "enable JavaScript" notice, or a page
+    without links.
+    """
+    try:
+        document = lxml.html.fromstring(html)
+    except (lxml.etree.ParserError, ValueError):
+        return True
+
+    body = document.find("body")
+    if body is None:
+        return True
+    has_mount_point = any(
+        (element.get("id", "") in APP_ROOT_IDS or element.tag == "app-root")
+        and not len(element) and not (element.text or "").strip()
+        for element in document.iter("div", "main", "app-root"))
+    has_noscript_notice = any(NOSCRIPT_PATTERN.search(noscript.text_content())
+                              for noscript in document.iter("noscript"))
+
+    for element in body.iter("script", "style", "noscript", "template"):
+        element.drop_tree()
+    text_chars = len("".join(body.itertext()).strip())
+    if text_chars >= min_text_chars:
+        return False
+    return has_mount_point or has_noscript_notice or not body.xpath(".//a[@href]")
+
+
+def chrome_driver_factory(page_load_timeout: float = 15.0, block_resources: bool = True):
+    """builds headless Chrome drivers that skip images and fonts"""
+    from selenium import webdriver
+
+    def build():
+        options = webdriver.ChromeOptions()
+        options.add_argument("headless")
+        options.add_argument("--disable-gpu")
+        if block_resources:
+            options.add_argument("--blink-settings=imagesEnabled=false")
+            options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        # don't wait for every subresource, the DOM is enough for text extraction
+        options.page_load_strategy = "eager"
+        driver = webdriver.Chrome(options=options)
+        driver.set_page_load_timeout(page_load_timeout)
+        if block_resources:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        return driver
+
+    return build
+
+
+class BrowserRenderPool:
+    def __init__(self, size: int = 2, page_load_timeout: float = 15.0, block_resources: bool = True,
+                 driver_factory: Optional[Callable] = None):
+        """
+        :param size: number of warm browser instances, i.e. pages rendered concurrently
+        :param page_load_timeout: seconds before a page load is abandoned
+        :param block_resources: don't load images and fonts
+        :param driver_factory: () -> driver, defaults to headless Chrome
+        """
+        self.size = size
+        self.driver_factory = driver_factory or chrome_driver_factory(page_load_timeout, block_resources)
+        self._drivers = queue.Queue()
+        self._all_drivers = []
+        # render threads replace failed drivers concurrently
+        self._drivers_lock = threading.Lock()
+        for _ in range(size):
+            self._add_driver()
+
+    def _add_driver(self):
+        driver = self.driver_factory()
+        with self._drivers_lock:
+            self._all_drivers.append(driver)
+        self._drivers.put(driver)
+
+    def _replace_driver(self, driver):
+        with self._drivers_lock:
+            self._all_drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        self._add_driver()
+
+    def render(self, url: str) -> str:
+        """
+        Render url in the next free browser and return the page source. Blocks while
+        all browsers are busy. A browser that fails (timeout, crash) is replaced and
+        the error is raised.
+        """
+        driver = self._drivers.get()
+        try:
+            driver.get(url)
+            html = driver.page_source
+        except Exception as e:
+            logger.warning(f"Rendering {url} failed, restarting browser: {e}")
+            self._replace_driver(driver)
+            raise
+        self._drivers.put(driver)
+        return html
+
+    def close(self):
+        with self._drivers_lock:
+            drivers, self._all_drivers = self._all_drivers, []
+            self._drivers = queue.Queue()
+        for driver in drivers:
+            driver.quit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,57 @@
+from bs4 import BeautifulSoup
+
+
+def _own_element(figure, name: str):
+    """first descendant of figure named name that isn't inside a nested sub-figure"""
+    for element in figure.find_all(name):
+        if element.find_parent('figure') is figure:
+            return element
+    return None
+
+
+def parse_table(table_html: str) -> dict:
+    """
+    Parse an arXiv HTML table figure (<figure class="ltx_table">).
+
+    :param table_html: HTML of the figure
+    :return: {'type': 'table', 'caption': str, 'content': list of rows, each a list of cell texts}
+    """
+    soup = BeautifulSoup(table_html, 'html.parser')
+    try:
+        table_content = []
+        for row in soup.find('table').find_all('tr'):
+            table_content.append([cell.get_text(strip=True) for cell in row.find_all(['td', 'th'])])
+        caption = soup.find('figcaption')
+        return {
+            'type': 'table',
+            'caption': caption.get_text(strip=True) if caption else '',
+            'content': table_content
+        }
+    except Exception as e:
+        print(f"Error parsing table: {e}")
+        # Fallback: whatever text the figure has
+        return {
+            'type': 'table',
+            'caption': 'An error occurred while parsing the table.',
+            'content': soup.get_text(strip=True) or 'No content could be retrieved.'
+        }
+
+
+def parse_image(figure_html: str) -> list:
+    """
+    Parse an arXiv HTML image figure (<figure class="ltx_figure">) and its sub-figures.
+
+    :param figure_html: HTML of the figure
+    :return: list of {'type': 'image', 'caption': str, 'content': image src}, one per (sub-)figure
+    """
+    soup = BeautifulSoup(figure_html, 'html.parser')
+    image_contents = []
+    for figure in soup.find_all('figure', class_='ltx_figure'):
+        image = _own_element(figure, 'img')
+        caption = _own_element(figure, 'figcaption')
+        image_contents.append({
+            'type': 'image',
+            'caption': caption.get_text(strip=True) if caption else 'No caption available.',
+            'content': image['src'] if image and image.has_attr('src') else 'No image source available.'
+        })
+    return image_contents
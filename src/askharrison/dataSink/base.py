@@ -1,27 +1,164 @@
+import hashlib
+import json
 import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
 
 class DataSink:
     def save(self, data, filename, metadata):
         """Save data with metadata."""
         raise NotImplementedError("Must be implemented by subclasses.")
-    
+
+    def save_many(self, items):
+        """
+        Save a batch of (data, filename, metadata) items and return the save results.
+        Calls save per item; sinks that write a batch more cheaply override it. Every
+        item is attempted, the first error is raised afterwards.
+        """
+        results, errors = [], []
+        for data, filename, metadata in items:
+            try:
+                results.append(self.save(data, filename, metadata))
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+        return results
+
+    def close(self):
+        """Release resources; everything saved before close must be durable afterwards."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _to_bytes(data):
+    return data.encode('utf-8') if isinstance(data, str) else bytes(data)
+
+
 class LocalFileDataSink(DataSink):
-    def __init__(self, directory):
+    def __init__(self, directory, shard_depth=0, shard_width=2):
+        """
+        Saves each object as a file, written atomically: data goes to a temporary file in
+        the target directory which is then renamed over the target, so readers never see a
+        partial file. Metadata, when given, is saved next to it as {filename}.meta.json.
+
+        :param directory: root directory, created if missing
+        :param shard_depth: levels of sub-directories named after the filename's hash,
+            e.g. 2 gives directory/3f/a2/filename; keeps directories small for large crawls
+        :param shard_width: hex characters per sub-directory name
+        """
         self.directory = directory
-    
+        self.shard_depth = shard_depth
+        self.shard_width = shard_width
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, filename):
+        digest = hashlib.md5(filename.encode('utf-8')).hexdigest()
+        shards = [digest[i * self.shard_width:(i + 1) * self.shard_width] for i in range(self.shard_depth)]
+        return os.path.join(self.directory, *shards, filename)
+
+    @staticmethod
+    def _atomic_write(path, payload):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = os.path.join(directory, f'.tmp-{uuid.uuid4().hex}')
+        # created like open() would create it: 0666 less the process umask at the time of the call
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(payload)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
     def save(self, data, filename, metadata):
-        with open(os.path.join(self.directory, filename), 'w') as file:
-            file.write(data)
-        # Add logic here to save metadata if needed
+        path = self.path_for(filename)
+        self._atomic_write(path, _to_bytes(data))
+        if metadata:
+            self._atomic_write(f"{path}.meta.json", json.dumps(metadata).encode('utf-8'))
+        return path
 
 class S3DataSink(DataSink):
-    # Add initialization with S3 credentials and bucket info
+    MIN_PART_SIZE = 5 * 1024 * 1024  # S3 rejects smaller parts, except the last one
+
+    def __init__(self, bucket, prefix='', client=None, multipart_threshold=16 * 1024 * 1024,
+                 part_size=8 * 1024 * 1024, max_concurrency=8, **client_kwargs):
+        """
+        Saves objects to an S3-compatible store (AWS, MinIO, ...). Small objects are a single
+        PUT, large ones are multipart uploads whose parts are sent concurrently over a shared
+        connection pool.
+
+        :param bucket: bucket name
+        :param prefix: key prefix, e.g. 'crawls/2024-06-01/'
+        :param client: boto3 S3 client, built from client_kwargs (endpoint_url, region_name...) if None
+        :param multipart_threshold: objects at least this large use multipart upload
+        :param part_size: multipart part size, at least 5 MiB
+        :param max_concurrency: parallel part uploads, also the connection pool size
+        """
+        if part_size < self.MIN_PART_SIZE:
+            raise ValueError("part_size must be at least 5 MiB")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.multipart_threshold = multipart_threshold
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+        if client is None:
+            import boto3
+            from botocore.config import Config
+            client = boto3.client('s3', config=Config(max_pool_connections=max_concurrency), **client_kwargs)
+        self.client = client
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    @staticmethod
+    def _s3_metadata(metadata):
+        # S3 user metadata is a flat str -> str mapping
+        return {str(key): value if isinstance(value, str) else json.dumps(value)
+                for key, value in (metadata or {}).items()}
+
     def save(self, data, filename, metadata):
-        # Implement logic to save data to S3 bucket here
-        pass
+        key = self.prefix + filename
+        payload = _to_bytes(data)
+        if len(payload) < self.multipart_threshold:
+            self.client.put_object(Bucket=self.bucket, Key=key, Body=payload, Metadata=self._s3_metadata(metadata))
+        else:
+            self._multipart_upload(key, payload, metadata)
+        return key
+
+    def _multipart_upload(self, key, payload, metadata):
+        upload_id = self.client.create_multipart_upload(
+            Bucket=self.bucket, Key=key, Metadata=self._s3_metadata(metadata))['UploadId']
+        view = memoryview(payload)
+
+        def upload_part(part_number, offset):
+            response = self.client.upload_part(Bucket=self.bucket, Key=key, UploadId=upload_id,
+                                               PartNumber=part_number,
+                                               Body=view[offset:offset + self.part_size].tobytes())
+            return {'PartNumber': part_number, 'ETag': response['ETag']}
+
+        try:
+            futures = [self._executor.submit(upload_part, part_number, offset)
+                       for part_number, offset in enumerate(range(0, len(payload), self.part_size), start=1)]
+            parts = [future.result() for future in futures]
+            self.client.complete_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id,
+                                                  MultipartUpload={'Parts': parts})
+        except BaseException:
+            # don't leave billed, invisible parts behind
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+
+    def close(self):
+        self._executor.shutdown(wait=True)
 
 class CyberduckDataSink(DataSink):
     # Add initialization with Cyberduck credentials and config
     def save(self, data, filename, metadata):
         # Implement logic to save data to Cyberduck storage here
-        pass
\ No newline at end of file
+        pass
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import mmap
+import os
+import threading
+import zlib
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from askharrison.dataSink.base import DataSink, _to_bytes
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional, zlib is used without it
+    zstandard = None
+
+INDEX_FILENAME = "index.jsonl"
+
+
+class PackFileDataSink(DataSink):
+    """
+    Content-addressed, compressed storage for many small objects (crawled pages, parse
+    outputs) in a few large pack files instead of one file per object.
+
+    Layout of directory:
+        pack-00000.pack, ...  blobs appended back to back, each compressed on its own
+                              (zstd, zlib without zstandard) so it can be read alone
+        index.jsonl           one line per save: key, blob digest, pack, offset, length, metadata
+
+    A blob is stored once per distinct content (sha256), saving identical pages under
+    several keys only adds an index line. The index is append-only, the last line of a key
+    wins, and is replayed on open. Each save (or save_many batch) fsyncs the pack, then the
+    index; a torn last index line left by a crash is cut off on open. Reads slice
+    memory-mapped pack files.
+
+    Example usage:
+        with PackFileDataSink("crawl_store") as sink:
+            sink.save(html, url, {"status": 200})
+        store = PackFileDataSink("crawl_store")
+        html = store.load(url).decode()
+    """
+
+    def __init__(self, directory: str, max_pack_size: int = 256 * 1024 * 1024, compression_level: int = 3):
+        """
+        :param directory: store directory, created if missing; an existing store is reopened
+        :param max_pack_size: a new pack file is started once the current one reaches this size
+        :param compression_level: zstd (or zlib) compression level
+        """
+        self.directory = directory
+        self.max_pack_size = max_pack_size
+        self.codec = "zstd" if zstandard is not None else "zlib"
+        self.compression_level = compression_level
+        self.keys: Dict[str, Dict[str, Any]] = {}
+        self.blobs: Dict[str, Tuple[int, int, int, str]] = {}
+        self._lock = threading.Lock()
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._map_sizes: Dict[int, int] = {}
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+        self._pack_number = max((pack for pack, _, _, _ in self.blobs.values()), default=0)
+        self._pack_file = open(self._pack_path(self._pack_number), "ab")
+        self._index_file = open(os.path.join(directory, INDEX_FILENAME), "a", encoding="utf-8")
+
+    def _pack_path(self, pack: int) -> str:
+        return os.path.join(self.directory, f"pack-{pack:05d}.pack")
+
+    def _load_index(self):
+        path = os.path.join(self.directory, INDEX_FILENAME)
+        if not os.path.exists(path):
+            return
+        with open(path, "r+b") as f:
+            complete = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # torn last line of an interrupted write: cut it off so the next append
+                    # starts a fresh line, its blob is ignored
+                    f.truncate(complete)
+                    break
+                complete += len(line)
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # corrupt line, skipped
+                self.blobs[entry["digest"]] = (entry["pack"], entry["offset"], entry["length"], entry["codec"])
+                self.keys[entry["key"]] = entry
+
+    def _compress(self, payload: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=self.compression_level).compress(payload)
+        return zlib.compress(payload, self.compression_level)
+
+    @staticmethod
+    def _decompress(blob: bytes, codec: str) -> bytes:
+        if codec == "zstd":
+            if zstandard is None:
+                raise ImportError("zstandard is required to read zstd packs, install it with `pip install zstandard`")
+            return zstandard.ZstdDecompressor().decompress(blob)
+        return zlib.decompress(blob)
+
+    def save(self, data, filename, metadata):
+        return self.save_many([(data, filename, metadata)])[0]
+
+    def save_many(self, items):
+        """save a batch under one lock, with one pack flush and one index write; returns the digests"""
+        payloads = [(_to_bytes(data), filename, metadata) for data, filename, metadata in items]
+        entries = []
+        with self._lock:
+            for payload, filename, metadata in payloads:
+                digest = hashlib.sha256(payload).hexdigest()
+                if digest not in self.blobs:
+                    blob = self._compress(payload)
+                    if self._pack_file.tell() and self._pack_file.tell() + len(blob) > self.max_pack_size:
+                        self._pack_file.close()
+                        self._pack_number += 1
+                        self._pack_file = open(self._pack_path(self._pack_number), "ab")
+                    offset = self._pack_file.tell()
+                    self._pack_file.write(blob)
+                    self.blobs[digest] = (self._pack_number, offset, len(blob), self.codec)
+                pack, offset, length, codec = self.blobs[digest]
+                entries.append({"key": filename, "digest": digest, "pack": pack, "offset": offset,
+                                "length": length, "codec": codec, "size": len(payload),
+                                "metadata": metadata or {}})
+            # the blobs must be on disk before index lines point to them
+            self._pack_file.flush()
+            os.fsync(self._pack_file.fileno())
+            self._index_file.write("".join(json.dumps(entry) + "\n" for entry in entries))
+            self._index_file.flush()
+            os.fsync(self._index_file.fileno())
+            for entry in entries:
+                self.keys[entry["key"]] = entry
+        return [entry["digest"] for entry in entries]
+
+    def _pack_map(self, pack: int, end: int) -> mmap.mmap:
+        """mmap of a pack file, remapped when it has grown past the mapped size"""
+        if pack in self._maps and self._map_sizes[pack] >= end:
+            return self._maps[pack]
+        if pack in self._maps:
+            self._maps.pop(pack).close()
+        with open(self._pack_path(pack), "rb") as f:
+            self._maps[pack] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._map_sizes[pack] = len(self._maps[pack])
+        return self._maps[pack]
+
+    def load(self, filename: str) -> bytes:
+        entry = self.keys[filename]
+        with self._lock:
+            pack_map = self._pack_map(entry["pack"], entry["offset"] + entry["length"])
+            blob = pack_map[entry["offset"]:entry["offset"] + entry["length"]]
+        return self._decompress(blob, entry["codec"])
+
+    def metadata(self, filename: str) -> Dict[str, Any]:
+        return self.keys[filename]["metadata"]
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def iter_items(self) -> Iterator[Tuple[str, bytes, Dict[str, Any]]]:
+        """(key, data, metadata) of every stored key, in pack order for sequential reads"""
+        entries = sorted(self.keys.values(), key=lambda entry: (entry["pack"], entry["offset"]))
+        for entry in entries:
+            yield entry["key"], self.load(entry["key"]), entry["metadata"]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "keys": len(self.keys),
+            "blobs": len(self.blobs),
+            "raw_bytes": sum(entry["size"] for entry in self.keys.values()),
+            "stored_bytes": sum(length for _, _, length, _ in self.blobs.values()),
+        }
+
+    def close(self):
+        with self._lock:
+            for pack_map in self._maps.values():
+                pack_map.close()
+            self._maps.clear()
+            if not self._pack_file.closed:
+                self._pack_file.close()
+                self._index_file.close()
@@ -0,0 +1,152 @@
+"""
+Record sinks: write crawl/parse records one at a time as they are produced, so output
+never has to be held in memory as a whole.
+
+Example usage:
+    with JsonlShardSink("crawl_output", records_per_shard=500) as sink:
+        stream_records(({"url": url, "text": text} for url, text in pages), sink)
+    sink.shard_paths  # gzipped JSONL shards, ready for download
+"""
+import gzip
+import json
+import os
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from askharrison.dataSink.base import DataSink
+
+Record = Dict[str, Any]
+
+
+class RecordSink:
+    def write(self, record: Record):
+        """Write one record."""
+        raise NotImplementedError("Must be implemented by subclasses.")
+
+    def close(self):
+        """Flush and release resources, records written so far must be durable afterwards."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonlShardSink(RecordSink):
+    def __init__(self, directory: str, records_per_shard: int = 1000, compress: bool = True,
+                 prefix: str = "records"):
+        """
+        :param directory: output directory, created if missing
+        :param records_per_shard: records per shard file, bounds the size of each download
+        :param compress: gzip shards (.jsonl.gz), otherwise plain .jsonl
+        :param prefix: shard file name prefix, shards are {prefix}-00000.jsonl.gz, ...
+        """
+        self.directory = directory
+        self.records_per_shard = records_per_shard
+        self.compress = compress
+        self.prefix = prefix
+        self.shard_paths: List[str] = []
+        self.records_written = 0
+        self._file = None
+        self._records_in_shard = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _open_shard(self):
+        extension = "jsonl.gz" if self.compress else "jsonl"
+        path = os.path.join(self.directory, f"{self.prefix}-{len(self.shard_paths):05d}.{extension}")
+        self._file = gzip.open(path, "wt", encoding="utf-8") if self.compress else open(path, "w", encoding="utf-8")
+        self.shard_paths.append(path)
+        self._records_in_shard = 0
+
+    def write(self, record: Record):
+        if self._file is None or self._records_in_shard >= self.records_per_shard:
+            self._close_shard()
+            self._open_shard()
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n")
+        self._records_in_shard += 1
+        self.records_written += 1
+
+    def _close_shard(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self):
+        self._close_shard()
+
+
+def read_jsonl_shards(paths: Iterable[str]) -> Iterable[Record]:
+    """stream the records of JSONL shards (gzipped or not) back"""
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+
+class DataSinkRecordSink(RecordSink):
+    """writes each record as its own object through a DataSink"""
+
+    def __init__(self, data_sink: DataSink, filename_fn: Callable[[Record], str],
+                 metadata_fn: Optional[Callable[[Record], Dict[str, Any]]] = None):
+        """
+        :param data_sink: e.g. LocalFileDataSink
+        :param filename_fn: record -> object name
+        :param metadata_fn: record -> metadata, defaults to no metadata
+        """
+        self.data_sink = data_sink
+        self.filename_fn = filename_fn
+        self.metadata_fn = metadata_fn or (lambda record: {})
+
+    def write(self, record: Record):
+        self.data_sink.save(json.dumps(record, ensure_ascii=False), self.filename_fn(record), self.metadata_fn(record))
+
+    def close(self):
+        close = getattr(self.data_sink, "close", None)
+        if close:
+            close()
+
+
+_DONE = object()
+
+
+def stream_records(records: Iterable[Record], sink: RecordSink, max_in_flight: int = 64) -> int:
+    """
+    Write records to sink from a writer thread, while the caller keeps producing them.
+    At most max_in_flight records are buffered: a slow sink blocks the producer instead of
+    letting memory grow. Returns the number of records written; writer errors are re-raised.
+    """
+    buffer = queue.Queue(maxsize=max_in_flight)
+    errors = []
+    written = 0
+
+    def writer():
+        nonlocal written
+        while True:
+            record = buffer.get()
+            if record is _DONE:
+                return
+            if errors:
+                continue  # keep draining so the producer never blocks on a dead writer
+            try:
+                sink.write(record)
+                written += 1
+            except Exception as e:
+                errors.append(e)
+
+    thread = threading.Thread(target=writer, daemon=True)
+    thread.start()
+    try:
+        for record in records:
+            if errors:
+                break
+            buffer.put(record)
+    finally:
+        buffer.put(_DONE)
+        thread.join()
+    if errors:
+        raise errors[0]
+    return written
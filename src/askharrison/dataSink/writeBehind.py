@@ -0,0 +1,107 @@
+import logging
+import queue
+import threading
+from typing import List, Optional
+
+from askharrison.dataSink.base import DataSink
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class WriteBehindDataSink(DataSink):
+    """
+    Write-behind buffer in front of any DataSink: save() only enqueues, a few writer
+    threads drain the queue in batches and hand each batch to the wrapped sink's
+    save_many, so crawl and parse workers don't wait on disk or network.
+
+    - backpressure: at most max_pending objects are buffered, save() blocks when full
+    - flush() returns once everything saved so far has been written
+    - close() flushes, stops the writers and closes the wrapped sink; nothing saved
+      before close is lost
+    Errors of the wrapped sink are re-raised by the next flush/close (or save).
+
+    Example usage:
+        with WriteBehindDataSink(S3DataSink("my-bucket", prefix="crawl/"), max_pending=512) as sink:
+            for url, text in pages:
+                sink.save(text, url_to_filename(url), {"url": url})
+    """
+
+    def __init__(self, sink: DataSink, max_pending: int = 256, batch_size: int = 32, workers: int = 4):
+        """
+        :param sink: sink doing the actual writes, must be thread safe for workers > 1
+        :param max_pending: buffered objects before save() blocks
+        :param batch_size: objects a writer takes from the buffer at once
+        :param workers: writer threads
+        """
+        self.sink = sink
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._errors: List[BaseException] = []
+        self._closed = False
+        self._workers = [threading.Thread(target=self._run, daemon=True) for _ in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def _next_batch(self) -> Optional[list]:
+        item = self._queue.get()
+        if item is _STOP:
+            self._queue.task_done()
+            return None
+        batch = [item]
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # leave the stop marker for this or another writer, after this batch
+                self._queue.task_done()
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self.sink.save_many(batch)
+            except Exception as e:
+                logger.error(f"Saving a batch of {len(batch)} failed: {e}")
+                self._errors.append(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _raise_errors(self):
+        if self._errors:
+            errors, self._errors = self._errors, []
+            raise errors[0]
+
+    def save(self, data, filename, metadata):
+        if self._closed:
+            raise ValueError("save on a closed WriteBehindDataSink")
+        self._raise_errors()
+        self._queue.put((data, filename, metadata))
+
+    def flush(self):
+        self._queue.join()
+        self._raise_errors()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.join()
+            for _ in self._workers:
+                self._queue.put(_STOP)
+            for worker in self._workers:
+                worker.join()
+        finally:
+            self.sink.close()
+        self._raise_errors()
@@ -1,72 +1,84 @@
-import requests
 from bs4 import BeautifulSoup
 import logging
 
+from askharrison.crawl.contentDedup import ContentDeduplicator, DedupResult
+from askharrison.crawl.crawlerEngine import CrawlerEngine
+
 # Set up logging to display in Jupyter Notebook
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 logger = logging.getLogger(__name__)
 
 class SidebarCrawler:
-    def __init__(self):
+    """
+    Crawls a docs site through its sidebars (or lists), fetching pages concurrently
+    with CrawlerEngine: per-host rate limits, robots.txt, timeouts and a page budget.
+
+    Example usage:
+        crawler = SidebarCrawler(CrawlerEngine(max_workers=8, max_pages=3000))
+        data = crawler.crawl("https://docs.trychroma.com/")
+    """
+    def __init__(self, engine: CrawlerEngine = None):
+        self.engine = engine or CrawlerEngine()
         self.visited_urls = set()
         self.data = {}
-        self.source_soup = None
 
-    def extract_sidebar(self, url):
-        logger.info(f"Extracting sidebar from URL: {url}")
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        self.source_soup = soup
-        
+    @staticmethod
+    def parse_sidebar(url, html):
+        soup = BeautifulSoup(html, 'html.parser')
         sidebars = soup.find_all(id=lambda x: x and 'sidebar' in x) + \
                    soup.find_all(class_=lambda x: x and 'sidebar' in x)
-        
+
         if not sidebars:
             logger.warning(f"No sidebar found in URL: {url}")
-            return
-        
-        for sidebar in sidebars:
-            content = [item.get_text(strip=True) for item in sidebar.find_all(['p', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])]
-            links = [a['href'] for a in sidebar.find_all('a', href=True) if a['href'].startswith('http')]
-            
-            self.data[url] = {
-                'content': content,
-                'links': links
-            }
-            
-            for link in links:
-                if link not in self.visited_urls:
-                    self.visited_urls.add(link)
-                    self.extract_sidebar(link)
+            return None, []
 
-    def extract_from_lists(self, url):
-        logger.info(f"Extracting list elements from URL: {url}")
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
+        content, links = [], []
+        for sidebar in sidebars:
+            content.extend(item.get_text(strip=True) for item in sidebar.find_all(['p', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']))
+            links.extend(a['href'] for a in sidebar.find_all('a', href=True) if a['href'].startswith('http'))
+        return {'content': content, 'links': links}, links
 
+    @staticmethod
+    def parse_lists(url, html):
+        soup = BeautifulSoup(html, 'html.parser')
         lists = soup.find_all(['ul', 'ol'])
         logger.info(f"Found {len(lists)} lists in URL: {url}")
-        return lists
 
+        content, links = [], []
         for lst in lists:
-            content = [item.get_text(strip=True) for item in lst.find_all('li')]
-            logger.debug(f"Found {len(content)} list elements in URL: {url}")
-            links = [a['href'] for a in lst.find_all('a', href=True) if a['href'].startswith('http')]
-            if content or links:
-                if url not in self.data:
-                    self.data[url] = {'content': [], 'links': []}
-                
-                self.data[url]['content'].extend(content)
-                self.data[url]['links'].extend(links)
+            content.extend(item.get_text(strip=True) for item in lst.find_all('li'))
+            links.extend(a['href'] for a in lst.find_all('a', href=True) if a['href'].startswith('http'))
+        if not content and not links:
+            return None, []
+        return {'content': content, 'links': links}, links
+
+    def _crawl_with(self, url, parse_page):
+        for result in self.engine.crawl(url, parse_page=parse_page):
+            self.visited_urls.add(result.url)
+            if result.data is not None:
+                self.data[result.url] = result.data
+        return self.data
+
+    def extract_sidebar(self, url):
+        logger.info(f"Extracting sidebar from URL: {url}")
+        return self._crawl_with(url, self.parse_sidebar)
+
+    def extract_from_lists(self, url):
+        logger.info(f"Extracting list elements from URL: {url}")
+        return self._crawl_with(url, self.parse_lists)
 
-                for link in links:
-                    if link not in self.visited_urls:
-                        self.visited_urls.add(link)
-                        self.extract_from_lists(link)
+    def deduplicate(self, deduplicator: ContentDeduplicator = None) -> DedupResult:
+        """
+        Collapse duplicate pages and drop content items repeated on most pages (the sidebar
+        itself, navigation). Returns the DedupResult, self.data keeps the deduplicated pages.
+        """
+        deduplicator = deduplicator or ContentDeduplicator()
+        result = deduplicator.deduplicate({url: page['content'] for url, page in self.data.items()})
+        self.data = {url: {'content': content, 'links': self.data[url]['links']}
+                     for url, content in result.pages.items()}
+        return result
 
     def crawl(self, start_url):
         logger.info(f"Starting crawl from URL: {start_url}")
-        self.visited_urls.add(start_url)
-        self.extract_from_lists(start_url)
-        return self.data
\ No newline at end of file
+        return self.extract_from_lists(start_url)
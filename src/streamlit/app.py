@@ -1,28 +1,66 @@
 import streamlit as st
-from askharrison.crawl.hrefCrawler import HrefCrawler
+from askharrison.crawl.crawlerEngine import CrawlerEngine, extract_links
 from askharrison.crawl.html_to_text import html_to_text
-import json
+from askharrison.crawl.contentDedup import ContentDeduplicator, DedupResult
+from askharrison.dataSink.recordSink import JsonlShardSink, stream_records
 import time
 import logging 
 import os
+import shutil
+import tempfile
+import zipfile
 
 logger = logging.getLogger(__name__)
 
 
-def crawl_data(base_url):
+def crawl_records(base_url, dedup_result, progress=None):
+    """yield {'url', 'text'} records as pages are crawled, without duplicates and boilerplate"""
+    def parse_page(url, content):
+        # stay under the base URL, like HrefCrawler
+        _, links = extract_links(url, content)
+        return None, [link for link in links if link.startswith(base_url)]
+
+    def pages():
+        for count, result in enumerate(CrawlerEngine().crawl(base_url, parse_page=parse_page), start=1):
+            if progress is not None:
+                progress.text(f"Crawled {count} pages: {result.url}")
+            if result.ok and result.content:
+                yield result.url, html_to_text(result.content.decode(errors='replace'))
+
+    for url, text in ContentDeduplicator().iter_deduplicate(pages(), dedup_result):
+        yield {'url': url, 'text': text}
+
+
+def crawl_data(base_url, output_dir, progress=None):
+    """crawl base_url into gzipped JSONL shards in output_dir, returns the shard paths"""
     try:
-        # Instantiate the crawler
-        crawler = HrefCrawler()
-        
-        # Perform the crawling
-        results = crawler.crawl_from_url(base_url)
-        
-        url_to_html = {url: html_to_text(html.decode()) for url, html in results.items()}
-        
-        return url_to_html
+        dedup_result = DedupResult()
+        with JsonlShardSink(output_dir, records_per_shard=500) as sink:
+            stream_records(crawl_records(base_url, dedup_result, progress), sink)
+        st.write(f"Removed {len(dedup_result.duplicates)} duplicate pages, "
+                 f"{dedup_result.saved_ratio:.0%} of the text.")
+        st.session_state['records_written'] = sink.records_written
+        return sink.shard_paths
     except Exception as e:
         st.error(f'An error occurred: {e}')
-        return {}
+        return []
+
+def zip_shards(shard_paths, zip_path):
+    """
+    zip the shards into zip_path, stored without recompressing the already gzipped files;
+    each shard is removed once archived, so the crawl is on disk only once
+    """
+    with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for path in shard_paths:
+            archive.write(path, arcname=os.path.basename(path))
+            os.remove(path)
+    return zip_path
+
+
+def remove_crawl_dir():
+    crawl_dir = st.session_state.pop('crawl_dir', None)
+    if crawl_dir:
+        shutil.rmtree(crawl_dir, ignore_errors=True)
 
 st.title('Website Crawler App')
 # hide menu
@@ -38,14 +76,28 @@ input_url = st.text_input('Enter the URL to crawl:', 'https://docs.trychroma.com
 
 # Button to start crawling
 if st.button('Crawl URL'):
+    # the shards of a previous crawl are not needed anymore
+    remove_crawl_dir()
+    st.session_state.pop('crawl_zip', None)
+    st.session_state['crawl_dir'] = tempfile.mkdtemp(prefix='crawl-')
     with st.spinner('Crawling...'):
-        crawled_data = crawl_data(input_url)
-    if crawled_data:
-        st.write(f"Fetched {len(crawled_data)} pages.")
-        json_to_download = json.dumps(crawled_data, indent=4)
-        st.download_button(label='Download JSON',
-                            data=json_to_download,
-                            file_name='crawled_data.json',
-                            mime='application/json')
-
-        
\ No newline at end of file
+        st.session_state['shard_paths'] = crawl_data(input_url, st.session_state['crawl_dir'], st.empty())
+    if not st.session_state['shard_paths']:
+        remove_crawl_dir()
+
+# the shards are zipped once, when asked for, into a file next to them; session state only
+# keeps its path and the download is read from disk
+shard_paths = st.session_state.get('shard_paths', [])
+if shard_paths:
+    st.write(f"Fetched {st.session_state.get('records_written', 0)} pages in {len(shard_paths)} shards.")
+    if 'crawl_zip' not in st.session_state and st.button('Prepare download'):
+        with st.spinner('Zipping...'):
+            st.session_state['crawl_zip'] = zip_shards(
+                shard_paths, os.path.join(st.session_state['crawl_dir'], 'crawl.zip'))
+    zip_path = st.session_state.get('crawl_zip')
+    if zip_path and os.path.exists(zip_path):
+        with open(zip_path, 'rb') as zip_file:
+            st.download_button(label='Download crawl.zip',
+                               data=zip_file,
+                               file_name='crawl.zip',
+                               mime='application/zip')
@@ -3,6 +3,10 @@ from askharrison.llmparse.schema_recommender import SchemaGenerator
 from askharrison.llm.openai_llm_client import OpenAIClient
 from askharrison.llm.token_util import clip_text_by_token
 from askharrison.llmparse.document_parser import DocumentParser, ParsingConfig
+try:
+    from askharrison.llmparse.baml_parser import BAML_SCHEMA_FUNCTIONS
+except ImportError:  # BAML backend not installed, DocumentParser uses prompt parsing only
+    BAML_SCHEMA_FUNCTIONS = {}
 import json
 import tempfile
 import os
@@ -104,6 +108,12 @@ if uploaded_file and st.session_state.api_key:
                 })
             except Exception as e:
                 st.error(f"Error generating schema: {str(e)}")
+    with col2:
+        # known schemas are extracted with the typed BAML client instead of the JSON prompt
+        if BAML_SCHEMA_FUNCTIONS:
+            builtin_schema = st.selectbox("Or use a built-in schema", ["", *BAML_SCHEMA_FUNCTIONS])
+            if builtin_schema and st.button("Use Built-in Schema"):
+                st.session_state.schema = {"title": builtin_schema}
     
     # Schema display and editing
     # Schema display and editing
@@ -193,6 +203,24 @@ if uploaded_file and st.session_state.api_key:
                 except Exception as e:
                     st.error(f"Error parsing preview: {str(e)}")
         
+        document_parser = st.session_state.document_parser
+        if document_parser.baml_parser and document_parser.baml_parser.supports(st.session_state.schema):
+            if st.button("Stream Parse (BAML)"):
+                partial_placeholder = st.empty()
+                chunk_results = []
+                try:
+                    for partial in document_parser.baml_parser.stream_document(
+                        st.session_state.document_content,
+                        st.session_state.schema
+                    ):
+                        partial_placeholder.json(partial)
+                        if partial["final"]:
+                            chunk_results.append(partial)
+                    st.session_state.parsed_doc = chunk_results[0] if len(chunk_results) == 1 else chunk_results
+                    partial_placeholder.empty()
+                except Exception as e:
+                    st.error(f"Error streaming document: {str(e)}")
+        
         # Display parsing results
         if st.session_state.parsed_doc:
             st.header("Parsed Results")
@@ -3,8 +3,15 @@ from askharrison.llmparse.schema_recommender import SchemaGenerator
 from askharrison.llm.openai_llm_client import OpenAIClient
 from askharrison.llm.token_util import clip_text_by_token
 from askharrison.llmparse.document_parser import DocumentParser, ParsingConfig
+try:
+    from askharrison.llmparse.baml_parser import BAML_SCHEMA_FUNCTIONS
+except ImportError:  # BAML backend not installed, DocumentParser uses prompt parsing only
+    BAML_SCHEMA_FUNCTIONS = {}
+from askharrison.api_client import get_api_client
+from askharrison.job_queue import IN_FLIGHT, get_job_runner
 import json
 import tempfile
+import time
 import os
 
 st.set_page_config(page_title="Interactive Document Parser", layout="wide")
@@ -35,6 +42,41 @@ def initialize_clients():
             return False
     return False
 
+def parse_document(document, schema):
+    """parse with the API workers when ASKHARRISON_API_URL is set, in this process otherwise"""
+    api_client = get_api_client()
+    if api_client is not None:
+        return api_client.parse_document(document, schema, api_key=st.session_state.api_key)
+    return st.session_state.document_parser.parse_document(document, schema)
+
+def show_parse_job(job_id):
+    """progress of a parse job, its result goes to parsed_doc when done; survives page refreshes"""
+    runner = get_job_runner()
+    job = runner.store.get(job_id)
+    if job is None or job["kind"] != "parse_document":
+        del st.query_params["parse_job"]
+        return
+    if job["status"] in IN_FLIGHT:
+        st.progress(job["progress"], text=job["message"] or "Waiting for a worker...")
+        if st.button("Cancel parsing"):
+            runner.store.cancel(job_id)
+        time.sleep(1)
+        st.rerun()
+    elif job["status"] == "done":
+        if st.session_state.get("loaded_parse_job") != job_id:
+            st.session_state.parsed_doc = job["result"]
+            st.session_state.loaded_parse_job = job_id
+        if not st.session_state.document_content:
+            # the upload is gone after a refresh, show the result here
+            st.header("Parsed Results")
+            st.json(job["result"])
+    else:
+        del st.query_params["parse_job"]
+        if job["status"] == "cancelled":
+            st.warning("Parsing cancelled.")
+        else:
+            st.error(f"Error parsing document: {job['error']}")
+
 def save_uploaded_file(uploaded_file):
     with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp_file:
         tmp_file.write(uploaded_file.getvalue())
@@ -70,6 +112,9 @@ with st.sidebar:
 # Main content area
 st.title("Interactive Document Parser")
 
+if st.query_params.get("parse_job"):
+    show_parse_job(st.query_params["parse_job"])
+
 # File upload section
 uploaded_file = st.file_uploader("Upload a document", type=['txt', 'pdf', 'docx'])
 if uploaded_file and st.session_state.api_key:
@@ -104,6 +149,12 @@ if uploaded_file and st.session_state.api_key:
                 })
             except Exception as e:
                 st.error(f"Error generating schema: {str(e)}")
+    with col2:
+        # known schemas are extracted with the typed BAML client instead of the JSON prompt
+        if BAML_SCHEMA_FUNCTIONS:
+            builtin_schema = st.selectbox("Or use a built-in schema", ["", *BAML_SCHEMA_FUNCTIONS])
+            if builtin_schema and st.button("Use Built-in Schema"):
+                st.session_state.schema = {"title": builtin_schema}
     
     # Schema display and editing
     # Schema display and editing
@@ -167,14 +218,13 @@ if uploaded_file and st.session_state.api_key:
         
         with col1:
             if st.button("Parse Document"):
-                try:
-                    parsed_output = st.session_state.document_parser.parse_document(
-                        st.session_state.document_content,
-                        st.session_state.schema
-                    )
-                    st.session_state.parsed_doc = parsed_output
-                except Exception as e:
-                    st.error(f"Error parsing document: {str(e)}")
+                # whole documents are parsed as a background job, see show_parse_job
+                st.query_params["parse_job"] = get_job_runner().submit(
+                    "parse_document",
+                    {"document": st.session_state.document_content, "schema": st.session_state.schema},
+                    secrets={"api_key": st.session_state.api_key}
+                )
+                st.rerun()
         
         with col2:
             if st.button("Parse Preview"):
@@ -185,7 +235,7 @@ if uploaded_file and st.session_state.api_key:
                         st.session_state.document_content,
                         st.session_state.preview_tokens
                     )
-                    parsed_preview = st.session_state.document_parser.parse_document(
+                    parsed_preview = parse_document(
                         preview_text,
                         st.session_state.schema
                     )
@@ -193,6 +243,24 @@ if uploaded_file and st.session_state.api_key:
                 except Exception as e:
                     st.error(f"Error parsing preview: {str(e)}")
         
+        document_parser = st.session_state.document_parser
+        if document_parser.baml_parser and document_parser.baml_parser.supports(st.session_state.schema):
+            if st.button("Stream Parse (BAML)"):
+                partial_placeholder = st.empty()
+                chunk_results = []
+                try:
+                    for partial in document_parser.baml_parser.stream_document(
+                        st.session_state.document_content,
+                        st.session_state.schema
+                    ):
+                        partial_placeholder.json(partial)
+                        if partial["final"]:
+                            chunk_results.append(partial)
+                    st.session_state.parsed_doc = chunk_results[0] if len(chunk_results) == 1 else chunk_results
+                    partial_placeholder.empty()
+                except Exception as e:
+                    st.error(f"Error streaming document: {str(e)}")
+        
         # Display parsing results
         if st.session_state.parsed_doc:
             st.header("Parsed Results")
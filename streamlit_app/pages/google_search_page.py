@@ -2,7 +2,8 @@ import streamlit as st
 import pandas as pd
 from typing import List, Dict
 import datetime
-from dataclasses import dataclass, asdict
+import time
+from dataclasses import asdict
 import json
 import os
 from PIL import Image
@@ -10,10 +11,8 @@ import logging
 
 # Importing required functions from the original script
 from askharrison.SearchDatabase import SearchDatabase
-from askharrison.prompts.query_expansion import generate_search_queries, generate_diffusion_search_queries
-from askharrison.google_search import run_multiple_google_queries
-from askharrison.prompts.content_curation import create_google_reranking_prompt
-from askharrison.llm_models import process_question, safe_eval, extract_python_code
+from askharrison.search_service import SearchResult, records_to_rerank
+from askharrison.job_queue import IN_FLIGHT, get_job_runner
 
 logger = logging.getLogger(__name__)
 
@@ -25,63 +24,16 @@ st.set_page_config(page_title="Advanced Search App",
     initial_sidebar_state="expanded"
 )
 
-@dataclass
-class SearchResult:
-    query: str
-    title: str
-    link: str
-    snippet: str
-
 querytype_to_index = {
     "disable": 0,
     "normal": 1,
     "diverse": 2
 }
 
-class SearchService:
-    @staticmethod
-    def expand_queries(problem: str, num_queries: int, query_type: str) -> List[str]:
-        if query_type == "normal":
-            return generate_search_queries(problem, num_queries, "google")
-        elif query_type == "diverse":
-            return generate_diffusion_search_queries(problem, num_queries, "google")
-        elif query_type == "disable":
-            return [problem]
-        else:
-            raise ValueError("Invalid query type")
-
-    @staticmethod
-    def perform_search(queries: List[str]) -> List[SearchResult]:
-        query_results = run_multiple_google_queries(queries)
-        processed_results = []
-        for query, result in query_results.items():
-            for item in result.get("items", []):
-                processed_results.append(SearchResult(
-                    query=query,
-                    title=item["title"],
-                    link=item["link"],
-                    snippet=item["snippet"]
-                ))
-        return processed_results
-
-    @staticmethod
-    def rerank_results(problem: str, results: List[SearchResult], top_k: int) -> pd.DataFrame:
-        results_dict = [asdict(r) for r in results]
-        reranking_prompt = create_google_reranking_prompt(problem, results_dict, top_k=top_k)
-        reranking_output = process_question(reranking_prompt, model="gpt-4o")
-        python_code = extract_python_code(reranking_output)
-        llm_output_objs = safe_eval(python_code)
-        
-        llm_output_df = pd.DataFrame(llm_output_objs)
-        results_df = pd.DataFrame(results_dict)
-        results_df_filtered = results_df[results_df.index.isin(llm_output_df['idx']-1)]
-        
-        final_df = pd.concat([results_df_filtered.reset_index(), llm_output_df], axis=1).sort_values("overall", ascending=False)
-        return final_df.dropna()[['title', 'link', 'snippet', 'overall']]
-
 class StreamlitApp:
     def __init__(self):
-        self.search_service = SearchService()
+        # long-running searches run as jobs, so reruns and refreshes neither kill nor repeat them
+        self.job_runner = get_job_runner()
         self.search_db = SearchDatabase()
         self.initialize_session_state()
 
@@ -100,6 +52,8 @@ class StreamlitApp:
             st.session_state.search_results = []
         if 'reranked_results' not in st.session_state:
             st.session_state.reranked_results = None
+        if 'sources' not in st.session_state:
+            st.session_state.sources = ["google"]
 
     def _save_search_results(self):
         search_data = {
@@ -150,6 +104,7 @@ class StreamlitApp:
                                                )
         st.session_state.num_queries = st.slider("Number of queries to generate:", 5, 20, st.session_state.num_queries)
         st.session_state['top_k'] = st.slider("Number of results to rerank:", min_value=10, max_value=50, value=10)
+        st.session_state.sources = st.multiselect("Sources:", ["google", "arxiv"], default=st.session_state.sources)
 
         if st.button("Search"):
             if st.session_state.problem:
@@ -157,26 +112,51 @@ class StreamlitApp:
             else:
                 st.error("Please enter a search problem before proceeding.")
 
+        job_id = st.query_params.get("job")
+        if job_id:
+            self._poll_search_job(job_id)
+
         if st.session_state.reranked_results is not None:
             self._display_results()
 
     def _perform_search(self):
-        try:
-            with st.spinner("Expanding queries..."):
-                st.session_state.expanded_queries = self.search_service.expand_queries(
-                    st.session_state.problem, st.session_state.num_queries, st.session_state.query_type
-                )
-
-            with st.spinner("Performing search..."):
-                st.session_state.search_results = self.search_service.perform_search(st.session_state.expanded_queries)
-
-            with st.spinner("Reranking results..."):
-                st.session_state.reranked_results = self.search_service.rerank_results(
-                    st.session_state.problem, st.session_state.search_results, top_k=st.session_state.top_k
-                )
-
-        except Exception as e:
-            st.error(f"An error occurred: {str(e)}")
+        # the search runs as a background job, the job id in the url lets a refreshed page pick it up again
+        job_id = self.job_runner.submit("search", {
+            "problem": st.session_state.problem,
+            "num_queries": st.session_state.num_queries,
+            "query_type": st.session_state.query_type,
+            "top_k": st.session_state.top_k,
+            "sources": st.session_state.sources or ["google"],
+        })
+        st.query_params["job"] = job_id
+
+    def _poll_search_job(self, job_id: str):
+        job = self.job_runner.store.get(job_id)
+        if job is None or job["kind"] != "search":
+            del st.query_params["job"]
+            return
+        if job["status"] in IN_FLIGHT:
+            st.progress(job["progress"], text=job["message"] or "Waiting for a worker...")
+            if st.button("Cancel search"):
+                self.job_runner.store.cancel(job_id)
+            time.sleep(1)
+            st.rerun()
+        elif job["status"] == "done":
+            if st.session_state.get("loaded_job") != job_id:
+                params, result = job["params"], job["result"]
+                st.session_state.problem = params["problem"]
+                st.session_state.query_type = params["query_type"]
+                st.session_state.num_queries = params["num_queries"]
+                st.session_state.expanded_queries = result["queries"]
+                st.session_state.search_results = [SearchResult(**r) for r in result["results"]]
+                st.session_state.reranked_results = records_to_rerank(result["reranked"])
+                st.session_state.loaded_job = job_id
+        else:
+            del st.query_params["job"]
+            if job["status"] == "cancelled":
+                st.warning("Search cancelled.")
+            else:
+                st.error(f"An error occurred: {job['error']}")
     
     @staticmethod
     def _sanitize_filename(text: str, max_length: int = 30) -> str:
@@ -0,0 +1,69 @@
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class FixtureSite:
+    """
+    Local HTTP site for crawler tests.
+
+    pages maps a path to its HTML, robots_txt is served at /robots.txt. Every
+    response carries an ETag, If-None-Match is answered with 304. Requests are
+    recorded in requests as (path, status).
+    """
+
+    def __init__(self, pages, robots_txt=""):
+        self.pages = pages
+        self.robots_txt = robots_txt
+        self.requests = []
+        self.lock = threading.Lock()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path
+                if path == "/robots.txt":
+                    body, status = site.robots_txt.encode(), 200
+                elif path in site.pages:
+                    body, status = site.pages[path].encode(), 200
+                else:
+                    body, status = b"not found", 404
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    status, body = 304, b""
+                with site.lock:
+                    site.requests.append((path, status))
+                self.send_response(status)
+                self.send_header("Content-Type", "text/plain" if path == "/robots.txt" else "text/html")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def fetched_paths(self, status=200):
+        return [path for path, response_status in self.requests if response_status == status]
+
+
+@pytest.fixture
+def fixture_site():
+    """factory fixture: fixture_site(pages, robots_txt) starts a local site, stopped after the test"""
+    sites = []
+
+    def start(pages, robots_txt=""):
+        site = FixtureSite(pages, robots_txt)
+        threading.Thread(target=site.server.serve_forever, daemon=True).start()
+        sites.append(site)
+        return site
+
+    yield start
+    for site in sites:
+        site.server.shutdown()
+        site.server.server_close()
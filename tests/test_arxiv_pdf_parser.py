@@ -0,0 +1,146 @@
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from askharrison.crawl.arXivPDFParser import ArXivPDFParser, extract_page_lines
+
+
+def make_pdf(path, num_pages=3):
+    """each page: a 14pt heading, two 10pt body lines and a small PNG on the first page"""
+    document = fitz.open()
+    for page_num in range(num_pages):
+        page = document.new_page()
+        page.insert_text((72, 72), f"{page_num + 1} Heading", fontsize=14)
+        page.insert_text((72, 100), f"first line of page {page_num + 1}", fontsize=10)
+        page.insert_text((72, 120), f"second line of page {page_num + 1}", fontsize=10)
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 4, 4), False)
+    pixmap.set_rect(pixmap.irect, (255, 0, 0))
+    png = pixmap.tobytes("png")
+    document[0].insert_image(fitz.Rect(300, 300, 340, 340), stream=png)
+    document.save(path)
+    document.close()
+    return png
+
+
+def page_texts(pages):
+    return [[''.join(span[0] for span in line) for line in page_lines] for page_lines in pages]
+
+
+def test_extract_page_lines_keeps_reading_order(tmp_path):
+    path = str(tmp_path / "paper.pdf")
+    make_pdf(path)
+
+    pages = extract_page_lines(path, 1, 3)
+    assert page_texts(pages) == [
+        ["2 Heading", "first line of page 2", "second line of page 2"],
+        ["3 Heading", "first line of page 3", "second line of page 3"],
+    ]
+    text, size, _ = pages[0][0][0]
+    assert text == "2 Heading" and size == pytest.approx(14)
+
+
+@pytest.mark.parametrize("pages_per_worker", [8, 1])
+def test_iter_page_lines_yields_pages_in_order(tmp_path, pages_per_worker):
+    path = str(tmp_path / "paper.pdf")
+    make_pdf(path, num_pages=5)
+
+    # pages_per_worker=1 spreads the pages over a process pool
+    parser = ArXivPDFParser(path, max_workers=2, pages_per_worker=pages_per_worker)
+    headings = [page[0] for page in page_texts(parser.iter_page_lines())]
+    assert headings == [f"{i} Heading" for i in range(1, 6)]
+
+
+def test_sample_pages_come_first_from_the_same_pool(tmp_path):
+    path = str(tmp_path / "paper.pdf")
+    make_pdf(path, num_pages=5)
+
+    samples = []
+    parser = ArXivPDFParser(path, max_workers=2, pages_per_worker=1)
+    pages = parser.iter_page_lines([0, 2, 4], on_sample=samples.append)
+    first = next(pages)
+    # the sample was handed over before the first page, and is not extracted again
+    assert [[page[0] for page in page_texts(sample)] for sample in samples] == [["1 Heading", "3 Heading", "5 Heading"]]
+    headings = [page[0] for page in page_texts([first, *pages])]
+    assert headings == [f"{i} Heading" for i in range(1, 6)]
+
+
+def test_image_bytes_round_trip(tmp_path):
+    path = str(tmp_path / "paper.pdf")
+    png = make_pdf(path)
+
+    parser = ArXivPDFParser(path)
+    parser.extract_tables()
+    assert [table['page'] for table in parser.tables] == [1]
+
+    image = fitz.Pixmap(parser.get_image_bytes(parser.tables[0]['xref']))
+    original = fitz.Pixmap(png)
+    assert (image.width, image.height) == (original.width, original.height)
+    assert image.samples == original.samples
+
+
+BODY = "body text of the paper which goes on for quite a while here"
+
+
+def make_paper(path, pages):
+    """pages: lists of (text, font size) lines"""
+    document = fitz.open()
+    for lines in pages:
+        page = document.new_page()
+        for i, (text, size) in enumerate(lines):
+            page.insert_text((72, 60 + 22 * i), text, fontsize=size)
+    document.save(path)
+    document.close()
+
+
+def test_wrapped_headings_merge_but_adjacent_numbered_headings_do_not(tmp_path):
+    path = str(tmp_path / "paper.pdf")
+    make_paper(path, [[
+        ("Streaming Sections From", 20), ("Synthetic Papers", 20),
+        ("1 Introduction", 14), *[(BODY, 10)] * 12,
+        ("2 Related Work", 14),
+        ("3 Method", 14), *[(BODY, 10)] * 8,
+        ("3.1 Setup", 12), *[(BODY, 10)] * 8,
+    ]])
+
+    sections = [(name, level, bool(text)) for name, level, text in ArXivPDFParser(path).iter_leveled_sections()]
+    assert sections == [
+        ("Introduction", 1, False),
+        ("Streaming Sections From Synthetic Papers", 1, False),
+        ("1 Introduction", 2, True),
+        ("2 Related Work", 2, False),
+        ("3 Method", 2, True),
+        ("3.1 Setup", 3, True),
+    ]
+
+    parser = ArXivPDFParser(path).to_markdown_parser()
+    assert [section.path for section in parser.sections] == [
+        ("Streaming Sections From Synthetic Papers",),
+        ("Streaming Sections From Synthetic Papers", "1 Introduction"),
+        ("Streaming Sections From Synthetic Papers", "2 Related Work"),
+        ("Streaming Sections From Synthetic Papers", "3 Method"),
+        ("Streaming Sections From Synthetic Papers", "3 Method", "3.1 Setup"),
+    ]
+    assert parser.sections[2].text == "" and parser.sections[3].text.startswith(BODY)
+    assert parser.sections[1].next_section is parser.sections[2]
+
+
+def test_sections_stream_before_all_pages_are_extracted(tmp_path):
+    path = str(tmp_path / "paper.pdf")
+    make_paper(path, [[(f"{i} Section", 14), *[(BODY, 10)] * 20] for i in range(1, 7)])
+
+    parser = ArXivPDFParser(path, font_sample_pages=2)
+    extracted = []
+    page_lines = parser.iter_page_lines
+
+    def recording_iter_page_lines(*args, **kwargs):
+        for lines in page_lines(*args, **kwargs):
+            extracted.append(lines)
+            yield lines
+
+    parser.iter_page_lines = recording_iter_page_lines
+    sections = parser.iter_leveled_sections()
+    assert next(sections)[0] == "Introduction"
+    assert next(sections)[:2] == ("1 Section", 1)
+    assert len(extracted) < 6
+    assert [name for name, _, _ in sections] == [f"{i} Section" for i in range(2, 7)]
+    assert len(extracted) == 6
@@ -0,0 +1,34 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+arxiv_search = pytest.importorskip("askharrison.arxiv_search")
+
+
+def test_client_keeps_arxiv_request_delay():
+    # arXiv's API terms ask for 3 seconds between requests
+    assert arxiv_search.ARXIV_CLIENT.delay_seconds >= 3.0
+
+
+def test_arxiv_calls_are_serialized(monkeypatch):
+    lock = threading.Lock()
+    state = {"in_flight": 0, "max_in_flight": 0}
+
+    class FakeClient:
+        def results(self, search):
+            with lock:
+                state["in_flight"] += 1
+                state["max_in_flight"] = max(state["max_in_flight"], state["in_flight"])
+            time.sleep(0.02)
+            yield search.query
+            with lock:
+                state["in_flight"] -= 1
+
+    monkeypatch.setattr(arxiv_search, "ARXIV_CLIENT", FakeClient())
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(arxiv_search.search_arxiv, [f"q{i}" for i in range(8)]))
+
+    assert results == [[f"q{i}"] for i in range(8)]
+    assert state["max_in_flight"] == 1
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+tiktoken = pytest.importorskip("tiktoken")
+try:
+    tiktoken.get_encoding("cl100k_base")
+except Exception as e:  # the encoding is downloaded on first use
+    pytest.skip(f"cl100k_base encoding unavailable: {e}", allow_module_level=True)
+pydantic = pytest.importorskip("pydantic")
+
+from askharrison.llmparse.baml_parser import BamlDocumentParser, client_registry_options, resolve_baml_schema
+from askharrison.llmparse.document_parser import DocumentParser, ParsingConfig
+
+
+class Resume(pydantic.BaseModel):
+    name: str
+
+
+class FakeAsyncClient:
+    def __init__(self):
+        self.calls = []
+
+    async def ExtractResume(self, chunk, baml_options=None):
+        self.calls.append((chunk, baml_options))
+        await asyncio.sleep(0)
+        return Resume(name=chunk.split()[0])
+
+
+class FakeLLMClient:
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, prompt):
+        self.prompts.append(prompt)
+        return '{"question": "q", "answer": "a"}'
+
+
+def make_baml_parser(baml_options=None):
+    # skips __init__, which loads the BAML runtime
+    parser = object.__new__(BamlDocumentParser)
+    parser.max_chunk_size, parser.max_concurrency = 3000, 2
+    parser.baml_options = baml_options or {}
+    parser._async_b = FakeAsyncClient()
+    return parser
+
+
+def test_resolve_baml_schema():
+    assert resolve_baml_schema("Resume") == "Resume"
+    assert resolve_baml_schema(" FeatureList ") == "FeatureList"
+    assert resolve_baml_schema({"title": "Resume", "type": "object"}) == "Resume"
+    assert resolve_baml_schema(Resume) == "Resume"
+    assert resolve_baml_schema({"type": "object", "properties": {}}) is None
+    assert resolve_baml_schema("Extract questions and answers") is None
+    assert resolve_baml_schema(None) is None
+
+
+def test_document_parser_routes_known_schemas_to_baml():
+    llm_client = FakeLLMClient()
+    parser = DocumentParser(llm_client, ParsingConfig(use_baml=False))
+    parser.baml_parser = make_baml_parser({"client_registry": "registry"})
+
+    assert parser.parse_document("Ada Lovelace, analyst", {"title": "Resume"}) == {"name": "Ada"}
+    assert parser.baml_parser._async_b.calls == [("Ada Lovelace, analyst", {"client_registry": "registry"})]
+    assert llm_client.prompts == []
+
+    schema = {"type": "object", "properties": {"question": {"type": "string"}, "answer": {"type": "string"}}}
+    assert parser.parse_document("Q: q A: a", schema) == {"question": "q", "answer": "a"}
+    assert len(llm_client.prompts) == 1 and len(parser.baml_parser._async_b.calls) == 1
+
+
+def test_parse_document_inside_running_event_loop():
+    parser = make_baml_parser()
+
+    async def caller():
+        # e.g. a notebook cell, asyncio.run would fail here
+        return parser.parse_document("Grace Hopper", "Resume")
+
+    assert asyncio.run(caller()) == {"name": "Grace"}
+
+
+def test_baml_backend_needs_the_callers_api_key():
+    # without a key to hand over, BAML would call OpenAI with the server's OPENAI_API_KEY
+    assert client_registry_options(FakeLLMClient()) is None
+    assert DocumentParser(FakeLLMClient()).baml_parser is None
+
+    openai = pytest.importorskip("openai")
+    pytest.importorskip("baml_py")
+    llm_client = FakeLLMClient()
+    llm_client.client = openai.OpenAI(api_key="sk-user")
+    assert "client_registry" in client_registry_options(llm_client)
@@ -0,0 +1,92 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("openai")
+
+from askharrison.codeReview.codeReviewer.customPromptReviewer import CustomPromptReviewer
+from askharrison.codeReview.reviewCache import ReviewCache
+
+
+class FakeClient:
+    """stands in for openai.OpenAI: counts calls and tracks concurrent requests"""
+
+    def __init__(self):
+        self.prompt_calls = 0
+        self.review_calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, temperature):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.01)
+        with self.lock:
+            self.in_flight -= 1
+            if "prompt engineer" in messages[0]["content"]:
+                self.prompt_calls += 1
+                content = "Review this code."
+            else:
+                self.review_calls += 1
+                content = f"review #{self.review_calls}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def make_reviewer(client, cache):
+    return CustomPromptReviewer("key", ["Check for PEP 8 compliance"], ["security"],
+                                model="gpt-4o-mini", cache=cache, max_workers=3, client=client,
+                                token_counter=lambda text: len(text.split()))
+
+
+def test_prompt_generated_once_and_reviews_cached(tmp_path):
+    cache = ReviewCache(str(tmp_path))
+    contents = {f"file{i}.py": f"diff {i}" for i in range(6)}
+
+    client = FakeClient()
+    reviews = make_reviewer(client, cache).review_contents(contents)
+    assert set(reviews) == set(contents) and all(reviews.values())
+    assert client.prompt_calls == 1 and client.review_calls == 6
+    assert client.max_in_flight <= 3
+
+    # re-run after an amend that only changed one file
+    client = FakeClient()
+    contents["file2.py"] = "diff 2, amended"
+    again = make_reviewer(client, cache).review_contents(contents)
+    assert client.prompt_calls == 0 and client.review_calls == 1
+    assert again["file0.py"] == reviews["file0.py"]
+
+
+def test_config_change_regenerates_prompt(tmp_path):
+    cache = ReviewCache(str(tmp_path))
+    make_reviewer(FakeClient(), cache).get_comprehensive_prompt()
+    client = FakeClient()
+    reviewer = make_reviewer(client, cache)
+    reviewer.review_scopes = ["performance"]
+    reviewer.get_comprehensive_prompt()
+    assert client.prompt_calls == 1
+
+
+def test_large_diff_is_reviewed_in_hunk_chunks(tmp_path):
+    client = FakeClient()
+    reviewer = make_reviewer(client, None)
+    reviewer.max_tokens = 400
+    diff = "\n".join(f"@@ -{i * 10},1 +{i * 10},1 @@\n-old {i}\n+" + "new code " * 20 for i in range(1, 11))
+    report = reviewer.review_diff("missing.py", diff)
+    assert report.chunk_count > 1 and client.review_calls == report.chunk_count
+    assert report.failed_chunks == 0
+
+
+def test_chunk_reviews_share_the_request_limit(tmp_path):
+    client = FakeClient()
+    reviewer = make_reviewer(client, None)
+    reviewer.max_tokens = 400
+    diff = "\n".join(f"@@ -{i * 10},1 +{i * 10},1 @@\n-old {i}\n+" + "new code " * 20 for i in range(1, 11))
+    # every file is split in chunks, reviewed by a pool inside the file pool
+    reviews = reviewer.review_contents({f"missing{i}.py": diff for i in range(4)})
+    assert all(reviews.values()) and client.review_calls > 12
+    assert client.max_in_flight <= 3
@@ -0,0 +1,36 @@
+from askharrison.crawl.compactDocument import CompactDocument
+from askharrison.crawl.markdownParser import MarkdownParser
+
+SAMPLE_MARKDOWN = """# Title
+intro ü
+## Usage
+![diagram](img/diagram.png)
+usage text
+## FAQ
+| a | b |
+"""
+
+
+def compact_sample():
+    parser = MarkdownParser()
+    parser.parse_markdown_str(SAMPLE_MARKDOWN)
+    return parser, CompactDocument.from_parser(parser)
+
+
+def test_matches_section_tree():
+    parser, document = compact_sample()
+    assert len(document) == len(parser.sections)
+    for i, section in enumerate(parser.sections):
+        assert document.names[i] == section.name
+        assert document.section_text(i) == section.text
+        assert bytes(document.section_text_view(i)) == section.text.encode("utf-8")
+        assert document.contents(i) == [{"type": c.type, "content": c.content} for c in section.contents]
+    assert document.parent(0) is None
+    assert document.children(0) == [1, 2]
+
+
+def test_json_round_trip():
+    _, document = compact_sample()
+    restored = CompactDocument.from_json(document.to_json())
+    assert [restored.section(i) for i in range(len(restored))] == \
+        [document.section(i) for i in range(len(document))]
@@ -0,0 +1,72 @@
+import numpy as np
+
+from askharrison.crawl.contentDedup import ContentDeduplicator, MinHasher, content_hash
+
+NAV = "Home\nGetting started\nAPI reference\n© 2024 Example docs"
+
+
+def article(topic, extra=""):
+    return "\n".join([
+        NAV,
+        f"# {topic}",
+        f"This page explains how {topic} works in the client library, with examples for python and javascript.",
+        f"Configure {topic} through the settings object and restart the server to apply changes. {extra}",
+    ])
+
+
+def test_content_hash_ignores_case_and_whitespace():
+    assert content_hash("Hello   World\n") == content_hash("hello world")
+    assert content_hash("hello world") != content_hash("hello worlds")
+
+
+def test_minhash_similarity():
+    hasher = MinHasher(num_perm=128, shingle_size=3)
+    text = " ".join(f"word{i}" for i in range(200))
+    near = text.replace("word100", "changed")
+    other = " ".join(f"token{i}" for i in range(200))
+    assert hasher.similarity(hasher.signature(text), hasher.signature(near)) > 0.9
+    assert hasher.similarity(hasher.signature(text), hasher.signature(other)) < 0.1
+
+
+def test_minhash_permutations_match_exact_arithmetic():
+    hasher = MinHasher(num_perm=4)
+    hasher.a = np.array([1, 2 ** 32 - 1, 2 ** 31 + 7, 12345], dtype=np.uint64)
+    hasher.b = np.array([2 ** 32 - 1, 2 ** 32 - 1, 0, 99], dtype=np.uint64)
+    hashes = [2 ** 32 - 1, 2 ** 40 + 5, 0, 987654321]
+    hasher.shingles = lambda text: np.array(hashes, dtype=np.uint64)
+
+    prime = 2 ** 61 - 1
+    expected = [min((a * (x & 0xFFFFFFFF) + b) % prime & 0xFFFFFFFF for x in hashes)
+                for a, b in zip(hasher.a.tolist(), hasher.b.tolist())]
+    assert hasher.signature("any text").tolist() == expected
+
+def test_deduplicate_boilerplate_exact_and_near_duplicates():
+    pages = {
+        "https://docs.example.com/embeddings": article("embeddings"),
+        "https://docs.example.com/collections": article("collections"),
+        "https://docs.example.com/auth": article("authentication"),
+        # mirror of the first page with different navigation
+        "https://docs.example.com/v2/embeddings": article("embeddings").replace("Home", "Start"),
+        # near duplicate: one extra word
+        "https://docs.example.com/embeddings?print=1": article("embeddings", "Today."),
+    }
+    result = ContentDeduplicator(threshold=0.7, shingle_size=3).deduplicate(pages)
+
+    assert set(result.pages) == {
+        "https://docs.example.com/embeddings",
+        "https://docs.example.com/collections",
+        "https://docs.example.com/auth",
+    }
+    assert result.duplicates == {
+        "https://docs.example.com/v2/embeddings": "https://docs.example.com/embeddings",
+        "https://docs.example.com/embeddings?print=1": "https://docs.example.com/embeddings",
+    }
+    assert "API reference" in result.boilerplate["docs.example.com"]
+    assert "Getting started" not in result.pages["https://docs.example.com/auth"]
+    assert 0 < result.chars_after < result.chars_before
+
+
+def test_deduplicate_block_lists():
+    pages = {f"https://docs.example.com/{i}": ["Home", "Guides", f"Item {i}"] for i in range(4)}
+    result = ContentDeduplicator().deduplicate(pages)
+    assert result.pages["https://docs.example.com/2"] == ["Item 2"]
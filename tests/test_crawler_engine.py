@@ -0,0 +1,87 @@
+import requests
+
+from askharrison.crawl.crawlerEngine import CrawlerEngine, extract_links, normalize_url
+
+
+def page(*links):
+    return "<html><body>" + "".join(f'<a href="{link}">{link}</a>' for link in links) + "</body></html>"
+
+
+DOCS_SITE = {
+    "/": page("/a", "/b#section", "/b", "mailto:docs@example.com", "http://other.example/x"),
+    "/a": page("/", "/c?y=2&x=1", "/private/secret"),
+    "/b": page("/c?x=1&y=2"),
+    "/c?x=1&y=2": page("/d"),
+    "/d": page("/e"),
+    "/e": page(),
+    "/private/secret": page(),
+}
+
+
+def engine(**kwargs):
+    kwargs.setdefault("min_delay", 0)
+    return CrawlerEngine(max_workers=4, **kwargs)
+
+
+def test_normalize_url():
+    assert normalize_url("HTTP://Example.COM:80/docs?b=2&a=1#intro") == "http://example.com/docs?a=1&b=2"
+    assert normalize_url("../x", "https://example.com/docs/page") == "https://example.com/x"
+    assert normalize_url("https://example.com") == "https://example.com/"
+    assert normalize_url("mailto:docs@example.com") is None
+
+
+def test_crawl_depth_robots_and_dedup(fixture_site):
+    site = fixture_site(DOCS_SITE, robots_txt="User-agent: *\nDisallow: /private/\n")
+    results = {r.url: r for r in engine(max_depth=3).crawl(site.base_url + "/")}
+
+    ok_paths = sorted(r.url[len(site.base_url):] for r in results.values() if r.ok)
+    assert ok_paths == ["/", "/a", "/b", "/c?x=1&y=2", "/d"]
+    assert results[site.base_url + "/private/secret"].error == "disallowed by robots.txt"
+    # each page fetched once, even though /c is linked with two query orders
+    assert sorted(site.fetched_paths()) == ["/", "/a", "/b", "/c?x=1&y=2", "/d", "/robots.txt"]
+
+
+def test_max_pages_budget(fixture_site):
+    site = fixture_site(DOCS_SITE)
+    results = list(engine(max_pages=3, max_depth=10).crawl(site.base_url + "/"))
+    assert len(results) == 3
+
+
+def test_recrawl_uses_conditional_get(fixture_site, tmp_path):
+    site = fixture_site(DOCS_SITE)
+    cache_path = str(tmp_path / "validators.json")
+
+    first = list(engine(validator_cache_path=cache_path, max_depth=10).crawl(site.base_url + "/"))
+    second = list(engine(validator_cache_path=cache_path, max_depth=10).crawl(site.base_url + "/"))
+
+    assert {r.url for r in first if r.ok} == {r.url for r in second if r.ok}
+    assert all(r.not_modified for r in second if r.ok)
+    assert len(site.fetched_paths(status=304)) == len([r for r in second if r.ok])
+
+
+def test_recrawl_keeps_data_of_unchanged_pages(fixture_site, tmp_path):
+    site = fixture_site(DOCS_SITE)
+    cache_path = str(tmp_path / "validators.json")
+
+    def parse_page(url, content):
+        _, links = extract_links(url, content)
+        return {"links": len(links)}, links
+
+    first = {r.url: r.data for r in engine(validator_cache_path=cache_path).crawl(site.base_url + "/", parse_page)}
+    second = list(engine(validator_cache_path=cache_path).crawl(site.base_url + "/", parse_page))
+
+    assert all(r.not_modified for r in second if r.ok)
+    assert {r.url: r.data for r in second} == first
+    assert first[site.base_url + "/"] == {"links": 5}
+
+
+def test_crawl_closes_worker_sessions(fixture_site, monkeypatch):
+    site = fixture_site(DOCS_SITE)
+    closed = []
+    monkeypatch.setattr(requests.Session, "close", lambda session: closed.append(session))
+
+    crawler = engine()
+    results = list(crawler.crawl(site.base_url + "/"))
+    assert results and closed
+    assert len(set(map(id, closed))) == len(closed)
+    assert crawler._sessions == []
@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from askharrison.dataSink.base import DataSink, LocalFileDataSink, S3DataSink
+from askharrison.dataSink.writeBehind import WriteBehindDataSink
+
+
+def test_local_sink_shards_and_writes_metadata(tmp_path):
+    sink = LocalFileDataSink(str(tmp_path), shard_depth=2)
+    path = sink.save("hello", "page.txt", {"url": "https://docs.example.com"})
+
+    assert path == sink.path_for("page.txt")
+    assert len(os.path.relpath(path, tmp_path).split(os.sep)) == 3
+    assert open(path).read() == "hello"
+    assert json.load(open(path + ".meta.json")) == {"url": "https://docs.example.com"}
+    # overwrite is atomic and leaves no temporary files behind
+    sink.save(b"bytes", "page.txt", None)
+    assert open(path, "rb").read() == b"bytes"
+    assert not [name for name in os.listdir(os.path.dirname(path)) if name.startswith(".tmp-")]
+
+
+def test_local_sink_files_get_umask_permissions(tmp_path):
+    path = LocalFileDataSink(str(tmp_path)).save("hello", "page.txt", None)
+    umask = os.umask(0)
+    os.umask(umask)
+    # not mkstemp's 0600
+    assert os.stat(path).st_mode & 0o777 == 0o666 & ~umask
+    # the umask of the time of the write, not of the import
+    os.umask(0o027)
+    try:
+        path = LocalFileDataSink(str(tmp_path)).save("hello", "other.txt", None)
+    finally:
+        os.umask(umask)
+    assert os.stat(path).st_mode & 0o777 == 0o640
+
+
+class RecordingSink(DataSink):
+    def __init__(self, delay=0.0, fail_on=None):
+        self.saved = {}
+        self.delay = delay
+        self.fail_on = fail_on
+        self.closed = False
+        self.batch_sizes = []
+        self.lock = threading.Lock()
+
+    def save(self, data, filename, metadata):
+        if filename == self.fail_on:
+            raise IOError(f"cannot write {filename}")
+        time.sleep(self.delay)
+        with self.lock:
+            self.saved[filename] = data
+
+    def save_many(self, items):
+        with self.lock:
+            self.batch_sizes.append(len(items))
+        return super().save_many(items)
+
+    def close(self):
+        self.closed = True
+
+
+def test_write_behind_flushes_everything_on_close():
+    inner = RecordingSink(delay=0.001)
+    with WriteBehindDataSink(inner, max_pending=8, batch_size=4, workers=3) as sink:
+        for i in range(100):
+            sink.save(str(i), f"{i}.txt", {})
+            assert sink._queue.qsize() <= 8
+    assert len(inner.saved) == 100 and inner.closed
+    assert sum(inner.batch_sizes) == 100 and max(inner.batch_sizes) <= 4
+
+
+def test_write_behind_hands_queued_items_to_save_many_in_batches():
+    inner = RecordingSink()
+    sink = WriteBehindDataSink(inner, batch_size=16, workers=1)
+    with inner.lock:  # hold the writer while the queue fills
+        for i in range(40):
+            sink.save(str(i), f"{i}.txt", {})
+    sink.close()
+    assert len(inner.saved) == 40
+    assert max(inner.batch_sizes) == 16 and len(inner.batch_sizes) < 40
+
+
+def test_write_behind_reraises_sink_errors():
+    inner = RecordingSink(fail_on="bad.txt")
+    sink = WriteBehindDataSink(inner, workers=2)
+    sink.save("x", "good.txt", {})
+    sink.save("x", "bad.txt", {})
+    sink.save("x", "after.txt", {})
+    with pytest.raises(IOError, match="bad.txt"):
+        sink.flush()
+    sink.close()
+    # a failing item doesn't drop the rest of its batch
+    assert set(inner.saved) == {"good.txt", "after.txt"}
+
+
+def test_s3_sink_multipart_upload():
+    boto3 = pytest.importorskip("boto3")
+    moto = pytest.importorskip("moto")
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="crawl")
+        part_size = S3DataSink.MIN_PART_SIZE
+        with S3DataSink("crawl", prefix="run-1/", client=client, multipart_threshold=part_size,
+                        part_size=part_size, max_concurrency=3) as sink:
+            sink.save("small", "small.txt", {"pages": 1})
+            large = os.urandom(part_size * 2 + 100)
+            sink.save(large, "large.bin", {"url": "https://docs.example.com"})
+
+        small = client.get_object(Bucket="crawl", Key="run-1/small.txt")
+        assert small["Body"].read() == b"small" and small["Metadata"] == {"pages": "1"}
+        obj = client.get_object(Bucket="crawl", Key="run-1/large.bin")
+        assert obj["Body"].read() == large
+        assert obj["ETag"].strip('"').endswith("-3")  # 3 parts
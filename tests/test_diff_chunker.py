@@ -0,0 +1,92 @@
+from askharrison.codeReview.diffChunker import FileReview, attach_context, pack_hunks, parse_unified_diff
+
+DIFF = """diff --git a/app/service.py b/app/service.py
+index 1111111..2222222 100644
+--- a/app/service.py
++++ b/app/service.py
+@@ -10,3 +10,4 @@ class Service:
+     def load(self):
+-        return open(self.path).read()
++        with open(self.path) as f:
++            return f.read()
+@@ -40 +41 @@ def save(self, data):
+-    pass
++    self.sink.save(data)
+diff --git a/README.md b/README.md
+index 3333333..4444444 100644
+--- a/README.md
++++ b/README.md
+@@ -1,2 +1,2 @@
+-# Old
++# New
+ text
+\\ No newline at end of file
+"""
+
+
+def word_count(text):
+    return len(text.split())
+
+
+def test_parse_unified_diff():
+    files = parse_unified_diff(DIFF)
+    assert list(files) == ["app/service.py", "README.md"]
+    load, save = files["app/service.py"]
+    assert (load.old_start, load.old_count, load.new_start, load.new_count) == (10, 3, 10, 4)
+    assert load.section == "class Service:"
+    assert load.lines[1] == "-        return open(self.path).read()"
+    assert (save.old_start, save.old_count, save.new_count) == (40, 1, 1)
+    assert files["README.md"][0].lines == ["-# Old", "+# New", " text"]
+    # new-file line numbers: removed lines have none
+    assert load.numbered_lines()[2].split()[0] == "11"
+
+
+def test_attach_context_finds_enclosing_function():
+    file_lines = ["x = 1"] * 39 + ["def save(self, data):"] + ["    self.sink.save(data)"]
+    hunk = parse_unified_diff(DIFF)["app/service.py"][1]
+    attach_context([hunk], file_lines, max_context_lines=5)
+    assert [line.split(None, 1)[1] for line in hunk.context] == ["def save(self, data):"]
+
+
+def test_pack_hunks_respects_budget_and_splits_large_hunks():
+    hunks = parse_unified_diff(DIFF)["app/service.py"]
+    assert len(pack_hunks(hunks, max_tokens=1000, token_counter=word_count)) == 1
+
+    big = "@@ -1,60 +1,60 @@\n" + "\n".join(f"+line number {i} of the new code" for i in range(60))
+    big_hunk = parse_unified_diff(big, "big.py")["big.py"]
+    chunks = pack_hunks(big_hunk, max_tokens=80, token_counter=word_count)
+    assert len(chunks) > 1
+    assert all(sum(word_count(h.render()) for h in chunk) <= 80 for chunk in chunks)
+    pieces = [hunk for chunk in chunks for hunk in chunk]
+    assert [p.new_start for p in pieces][:2] == [1, 1 + pieces[0].new_count]
+    assert sum(len(p.lines) for p in pieces) == 60
+
+
+def test_file_review_merges_findings_by_line():
+    report = FileReview("app/service.py")
+    report.add_review("L12: file handle is never closed\n- L41: sink may be None\nLooks fine overall.")
+    report.add_review("L11: prefer pathlib")
+    assert report.to_text().splitlines() == [
+        "Review of app/service.py",
+        "L11: prefer pathlib",
+        "L12: file handle is never closed",
+        "L41: sink may be None",
+        "General:",
+        "Looks fine overall.",
+    ]
+
+
+def test_hunk_lines_looking_like_file_headers():
+    diff = """diff --git a/conf b/x.yaml b/conf b/x.yaml
+--- a/conf b/x.yaml
++++ b/conf b/x.yaml
+@@ -1,3 +1,3 @@
+ a: 1
+----
++++++i
++c: 3
+-b: 2
+"""
+    files = parse_unified_diff(diff)
+    assert list(files) == ["conf b/x.yaml"]
+    assert files["conf b/x.yaml"][0].lines == [" a: 1", "----", "+++++i", "+c: 3", "-b: 2"]
@@ -0,0 +1,53 @@
+import pytest
+
+tiktoken = pytest.importorskip("tiktoken")
+try:
+    tiktoken.get_encoding("cl100k_base")
+except Exception as e:  # the encoding is downloaded on first use
+    pytest.skip(f"cl100k_base encoding unavailable: {e}", allow_module_level=True)
+
+# imported directly: the digest must load from the root askharrison package alone
+from askharrison.llmparse import document_digest
+from askharrison.llmparse.document_digest import build_document_digest
+
+
+def make_document(num_questions=40):
+    parts = ["# FAQ", "Intro text about the product."]
+    for i in range(1, num_questions + 1):
+        parts += [f"## Q{i} how do I reset setting {i}", f"Answer {i} " + "details " * 30]
+    parts += ["# Pricing", "| plan | price |", "| --- | --- |", "| basic | 1 |", "| pro | 2 |", "",
+              "```", "# not a heading", "```", "Plans are billed monthly."]
+    return "\n".join(parts)
+
+
+def test_scan_markdown_splits_sections_and_tables():
+    sections, tables = document_digest._scan_markdown(make_document(2))
+    assert [(s.name, s.level) for s in sections] == [
+        ("FAQ", 1), ("Q1 how do I reset setting 1", 2), ("Q2 how do I reset setting 2", 2), ("Pricing", 1)]
+    assert sections[-1].text.strip() == "Plans are billed monthly."
+    assert [(t.section_name, t.content.count("\n") + 1) for t in tables] == [("Pricing", 4)]
+
+
+def test_digest_samples_outline_sections_and_tables():
+    document = make_document()
+    digest = build_document_digest(document, max_tokens=400)
+
+    assert "## Document outline" in digest
+    # the 40 similar questions collapse into one outline line and one sampled section
+    assert "(40 similar sections)" in digest
+    assert digest.count("### Q") == 1
+    assert "| basic | 1 |" in digest
+    assert build_document_digest("short document", max_tokens=400) == "short document"
+
+
+def test_representative_sections_cover_the_whole_document():
+    # distinct sections, far more than fit in the budget
+    parts = []
+    for i in range(60):
+        parts += [f"# Topic {chr(65 + i % 26)}{chr(65 + i // 26)} overview", f"Body of topic {i}. " + "words " * 60]
+    digest = build_document_digest("\n".join(parts), max_tokens=800, section_tokens=40)
+    sampled = [int(line.split()[3].rstrip(".")) for line in digest.splitlines() if line.startswith("Body of topic")]
+    assert len(sampled) > 2 and sampled == sorted(sampled)
+    assert sampled[0] == 0 and sampled[-1] >= 50
+
+    assert document_digest._spread_order(5) == [0, 4, 2, 1, 3]
@@ -0,0 +1,73 @@
+import subprocess
+
+import pytest
+
+from askharrison.codeReview.gitHandler import GitHandler
+
+
+def git(repo, *args):
+    subprocess.check_call(["git", "-C", str(repo), *args], stdout=subprocess.DEVNULL)
+
+
+@pytest.fixture
+def staged_repo(tmp_path, monkeypatch):
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "config", "user.email", "dev@example.com")
+    git(tmp_path, "config", "user.name", "dev")
+    (tmp_path / "app.py").write_text("x = 1\n")
+    git(tmp_path, "add", "app.py")
+    git(tmp_path, "commit", "-q", "-m", "init")
+
+    (tmp_path / "app.py").write_text("x = 2\n")
+    (tmp_path / "my module.py").write_text("def f():\n    return 1\n")
+    (tmp_path / "poetry.lock").write_text("[[package]]\n")
+    (tmp_path / "analysis.ipynb").write_text("{}\n")
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG\x00\x01\x02")
+    (tmp_path / "big.py").write_text("y = 1\n" * 1000)
+    git(tmp_path, "add", "-A")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_staged_diffs_from_one_git_call(staged_repo):
+    handler = GitHandler(max_diff_bytes=2000)
+    diffs = {d.path: d for d in handler.iter_staged_diffs(include_skipped=True)}
+
+    assert diffs["app.py"].reviewable and "+x = 2" in diffs["app.py"].diff
+    assert diffs["my module.py"].reviewable and diffs["my module.py"].diff.startswith("diff --git")
+    assert {path: d.skipped for path, d in diffs.items() if not d.reviewable} == {
+        "poetry.lock": "pattern", "analysis.ipynb": "pattern", "logo.png": "binary", "big.py": "size"}
+    assert [d.path for d in handler.get_reviewable_changes()] == ["app.py", "my module.py"]
+    # whole-file mode keeps files with a large diff, reads them from the working tree
+    contents = {d.path: d.diff for d in GitHandler(max_diff_bytes=20_000).get_reviewable_changes(False)}
+    assert contents["app.py"] == "x = 2\n" and "big.py" in contents
+
+
+def test_stopping_early_does_not_raise(staged_repo):
+    diffs = GitHandler().iter_staged_diffs()
+    next(diffs)
+    diffs.close()
+
+
+
+def test_paths_with_b_slash_renames_and_byte_sizes(tmp_path, monkeypatch):
+    git(tmp_path, "init", "-q")
+    git(tmp_path, "config", "user.email", "dev@example.com")
+    git(tmp_path, "config", "user.name", "dev")
+    (tmp_path / "old b").mkdir()
+    (tmp_path / "old b" / "util.py").write_text("def util():\n    return 1\n" * 5)
+    git(tmp_path, "add", "-A")
+    git(tmp_path, "commit", "-q", "-m", "init")
+
+    (tmp_path / "docs b").mkdir()
+    (tmp_path / "docs b" / "guide.py").write_text("x = 1\n")
+    git(tmp_path, "mv", "old b/util.py", "helpers.py")
+    (tmp_path / "unicode.py").write_text("s = '" + "é" * 300 + "'\n")
+    git(tmp_path, "add", "-A")
+    monkeypatch.chdir(tmp_path)
+
+    diffs = {d.path: d for d in GitHandler(skip_patterns=[], max_diff_bytes=500).iter_staged_diffs(True)}
+    assert sorted(diffs) == ["docs b/guide.py", "helpers.py", "unicode.py"]
+    assert diffs["docs b/guide.py"].reviewable and "+x = 1" in diffs["docs b/guide.py"].diff
+    # about 400 characters but over 500 bytes of UTF-8
+    assert diffs["unicode.py"].skipped == "size"
@@ -0,0 +1,77 @@
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("lxml")
+
+from askharrison.crawl.htmlParser import HTMLParserExtended
+from askharrison.crawl.lxmlHtmlParser import LxmlHTMLParser
+
+TABLE = """<figure class="ltx_table" id="T{i}"><figcaption>Table {i}: <b>Results</b> on set {i}</figcaption>
+<table><tr><th>model</th><th>score</th></tr><tr><td> base </td><td>0.{i}</td></tr></table></figure>"""
+FIGURE = """<figure class="ltx_figure" id="F{i}"><img src="x{i}.png"/><figcaption>Figure {i}: Overview</figcaption></figure>"""
+SUB_FIGURES = """<figure class="ltx_figure" id="F9">
+<figure class="ltx_figure ltx_figure_panel"><img src="a.png"/><figcaption>(a) train</figcaption></figure>
+<figure class="ltx_figure ltx_figure_panel"><img src="b.png"/><figcaption>(b) test</figcaption></figure>
+<figcaption>Figure 9: Loss curves</figcaption></figure>"""
+
+
+def flat_page(num_sections=4):
+    sections = []
+    for i in range(1, num_sections + 1):
+        sections.append(f"""<section class="ltx_section"><h2 class="ltx_title">{i} Section <em>{i}</em></h2>
+<p>Paragraph   of section {i}.</p>{TABLE.format(i=i)}{FIGURE.format(i=i) if i % 2 else ''}</section>""")
+    return f"<html><body><article><h1>Paper</h1>{''.join(sections)}</article></body></html>"
+
+
+def summary(parser):
+    return [(s.name, s.level, [(c.type, c.content) for c in s.contents]) for s in parser.sections]
+
+
+def test_lxml_backend_matches_beautifulsoup_on_flat_sections():
+    html = flat_page()
+    bs4_parser, lxml_parser = HTMLParserExtended(), LxmlHTMLParser()
+    bs4_parser.parse_html_str(html)
+    lxml_parser.parse_html_str(html)
+
+    assert summary(lxml_parser) == summary(bs4_parser)
+    assert len(lxml_parser.get_tables()) == 4 and len(lxml_parser.get_images()) == 2
+    assert lxml_parser.get_tables()[0].content == {
+        'type': 'table', 'caption': 'Table 1:Resultson set 1', 'content': [['model', 'score'], ['base', '0.1']]}
+    assert lxml_parser.get_images()[0].content == [
+        {'type': 'image', 'caption': 'Figure 1: Overview', 'content': 'x1.png'}]
+    assert lxml_parser.sections[0].text == "Paragraph of section 1."
+
+
+def test_lxml_backend_attaches_figures_to_the_innermost_section():
+    html = f"""<html><body><section><h2>1 Method</h2><p>intro</p>
+<section><h3>1.1 Setup</h3>{TABLE.format(i=1)}</section>
+<section><h3>1.2 Ablation</h3>{TABLE.format(i=2)}</section></section></body></html>"""
+    bs4_parser, lxml_parser = HTMLParserExtended(), LxmlHTMLParser()
+    bs4_parser.parse_html_str(html)
+    lxml_parser.parse_html_str(html)
+
+    assert [s.name for s in lxml_parser.sections] == [s.name for s in bs4_parser.sections]
+    # BeautifulSoup also counts both subsection tables on "1 Method"
+    assert len(bs4_parser.get_tables()) == 4
+    assert [(s.name, len(s.contents)) for s in lxml_parser.sections] == [
+        ("1 Method", 0), ("1.1 Setup", 1), ("1.2 Ablation", 1)]
+    method = lxml_parser.sections[0]
+    assert [child.name for child in method.child_sections] == ["1.1 Setup", "1.2 Ablation"]
+    assert method.text == "intro"
+
+
+def test_sub_figures_keep_their_own_captions():
+    html = f"<html><body><section><h2>2 Results</h2>{SUB_FIGURES}</section></body></html>"
+    bs4_parser, lxml_parser = HTMLParserExtended(), LxmlHTMLParser()
+    bs4_parser.parse_html_str(html)
+    lxml_parser.parse_html_str(html)
+
+    expected = [
+        {'type': 'image', 'caption': 'Figure 9: Loss curves', 'content': 'No image source available.'},
+        {'type': 'image', 'caption': '(a) train', 'content': 'a.png'},
+        {'type': 'image', 'caption': '(b) test', 'content': 'b.png'},
+    ]
+    assert [image.content for image in lxml_parser.get_images()] == [expected]
+    # BeautifulSoup parses each panel again as a figure of its own
+    assert bs4_parser.get_images()[0].content == expected
+    assert len(bs4_parser.get_images()) == 3
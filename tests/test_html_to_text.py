@@ -0,0 +1,14 @@
+import pytest
+
+pytest.importorskip("html2text")
+
+from askharrison.crawl.html_to_text import html_to_text
+
+
+def test_html_to_text_keeps_structure_without_wrapping():
+    text = html_to_text("<html><body><h2>Roadmap</h2><p>" + "word " * 40 + "</p>"
+                        "<ul><li>one</li></ul><img src='x.png'/><a href='https://a.b/c'>docs</a></body></html>")
+    lines = text.splitlines()
+    assert lines[0] == "## Roadmap"
+    assert any(line.startswith("word ") and line.count("word") == 40 for line in lines)
+    assert "  * one" in lines and "[docs](https://a.b/c)" in text and "x.png" not in text
@@ -0,0 +1,143 @@
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+job_queue = pytest.importorskip("askharrison.job_queue")
+JobRunner = job_queue.JobRunner
+JobStore = job_queue.JobStore
+
+
+def wait_for(store, job_id, statuses=("done", "failed", "cancelled"), timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = store.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} stuck in {store.get(job_id)['status']}")
+
+
+def test_jobs_report_progress_dedupe_and_persist_results(tmp_path):
+    release = threading.Event()
+    calls = []
+
+    def slow_sum(params, context):
+        calls.append(params)
+        context.report(0.5, "halfway")
+        assert release.wait(5)
+        return {"sum": sum(params["numbers"]), "secret": context.secrets.get("api_key")}
+
+    runner = JobRunner(JobStore(str(tmp_path / "jobs.db")), poll_interval=0.01,
+                       handlers={"sum": slow_sum}).start()
+    try:
+        job_id = runner.submit("sum", {"numbers": [1, 2]}, secrets={"api_key": "sk-test"})
+        job = wait_for(runner.store, job_id, statuses=("running",))
+        # a second click while the job runs returns the same job, another user's key does not
+        assert runner.submit("sum", {"numbers": [1, 2]}, secrets={"api_key": "sk-test"}) == job_id
+        assert job_queue.job_key("sum", {"numbers": [1, 2]}, {"api_key": "sk-other"}) != job["job_key"]
+        while runner.store.get(job_id)["progress"] != 0.5:
+            time.sleep(0.01)
+        assert runner.store.get(job_id)["message"] == "halfway"
+        release.set()
+        job = wait_for(runner.store, job_id)
+    finally:
+        runner.stop()
+    assert job["status"] == "done" and job["result"] == {"sum": 3, "secret": "sk-test"}
+    assert len(calls) == 1
+    # results are kept by job id, in the database only (not the secrets)
+    reopened = JobStore(str(tmp_path / "jobs.db")).get(job_id)
+    assert reopened["result"]["sum"] == 3 and "sk-test" not in reopened["params"].values()
+    assert runner.submit("sum", {"numbers": [1, 2]}) != job_id
+
+
+def test_cancel_and_failure(tmp_path):
+    started = threading.Event()
+
+    def until_cancelled(params, context):
+        started.set()
+        while True:
+            context.report(0.1)
+            time.sleep(0.01)
+
+    def broken(params, context):
+        raise RuntimeError("boom")
+
+    store = JobStore(str(tmp_path / "jobs.db"))
+    queued_id = store.submit("loop", {"n": 2})
+    assert store.cancel(queued_id) and store.get(queued_id)["status"] == "cancelled"
+
+    runner = JobRunner(store, poll_interval=0.01, handlers={"loop": until_cancelled, "broken": broken}).start()
+    try:
+        job_id = runner.submit("loop", {"n": 1})
+        assert started.wait(5)
+        assert store.cancel(job_id)
+        assert wait_for(store, job_id)["status"] == "cancelled"
+        failed = wait_for(store, runner.submit("broken", {}))
+    finally:
+        runner.stop()
+    assert failed["status"] == "failed" and failed["error"] == "boom"
+    assert not store.cancel(job_id)
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_requeue_only_jobs_of_dead_runners(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    alive_id, dead_id, stale_id = (store.submit("sum", {"n": n}) for n in range(3))
+    secret_id = store.submit("sum", {"n": 3}, secrets={"api_key": "sk-test"})
+    for _ in range(4):
+        store.claim_next(["sum"], [secret_id])
+    with store._connect() as connection:
+        connection.execute("UPDATE jobs SET runner_pid = ? WHERE id IN (?, ?)", (dead_pid(), dead_id, secret_id))
+        connection.execute("UPDATE jobs SET heartbeat_at = 0 WHERE id = ?", (stale_id,))
+
+    # another process starting a runner leaves the live runner's job alone
+    assert store.requeue_running() == 2
+    assert [store.get(job_id)["status"] for job_id in (alive_id, dead_id, stale_id)] == [
+        "running", "queued", "queued"]
+    lost = store.get(secret_id)
+    assert lost["status"] == "failed" and lost["error"] == job_queue.SECRETS_LOST_ERROR
+
+
+def test_jobs_needing_secrets_never_run_without_them(tmp_path):
+    calls = []
+    store = JobStore(str(tmp_path / "jobs.db"))
+    # submitted to a runner of another process, which holds the key
+    job_id = store.submit("echo", {}, secrets={"api_key": "sk-test"})
+    runner = JobRunner(store, handlers={"echo": lambda params, context: calls.append(context.secrets)})
+    assert store.claim_next(["echo"]) is None
+
+    # e.g. claimed before a restart: fail instead of running on the server's key
+    runner.process(store.claim_next(["echo"], [job_id]))
+    job = store.get(job_id)
+    assert job["status"] == "failed" and job["error"] == job_queue.SECRETS_LOST_ERROR
+    assert calls == []
+
+
+def test_runner_drops_secrets_of_jobs_it_will_not_run(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    runner = JobRunner(store, poll_interval=0.01, lease_seconds=0.1, handlers={"echo": lambda params, context: {}})
+    cancelled_id = runner.submit("echo", {"n": 1}, secrets={"api_key": "sk-a"})
+    taken_id = runner.submit("echo", {"n": 2}, secrets={"api_key": "sk-b"})
+    assert set(runner._secrets) == {cancelled_id, taken_id}
+    store.cancel(cancelled_id)
+    store.claim_next(["echo"], [taken_id])  # e.g. by a runner of another process holding the same key
+
+    runner.start()
+    try:
+        deadline = time.monotonic() + 5
+        while runner._secrets and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        runner.stop()
+    assert runner._secrets == {}
+    # deduplicated into a job that is not queued anymore: nothing to keep
+    assert runner.submit("echo", {"n": 2}, secrets={"api_key": "sk-b"}) == taken_id
+    assert runner._secrets == {}
@@ -0,0 +1,23 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LIGHT_MODULES = ["askharrison.config", "askharrison.llm_models", "askharrison.prompts.query_expansion",
+                 "askharrison.google_search", "askharrison.cli"]
+HEAVY_PACKAGES = ["openai", "pandas", "tiktoken", "tqdm", "arxiv"]
+
+
+def test_light_modules_defer_heavy_imports_and_config_files():
+    pytest.importorskip("requests")
+    code = (f"import json, sys\n"
+            f"for module in {LIGHT_MODULES!r}: __import__(module)\n"
+            f"print(json.dumps([p for p in {HEAVY_PACKAGES!r} if p in sys.modules]))")
+    # resources/info.json is not needed (and absent in a checkout) until credentials are used
+    completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=REPO_ROOT,
+                               env={**os.environ, "PYTHONPATH": REPO_ROOT})
+    assert completed.returncode == 0, completed.stderr
+    assert json.loads(completed.stdout) == []
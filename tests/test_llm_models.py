@@ -0,0 +1,18 @@
+import pytest
+
+llm_models = pytest.importorskip("askharrison.llm_models")
+iter_list_strings = llm_models.iter_list_strings
+
+
+def test_iter_list_strings_yields_items_as_they_complete():
+    chunks = iter(['```python\n["first q', 'uery", \'it\\\'s', ' second\', "third ', '\\"x\\""', ']\n```'])
+    items = iter_list_strings(chunks)
+    assert next(items) == "first query"
+    # the second item is complete before the rest of the stream is read
+    assert next(items) == "it's second"
+    assert list(items) == ['third "x"']
+
+
+def test_iter_list_strings_falls_back_to_safe_eval():
+    assert list(iter_list_strings(["no list here"])) == []
+    assert list(iter_list_strings(["```\n", "[1, 2]", "\n```"])) == ["1", "2"]
@@ -0,0 +1,130 @@
+import io
+
+from askharrison.crawl.markdownParser import MarkdownParser, diff_sections
+
+SAMPLE_MARKDOWN = """# Title
+intro line
+## Install
+run this
+```
+# not a header
+pip install askharrison
+```
+## Usage
+![diagram](img/diagram.png)
+| a | b |
+|---|---|
+| 1 | 2 |
+
+after table
+### Details
+details text
+# Appendix
+"""
+
+
+def parse(text):
+    parser = MarkdownParser()
+    parser.parse_markdown_str(text)
+    return parser
+
+
+def test_sections_and_hierarchy():
+    parser = parse(SAMPLE_MARKDOWN)
+    names = [section.name for section in parser.sections]
+    assert names == ["Title", "Install", "Usage", "Details", "Appendix"]
+
+    title, install, usage, details, appendix = parser.sections
+    assert install.parent_section is title
+    assert usage.parent_section is title
+    assert details.parent_section is usage
+    assert appendix.parent_section is None
+    assert title.child_sections == [install, usage]
+    assert usage.previous_section is install and usage.next_section is details
+
+
+def test_section_text_and_contents():
+    parser = parse(SAMPLE_MARKDOWN)
+    title, install, usage, details, _ = parser.sections
+    assert title.text == "intro line\n"
+    assert install.text == "run this\n"
+    assert usage.text == "after table\n"
+    assert details.text == "details text\n"
+
+    code_block, = parser.get_code_blocks()
+    assert code_block.content == "# not a header\npip install askharrison\n"
+    assert code_block.section_name == "Install"
+
+    image, = parser.get_images()
+    assert image.content == {"description": "diagram", "src": "img/diagram.png"}
+
+    table, = parser.get_tables()
+    assert table.content == "| a | b |\n|---|---|\n| 1 | 2 |"
+    assert [content.type for content in usage.contents] == ["image", "table"]
+
+
+def test_lookups_by_id():
+    parser = parse(SAMPLE_MARKDOWN)
+    for section in parser.sections:
+        assert parser.get_section(section.id) is section
+    for content in parser.contents:
+        assert parser.get_content(content.id) is content
+    assert parser.get_section(999) is None
+    assert parser.get_content(999) is None
+
+
+def test_streaming_matches_string_parse():
+    # a file yields no trailing empty line, unlike str.split
+    expected = parse(SAMPLE_MARKDOWN.rstrip("\n"))
+
+    parser = MarkdownParser()
+    streamed_names = [section.name for section in parser.iter_sections(io.StringIO(SAMPLE_MARKDOWN))]
+
+    assert streamed_names == [section.name for section in expected.sections]
+    assert [s.text for s in parser.sections] == [s.text for s in expected.sections]
+    assert [c.content for c in parser.contents] == [c.content for c in expected.contents]
+
+
+def test_unterminated_code_block_and_table():
+    parser = parse("# A\n| x | y |\n# B\n```\ncode")
+    assert parser.get_tables()[0].section_name == "A"
+    assert parser.get_code_blocks()[0].content == "code\n"
+    assert parser.get_code_blocks()[0].section_name == "B"
+
+
+def test_reset():
+    parser = parse(SAMPLE_MARKDOWN)
+    parser.reset()
+    assert parser.sections == [] and parser.contents == []
+    assert parser.get_tables() == []
+
+
+def test_content_hash_ignores_child_sections():
+    parser = parse("# A\ntext\n## B\nchild text")
+    edited = parse("# A\ntext\n## B\nedited child text")
+    assert parser.sections[0].content_hash == edited.sections[0].content_hash
+    assert parser.sections[1].content_hash != edited.sections[1].content_hash
+
+
+def test_update_markdown_str_diff():
+    parser = parse(SAMPLE_MARKDOWN)
+    edited = SAMPLE_MARKDOWN.replace("details text", "new details").replace("# Appendix\n", "# FAQ\n")
+
+    diff = parser.update_markdown_str(edited)
+
+    assert [s.name for s in diff.changed] == ["Details"]
+    assert [s.name for s in diff.added] == ["FAQ"]
+    assert [s.name for s in diff.removed] == ["Appendix"]
+    assert [s.name for s in diff.unchanged] == ["Title", "Install", "Usage"]
+    assert diff.has_changes()
+    assert [s.name for s in parser.sections][-1] == "FAQ"
+    assert not parser.update_markdown_str(edited).has_changes()
+
+
+def test_diff_repeated_headings():
+    old = parse("# Q\none\n# Q\ntwo")
+    new = parse("# Q\none\n# Q\nTWO\n# Q\nthree")
+    diff = diff_sections(old.sections, new.sections)
+    assert [s.text for s in diff.unchanged] == ["one\n"]
+    assert [s.text for s in diff.changed] == ["TWO\n"]
+    assert [s.text for s in diff.added] == ["three\n"]
@@ -0,0 +1,61 @@
+import os
+
+from askharrison.dataSink.packSink import PackFileDataSink
+
+
+def test_pack_store_dedups_rolls_packs_and_reopens(tmp_path):
+    pages = {f"https://docs.example.com/{i}": (f"<html>page {i}</html>" * 50).encode() for i in range(20)}
+    with PackFileDataSink(str(tmp_path), max_pack_size=200) as sink:
+        for url, html in pages.items():
+            sink.save(html, url, {"status": 200})
+        # same content under another key is stored once
+        sink.save(pages["https://docs.example.com/0"], "https://mirror.example.com/0", {})
+        assert sink.load("https://docs.example.com/3") == pages["https://docs.example.com/3"]
+        stats = sink.stats()
+
+    assert stats["keys"] == 21 and stats["blobs"] == 20
+    assert stats["stored_bytes"] < stats["raw_bytes"] / 5
+    packs = [name for name in os.listdir(tmp_path) if name.endswith(".pack")]
+    assert len(packs) > 1
+
+    store = PackFileDataSink(str(tmp_path), max_pack_size=200)
+    store.save("new page", "https://docs.example.com/new", None)
+    assert store.load("https://mirror.example.com/0") == pages["https://docs.example.com/0"]
+    assert store.load("https://docs.example.com/new") == b"new page"
+    assert store.metadata("https://docs.example.com/7") == {"status": 200}
+    assert [key for key, _, _ in store.iter_items()][:2] == ["https://docs.example.com/0", "https://mirror.example.com/0"]
+    assert len(store) == 22
+    store.close()
+
+
+def test_pack_store_save_many_writes_one_batch(tmp_path):
+    items = [(f"page {i % 3}", f"key-{i}", {"i": i}) for i in range(6)]
+    with PackFileDataSink(str(tmp_path)) as sink:
+        digests = sink.save_many(items)
+        assert len(digests) == 6 and len(set(digests)) == 3
+        assert sink.stats()["blobs"] == 3
+
+    store = PackFileDataSink(str(tmp_path))
+    assert [store.load(f"key-{i}") for i in range(6)] == [f"page {i % 3}".encode() for i in range(6)]
+    assert store.metadata("key-5") == {"i": 5}
+    store.close()
+
+
+def test_pack_store_recovers_from_a_torn_index_line(tmp_path):
+    with PackFileDataSink(str(tmp_path)) as sink:
+        sink.save("page a", "a", None)
+        sink.save("page b", "b", None)
+    index_path = os.path.join(tmp_path, "index.jsonl")
+    with open(index_path, "r+b") as f:
+        # crash in the middle of writing b's index line
+        f.truncate(os.path.getsize(index_path) - 10)
+
+    with PackFileDataSink(str(tmp_path)) as sink:
+        assert sorted(sink.keys) == ["a"]
+        sink.save("page c", "c", None)
+        sink.save("page d", "d", None)
+
+    store = PackFileDataSink(str(tmp_path))
+    assert sorted(store.keys) == ["a", "c", "d"]
+    assert store.load("d") == b"page d"
+    store.close()
@@ -0,0 +1,35 @@
+from askharrison.crawl.pdfHeadingClassifier import FontStatsHeadingClassifier
+
+BOLD = 16
+
+
+def body(text="body text of the paper that goes on for a while"):
+    return [(text, 10.0, 0)]
+
+
+def test_levels_from_font_sizes():
+    lines = [
+        [("Paper Title", 20.0, 0)],
+        [("1 Introduction", 14.0, BOLD)],
+        *[body() for _ in range(50)],
+        [("1.1 Background", 10.0, BOLD)],
+        *[body() for _ in range(50)],
+        [("2 Method", 14.0, BOLD)],
+    ]
+    levels = FontStatsHeadingClassifier().fit(lines).classify(lines)
+    assert levels[0] == 1
+    assert levels[1] == 2
+    assert levels[52] == 3
+    assert levels[-1] == 2
+    assert set(levels[2:52]) == {None}
+
+
+def test_inline_bold_and_large_symbols_are_not_headings():
+    lines = [
+        *[body() for _ in range(50)],
+        [("Theorem 1.", 10.0, BOLD), (" holds for every input", 10.0, 0)],
+        [("∑", 16.0, 0)],
+        [("A bold sentence that is far too long to be a heading of any section", 10.0, BOLD)],
+    ]
+    levels = FontStatsHeadingClassifier().fit(lines).classify(lines)
+    assert levels[-3:] == [None, None, None]
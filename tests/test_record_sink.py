@@ -0,0 +1,47 @@
+import time
+
+import pytest
+
+from askharrison.dataSink.recordSink import JsonlShardSink, RecordSink, read_jsonl_shards, stream_records
+
+
+def test_shards_roll_over_and_read_back(tmp_path):
+    records = [{"url": f"https://docs.example.com/{i}", "text": f"página {i}"} for i in range(25)]
+    with JsonlShardSink(str(tmp_path), records_per_shard=10) as sink:
+        assert stream_records(iter(records), sink) == 25
+
+    assert [p.rsplit("/", 1)[-1] for p in sink.shard_paths] == [
+        "records-00000.jsonl.gz", "records-00001.jsonl.gz", "records-00002.jsonl.gz"]
+    assert list(read_jsonl_shards(sink.shard_paths)) == records
+
+
+class SlowSink(RecordSink):
+    def __init__(self, fail_at=None):
+        self.records = []
+        self.fail_at = fail_at
+
+    def write(self, record):
+        if record == self.fail_at:
+            raise IOError("disk full")
+        time.sleep(0.001)
+        self.records.append(record)
+
+
+def test_stream_records_bounds_in_flight_records():
+    produced = []
+    sink = SlowSink()
+
+    def records():
+        for i in range(200):
+            # the producer can never get more than max_in_flight (+ the one being written) ahead
+            assert len(produced) - len(sink.records) <= 5 + 1 + 1
+            produced.append(i)
+            yield i
+
+    assert stream_records(records(), sink, max_in_flight=5) == 200
+    assert sink.records == list(range(200))
+
+
+def test_stream_records_raises_sink_errors():
+    with pytest.raises(IOError, match="disk full"):
+        stream_records(iter(range(100)), SlowSink(fail_at=10), max_in_flight=4)
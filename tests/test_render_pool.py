@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from askharrison.crawl.crawlerEngine import CrawlerEngine
+from askharrison.crawl.renderPool import BrowserRenderPool, needs_javascript
+from askharrison.sidebarCrawlerS import SidebarCrawlerSelenium
+
+STATIC_PAGE = "<html><body><ul><li><a href='{base_url}/spa'>App page</a></li></ul><p>" + "docs " * 50 + "</p></body></html>"
+SPA_PAGE = "<html><body><div id='root'></div><script src='/bundle.js'></script></body></html>"
+RENDERED_SPA_PAGE = "<html><body><ul><li>Rendered item</li></ul></body></html>"
+
+
+class FakeDriver:
+    def __init__(self, pages):
+        self.pages = pages
+        self.page_source = None
+        self.quit_called = False
+
+    def get(self, url):
+        self.page_source = self.pages[url]
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_needs_javascript():
+    assert not needs_javascript(STATIC_PAGE)
+    assert needs_javascript(SPA_PAGE)
+    assert needs_javascript("<html><body><noscript>Please enable JavaScript</noscript><p>Hi</p></body></html>")
+    assert needs_javascript("<html><body><script>render()</script></body></html>")
+    # server-rendered page keeping an empty mount point for hydration
+    assert not needs_javascript("<html><body><div id='root'></div><article><p>" + "docs " * 50
+                                + "</p></article></body></html>")
+    assert not needs_javascript("<html><body><noscript>Please enable JavaScript</noscript><p>"
+                                + "docs " * 50 + "</p></body></html>")
+
+
+def test_failing_renders_replace_drivers_concurrently():
+    class FailingDriver(FakeDriver):
+        def get(self, url):
+            raise TimeoutError(url)
+
+    built = []
+
+    def factory():
+        built.append(FailingDriver({}))
+        return built[-1]
+
+    pool = BrowserRenderPool(size=4, driver_factory=factory)
+
+    def render(url):
+        try:
+            pool.render(url)
+        except TimeoutError:
+            pass
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(render, [f"https://example.com/{i}" for i in range(200)]))
+    assert len(built) == 204 and len(pool._all_drivers) == 4
+    pool.close()
+    assert pool._all_drivers == [] and all(driver.quit_called for driver in built)
+
+
+def test_only_js_pages_are_rendered(fixture_site):
+    site = fixture_site({"/": "", "/spa": SPA_PAGE})
+    site.pages["/"] = STATIC_PAGE.format(base_url=site.base_url)
+    drivers = []
+
+    def factory():
+        drivers.append(FakeDriver({site.base_url + "/spa": RENDERED_SPA_PAGE}))
+        return drivers[-1]
+
+    crawler = SidebarCrawlerSelenium(CrawlerEngine(min_delay=0),
+                                     render_pool=BrowserRenderPool(size=2, driver_factory=factory))
+    data = crawler.crawl(site.base_url + "/")
+    crawler.close()
+
+    assert crawler.rendered_urls == {site.base_url + "/spa"}
+    assert data[site.base_url + "/spa"]["content"] == ["Rendered item"]
+    assert len(drivers) == 2 and all(driver.quit_called for driver in drivers)
@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+research_pipeline = pytest.importorskip("askharrison.research_pipeline")
+ResearchPipeline = research_pipeline.ResearchPipeline
+ResearchRecord = research_pipeline.ResearchRecord
+canonicalize_url = research_pipeline.canonicalize_url
+
+
+def test_canonicalize_url_and_record_keys():
+    assert canonicalize_url("http://www.Example.com/paper/?utm_source=x&b=2&a=1#top") == "https://example.com/paper?a=1&b=2"
+    assert ResearchRecord("google", "q", "t", "https://arxiv.org/pdf/2401.01234v2.pdf", "").key == "arxiv:2401.01234"
+    assert ResearchRecord("google", "q", "t", "https://doi.org/10.1145/3292500.3330701", "").key == "doi:10.1145/3292500.3330701"
+
+
+def test_sources_run_concurrently_and_are_merged():
+    calls = []
+
+    def slow_search(source):
+        def search(query):
+            time.sleep(0.2)
+            calls.append((source, query, threading.current_thread().name))
+            if source == "arxiv":
+                return [ResearchRecord("arxiv", query, "Attention", "http://arxiv.org/abs/1706.03762v7", "abstract",
+                                       doi="10.48550/arxiv.1706.03762")]
+            return [
+                ResearchRecord("google", query, "Attention (arXiv)", "https://arxiv.org/abs/1706.03762", "snippet"),
+                ResearchRecord("google", query, "Blog", f"https://www.blog.com/post?utm_source={query}", "snippet"),
+            ]
+        return search
+
+    pipeline = ResearchPipeline(
+        num_queries={"google": 2, "arxiv": 2},
+        expanders={source: (lambda problem, n, source=source: [f"{source} q{i}" for i in range(n)])
+                   for source in ("google", "arxiv")},
+        searchers={source: slow_search(source) for source in ("google", "arxiv")},
+        ranker=lambda problem, records, top_k: records[:top_k],
+    )
+    start = time.monotonic()
+    result = pipeline.run("transformers", top_k=5)
+    elapsed = time.monotonic() - start
+
+    assert len(calls) == 4
+    assert elapsed < 0.6  # 4 searches of 0.2s, run concurrently
+    assert result.queries == {"google": ["google q0", "google q1"], "arxiv": ["arxiv q0", "arxiv q1"]}
+    # the arXiv paper found by both sources is one record, the blog post found twice is one record
+    assert len(result.records) == 2
+    paper = next(r for r in result.records if r.arxiv_id == "1706.03762")
+    assert sorted(paper.sources) == ["arxiv", "google"] and len(paper.queries) == 4
+
+
+def test_llm_rank_skips_malformed_items(monkeypatch):
+    records = [ResearchRecord("google", "q", f"t{i}", f"https://example.com/{i}", "snippet") for i in range(3)]
+    output = ('```python\n[{"idx": 2, "overall": 9}, {"idx": "two", "overall": 8}, {"idx": None}, "3",'
+              ' {"idx": 1, "overall": "high"}, {"idx": 3, "overall": 5}, {"idx": 7, "overall": 10}]\n```')
+    monkeypatch.setattr(research_pipeline, "process_question", lambda prompt, model: output)
+
+    ranked = research_pipeline.llm_rank("problem", records, top_k=5)
+    assert [(r.title, r.score) for r in ranked] == [("t1", 9.0), ("t2", 5.0)]
+    # the records, maybe shared through caches, are not scored in place
+    assert all(r.score is None for r in records)
+
+
+def test_arxiv_queries_are_capped():
+    assert ResearchPipeline().num_queries == {"google": 10, "arxiv": 3}
+    assert ResearchPipeline(num_queries={"google": 8, "arxiv": 8}).num_queries == {"google": 8, "arxiv": 3}
+    assert ResearchPipeline(num_queries={"arxiv": 8}, max_queries_per_source={}).num_queries == {"arxiv": 8}
@@ -0,0 +1,137 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from askharrison.codeReview import main
+from askharrison.codeReview.reviewQueue import ReviewStore, ReviewWorker, ensure_worker_running, worker_is_running
+
+
+class FakeReviewer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def review_contents(self, contents):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.05)
+        with self.lock:
+            self.in_flight -= 1
+        return {path: None if "broken" in diff else f"looks good: {path}" for path, diff in contents.items()}
+
+
+def test_enqueue_dedupes_by_tree(tmp_path):
+    store = ReviewStore(str(tmp_path / "reviews.db"))
+    first = store.enqueue("tree1", {"a.py": "+x"})
+    assert store.enqueue("tree1", {"a.py": "+x"}) == first
+    assert store.enqueue("tree2", {"a.py": "+y"}) != first
+    assert store.get_job("tree1")["status"] == "queued"
+
+
+def test_worker_processes_jobs_concurrently_and_stores_results(tmp_path):
+    store = ReviewStore(str(tmp_path / "reviews.db"))
+    for i in range(4):
+        store.enqueue(f"tree{i}", {"a.py": f"+x = {i}", "b.py": "+y"})
+    store.enqueue("bad-tree", {"a.py": "broken"})
+
+    reviewer = FakeReviewer()
+    worker = ReviewWorker(store, reviewer, max_jobs=2, poll_interval=0.01, idle_timeout=0.2)
+    worker.run_forever()
+
+    assert reviewer.max_in_flight == 2
+    job = store.get_job("tree3")
+    assert job["status"] == "done"
+    assert job["reviews"] == {"a.py": "looks good: a.py", "b.py": "looks good: b.py"}
+    assert store.get_job("bad-tree")["status"] == "failed"
+    # a failed tree can be queued again
+    assert store.enqueue("bad-tree", {"a.py": "fixed"}) != job["id"]
+    assert store.get_job("bad-tree")["status"] == "queued"
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_requeue_only_jobs_of_dead_workers(tmp_path):
+    store = ReviewStore(str(tmp_path / "reviews.db"))
+    store.enqueue("live", {"a.py": "+x"})
+    store.enqueue("dead", {"a.py": "+y"})
+    assert store.claim_next()["tree_sha"] == "live"  # owned by this (live) process
+    assert store.claim_next(worker_pid=dead_pid())["tree_sha"] == "dead"
+    assert store.claim_next() is None
+
+    assert store.requeue_running() == 1
+    assert store.claim_next()["diffs"] == {"a.py": "+y"}
+    assert store.get_job("live")["status"] == "running"
+    # a live pid whose jobs stopped heartbeating (hung, or the pid was reused)
+    assert store.requeue_running(lease_seconds=-1) == 2
+
+
+def test_worker_heartbeats_its_jobs(tmp_path):
+    store = ReviewStore(str(tmp_path / "reviews.db"))
+    store.enqueue("tree", {"a.py": "+x"})
+
+    class SlowReviewer:
+        def review_contents(self, contents):
+            time.sleep(0.3)
+            return {path: "ok" for path in contents}
+
+    worker = ReviewWorker(store, SlowReviewer(), poll_interval=0.01, idle_timeout=0.05, lease_seconds=0.5)
+    beats = []
+    heartbeat = store.heartbeat
+    store.heartbeat = lambda job_ids: beats.append(list(job_ids)) or heartbeat(job_ids)
+    worker.run_forever()
+    assert store.get_job("tree")["status"] == "done"
+    assert beats and all(job_ids == [1] for job_ids in beats)
+
+
+def test_running_worker_recovers_jobs_of_a_worker_that_died_later(tmp_path):
+    store = ReviewStore(str(tmp_path / "reviews.db"))
+    worker_store = ReviewStore(str(tmp_path / "reviews.db"))
+    orphaned = threading.Event()
+    claim_next = worker_store.claim_next
+    # the worker doesn't take the job before the other worker does
+    worker_store.claim_next = lambda: claim_next() if orphaned.is_set() else None
+    worker = ReviewWorker(worker_store, FakeReviewer(), poll_interval=0.01, idle_timeout=None, lease_seconds=0.3)
+    thread = threading.Thread(target=worker.run_forever)
+    thread.start()
+    try:
+        time.sleep(0.05)  # past the worker's start
+        store.enqueue("orphan", {"a.py": "+x"})
+        store.claim_next(worker_pid=dead_pid())
+        orphaned.set()
+        deadline = time.monotonic() + 5
+        while store.get_job("orphan")["status"] != "done" and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        worker.stop()
+        thread.join()
+    assert store.get_job("orphan")["status"] == "done"
+
+
+def test_concurrent_hooks_start_one_worker(tmp_path):
+    pid_path = str(tmp_path / "worker.pid")
+    command = [sys.executable, "-c", "import time; time.sleep(5)"]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        started = list(executor.map(lambda _: ensure_worker_running(pid_path, command), range(8)))
+    pid = int(open(pid_path).read())
+    try:
+        assert started.count(True) == 1
+        assert worker_is_running(pid_path)
+    finally:
+        os.kill(pid, signal.SIGTERM)
+
+
+def test_show_unknown_commit(tmp_path, monkeypatch, capsys):
+    subprocess.check_call(["git", "init", "-q", str(tmp_path)])
+    monkeypatch.chdir(tmp_path)
+    assert main.show_review(None, "no-such-commit", check=False) == 1
+    assert "Unknown commit: no-such-commit" in capsys.readouterr().err
@@ -0,0 +1,40 @@
+import threading
+
+import pytest
+
+search_pipeline = pytest.importorskip("askharrison.search_pipeline")
+IncrementalPreRanker = search_pipeline.IncrementalPreRanker
+pipelined_search = search_pipeline.pipelined_search
+
+
+def test_search_starts_while_queries_stream():
+    first_search_started = threading.Event()
+
+    def streaming_queries():
+        yield "vector database"
+        # the expansion is still "streaming" when the first search must already run
+        assert first_search_started.wait(5)
+        yield "vector database"  # duplicates are searched once
+        yield "ann index benchmark"
+
+    def search(query):
+        first_search_started.set()
+        if query == "ann index benchmark":
+            return [{"title": "ANN benchmarks", "link": "https://ann.dev", "snippet": "vector index"},
+                    {"title": "Vector database guide", "link": "https://db.dev", "snippet": "database"}]
+        return [{"title": "Vector database guide", "link": "https://db.dev", "snippet": "vector database"},
+                {"title": "Cooking", "link": "https://food.dev", "snippet": "recipes"}]
+
+    result = pipelined_search("best vector database", streaming_queries(), search, max_candidates=2)
+    assert result.queries == ["vector database", "ann index benchmark"]
+    assert [r["link"] for r in result.results] == ["https://db.dev", "https://food.dev", "https://ann.dev", "https://db.dev"]
+    assert [r["link"] for r in result.candidates] == ["https://db.dev", "https://ann.dev"]
+
+
+def test_failed_search_is_reported_not_raised():
+    def search(query):
+        raise RuntimeError("quota exceeded")
+
+    result = pipelined_search("problem", ["q"], search)
+    assert result.results == [] and result.errors == {"q": "quota exceeded"}
+    assert len(IncrementalPreRanker("")) == 0
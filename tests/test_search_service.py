@@ -0,0 +1,85 @@
+import pytest
+
+search_service = pytest.importorskip("askharrison.search_service")
+SearchService = search_service.SearchService
+TTLCache = search_service.TTLCache
+
+
+def test_ttl_cache_is_bounded_and_expires():
+    cache = TTLCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # a is now the most recently used
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    expired = TTLCache(max_entries=2, ttl=-1)
+    expired.set("a", 1)
+    assert expired.get("a") is None and len(expired) == 0
+
+
+def test_stages_are_cached_by_normalized_problem():
+    calls = []
+
+    def search(query):
+        calls.append(query)
+        if query == "flaky":
+            raise RuntimeError("quota exceeded")
+        return [{"title": f"{query} title", "link": f"https://{len(calls)}.dev", "snippet": query}]
+
+    service = SearchService(search=search)
+    first = service.expand_and_search("Vector  Database", 5, "disable", 10)
+    assert service.expand_and_search("vector database ", 5, "disable", 10) is first
+    assert calls == ["Vector  Database"]
+    # the per-query search cache is shared with perform_search
+    assert [r.link for r in service.perform_search(["vector database"])] == ["https://1.dev"]
+    assert calls == ["Vector  Database"]
+
+    # results with failed searches are returned but not cached
+    queries, results, candidates = service.expand_and_search("flaky", 5, "disable", 10)
+    assert (queries, results) == (["flaky"], [])
+    service.expand_and_search("flaky", 5, "disable", 10)
+    assert calls.count("flaky") == 2
+
+
+def test_research_with_a_failed_query_is_not_cached(monkeypatch):
+    research_pipeline = pytest.importorskip("askharrison.research_pipeline")
+    calls = []
+
+    def search(query):
+        calls.append(query)
+        if query == "q1":
+            raise RuntimeError("rate limited")
+        return [research_pipeline.ResearchRecord("google", query, query, f"https://{query}.dev", "snippet")]
+
+    class FakePipeline(research_pipeline.ResearchPipeline):
+        def __init__(self, num_queries, query_type):
+            super().__init__(num_queries, query_type,
+                             expanders={source: lambda problem, n: [f"q{i}" for i in range(n)] for source in num_queries},
+                             searchers={source: search for source in num_queries},
+                             ranker=lambda problem, records, top_k: records[:top_k])
+
+    monkeypatch.setattr(search_service, "ResearchPipeline", FakePipeline)
+    result = FakePipeline({"google": 3}, "normal").run("problem")
+    assert result.errors == {"google: q1": "rate limited"}
+    assert [r.url for r in result.records] == ["https://q0.dev", "https://q2.dev"]
+
+    service = SearchService(search=search)
+    queries, results, _ = service.research("problem", 3, "normal", 10, ["google"])
+    assert queries == ["q0", "q1", "q2"] and len(results) == 2
+    calls.clear()
+    service.research("problem", 3, "normal", 10, ["google"])
+    assert sorted(calls) == ["q0", "q1", "q2"]  # searched again, not served from the cache
+
+
+def test_rerank_skips_invalid_items_and_does_not_cache_failures(monkeypatch):
+    outputs = ["not a list", '[{"idx": 2, "overall": 40}, {"idx": 9}, "junk", {"overall": 1}, {"idx": 1, "overall": 90}]']
+    monkeypatch.setattr(search_service, "process_question", lambda prompt, model: outputs.pop(0))
+    results = [search_service.SearchResult(query="q", title=f"t{i}", link=f"https://{i}.dev", snippet="s") for i in range(3)]
+    service = SearchService(search=lambda query: [])
+
+    failed = service.rerank_results("problem", results, top_k=3)
+    assert failed.empty and list(failed.columns) == search_service.RERANK_COLUMNS
+    reranked = service.rerank_results("problem", results, top_k=3)
+    assert reranked["link"].tolist() == ["https://0.dev", "https://1.dev"]
+    assert reranked["overall"].tolist() == [90, 40]
+    assert service.rerank_results("problem", results, top_k=3) is reranked
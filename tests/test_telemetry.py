@@ -0,0 +1,74 @@
+import contextvars
+import json
+import threading
+
+import pytest
+
+telemetry = pytest.importorskip("askharrison.telemetry")
+
+
+@pytest.fixture
+def spans():
+    exported = []
+    telemetry.configure(exporters=[type("ListExporter", (), {"export": staticmethod(exported.append)})()])
+    telemetry.metrics.reset()
+    yield exported
+    telemetry.configure()
+
+
+def test_spans_nest_across_threads_and_generators(spans):
+    def streamed():
+        yield "a"
+        yield "b"
+
+    def search():
+        with telemetry.span("search", query="q") as current:
+            current.set(results=3)
+
+    with telemetry.span("search_pipeline") as root:
+        assert list(telemetry.traced_iter("query_expansion", streamed())) == ["a", "b"]
+        worker = threading.Thread(target=contextvars.copy_context().run, args=(search,))
+        worker.start()
+        worker.join()
+        with pytest.raises(ValueError):
+            with telemetry.span("rerank"):
+                raise ValueError("bad output")
+        assert telemetry.current_span() is root
+    assert telemetry.current_span() is None
+
+    by_name = {s.name: s for s in spans}
+    assert by_name["query_expansion"].attributes["items"] == 2
+    assert by_name["rerank"].status == "error" and "bad output" in by_name["rerank"].error
+    assert all(s.trace_id == root.trace_id for s in spans)
+    assert {by_name[name].parent_id for name in ("search", "rerank", "query_expansion")} == {root.span_id}
+    assert telemetry.metrics.counter_value("askharrison_span_errors_total", span="rerank") == 1
+
+
+def test_llm_usage_and_prometheus_text(spans):
+    with telemetry.span("llm_call") as current:
+        telemetry.record_llm_usage("gpt-4o", prompt_tokens=120, completion_tokens=30, retries=1)
+    telemetry.record_cache("search", hit=True)
+    telemetry.record_cache("search", hit=False)
+
+    assert current.attributes["prompt_tokens"] == 120
+    text = telemetry.render_prometheus()
+    assert 'askharrison_llm_tokens_total{kind="prompt",model="gpt-4o"} 120' in text
+    assert 'askharrison_llm_retries_total{model="gpt-4o"} 1' in text
+    assert 'askharrison_cache_requests_total{cache="search",result="hit"} 1' in text
+    assert 'askharrison_span_duration_seconds_count{span="llm_call"} 1' in text
+    assert "# TYPE askharrison_span_duration_seconds histogram" in text
+
+
+def test_jsonl_export_and_summary(tmp_path, spans):
+    path = tmp_path / "traces.jsonl"
+    telemetry.configure(jsonl_path=str(path))
+    for _ in range(3):
+        with telemetry.span("parse_chunk") as current:
+            current.set(prompt_tokens=10, completion_tokens=5)
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(records) == 3 and "clock" not in records[0]
+    (summary,) = telemetry.summarize_traces(str(path))
+    assert summary["span"] == "parse_chunk" and summary["count"] == 3
+    assert summary["prompt_tokens"] == 30 and summary["completion_tokens"] == 15
+    assert summary["p50_s"] <= summary["p95_s"] <= summary["max_s"]